@@ -2,21 +2,25 @@ import os
 
 from kivy.app import App
 from kivy.config import Config
-from kivy.core.window import Window
 from kivy.uix.screenmanager import ScreenManager
 from gui.main_screen import MainScreen
 from settings import MAIN_SCREEN, APP_HEIGHT, APP_WIDTH
 
-Config.read(os.path.expanduser('~/.kivy/config.ini'))
-Config.set('graphics', 'resizeable', '0')
-Config.set('graphics', 'width', str(APP_WIDTH))
-Config.set('graphics', 'height', str(APP_HEIGHT))
-Config.set('kivy', 'keyboard_mode', 'system')
-Config.set('graphics', 'keyboard_mode', 'en_US')
-Config.set('graphics', 'log_level', 'info')
 
-Config.write()
-Window.size = (int(APP_WIDTH), int(APP_HEIGHT))
+def configure_window():
+    # Kept out of the module level, because the inference process re-imports this module and must not open a window
+    from kivy.core.window import Window
+
+    Config.read(os.path.expanduser('~/.kivy/config.ini'))
+    Config.set('graphics', 'resizeable', '0')
+    Config.set('graphics', 'width', str(APP_WIDTH))
+    Config.set('graphics', 'height', str(APP_HEIGHT))
+    Config.set('kivy', 'keyboard_mode', 'system')
+    Config.set('graphics', 'keyboard_mode', 'en_US')
+    Config.set('graphics', 'log_level', 'info')
+
+    Config.write()
+    Window.size = (int(APP_WIDTH), int(APP_HEIGHT))
 
 
 class StampoBot(App):
@@ -40,9 +44,12 @@ class StampoBot(App):
         return self.sm
 
     def on_stop(self):
+        from kivy.core.window import Window
+
         Window.close()
 
 
 if __name__ == '__main__':
 
+    configure_window()
     StampoBot().run()
@@ -1,28 +1,41 @@
 import os
-import glob
+import queue
 import threading
-import ntpath
 import shutil
 import time
-import joblib
 import configparser
 import cv2
 
+from concurrent.futures import Future
 from kivy.app import App
 from kivy.lang import Builder
 from kivy.uix.screenmanager import Screen
 from kivy.clock import Clock, mainthread
 from src.stamp.detector import StampDetector
+from src.inference.worker import InferenceWorker
+from src.stamp.detection_cache import DetectionCache
+from src.stamp.pick_queue import PickQueue
+from src.stamp.side_classifier import StampSideClassifier
 from src.arduino.communicator import ArduinoCom
-from src.feature.extractor import ImageFeature
+from src.feature.extractor import ImageFeature, check_feature_version
 from src.stamp.aligner import StampAligner
 from src.stamp.orientator import StampOrientation
+from src.stamp.local_orientator import LocalStampOrientation
 from src.stamp.rotator import rotate_stamp
+from src.stamp.multi_detector import estimate_multi_single_stamp
 from src.image_processing.utils import ImageUtils
 from src.stamp.collection_creator import create_main_collection_image
+from src.startup.orchestrator import StartupOrchestrator
+from src.camera.capture import CaptureManager
+from utils.frame_buf import frame_to_buf
+from utils.catalogue import Catalogue
+from utils.image_writer import AsyncImageWriter
+from utils.capture_store import CaptureStore
+from src.stamp.checkpoint import PageCheckpoint
 # from utils.folder_file_manager import log_print
-from settings import MAIN_SCREEN_PATH, SIDE_MODEL_PATH, TOP_IMAGE_PATH, BOTTOM_IMAGE_PATH, CONFIG_FILE_PATH, \
-    OUTPUT_DIR, TEMP_IMAGE_DIR, TEMP_FINAL_IMAGE_DIR, FRONT_ROI, BACK_ROI
+from settings import MAIN_SCREEN_PATH, SIDE_MODEL_PATH, FAST_SIDE_MODEL_PATH, CONFIG_FILE_PATH, OUTPUT_DIR, \
+    TEMP_FINAL_IMAGE_DIR, FRONT_ROI, BACK_ROI, ORIENTATION_MODEL_PATH, ORIENTATION_ENGINE, \
+    STAMP_PREVIEW_SIZE, DETECTION_DEADLINE
 
 Builder.load_file(MAIN_SCREEN_PATH)
 
@@ -37,13 +50,45 @@ class MainScreen(Screen):
         self.top_cam_num = int(params.get('DEFAULT', 'top_cam'))
         self.bottom_cam = int(params.get('DEFAULT', 'bottom_cam'))
         self.stamp_detector_cam_num = int(params.get('DEFAULT', 'stamp_detector_cam'))
-        self.stamp_detector = StampDetector()
-        self.ard_com = ArduinoCom()
-        self.stamp_aligner = StampAligner()
-        self.stamp_orientation = StampOrientation()
+        self.inference_server = None
+        self.inference_process = params.get('DEFAULT', 'inference_process', fallback="false") == "true"
+        self.multi_gate = params.get('DEFAULT', 'multi_gate', fallback="false") == "true"
+        self.stamp_detector = None
+        self.detection_cache = None
+        self.image_feature = None
+        self.side_model = None
+        self.fast_side_model = None
+        self.side_classifier = None
+        self.ard_com = None
+        self.pick_queue = PickQueue()
+        self.catalogue = Catalogue()
+        self.checkpoint = PageCheckpoint()
+        self.image_writer = AsyncImageWriter()
+        self.capture_manager = CaptureManager()
+        self.capture_store = CaptureStore(image_writer=self.image_writer)
+        # The catalogue records the path of every final stamp, so they are never dropped from a full writer queue
+        self.final_stamp_store = CaptureStore(capture_dir=TEMP_FINAL_IMAGE_DIR, image_writer=self.image_writer,
+                                              success_sample=1, droppable=False)
+        self.stamp_aligner = StampAligner(catalogue=self.catalogue, image_writer=self.image_writer)
+        self.orientation_engine = params.get('DEFAULT', 'orientation_engine', fallback=ORIENTATION_ENGINE) or \
+            ORIENTATION_ENGINE
+        self.stamp_orientation = StampOrientation() if self.orientation_engine == "google" else None
+        self.orientation_model = None
         self.image_utils = ImageUtils()
-        self.side_model = joblib.load(SIDE_MODEL_PATH)
-        self.image_feature = ImageFeature()
+        self.startup = StartupOrchestrator()
+        self.component_lock = threading.Lock()
+        self.startup.on_component_ready(self.on_component_ready)
+        if self.inference_process:
+            # Fails early on Python 3.7 or earlier and with the tf1 backend, see check_server_support
+            from src.inference.server import InferenceServer
+
+            self.inference_server = InferenceServer()
+        self.startup.add("detector", self.load_stamp_detector)
+        self.startup.add("feature", self.load_image_feature)
+        self.startup.add("side_model", self.load_side_model)
+        self.startup.add("arduino", ArduinoCom)
+        if self.orientation_engine == "local":
+            self.startup.add("orientation_model", self.load_orientation_model)
         self.ard_threading = None
         self.run_time_threading = None
         self.main_threading = None
@@ -56,6 +101,94 @@ class MainScreen(Screen):
         self.processing_time = 0
         self.finished_collection = 0
         self.__initialize_collection_dir()
+        self.__restore_checkpoint()
+
+    def load_stamp_detector(self):
+        if self.inference_process:
+            from src.inference.server import RemoteStampDetector
+
+            stamp_detector = InferenceWorker(detector_factory=lambda: RemoteStampDetector(server=self.inference_server))
+            self.inference_server.wait_ready()
+        else:
+            stamp_detector = InferenceWorker(detector_factory=StampDetector)
+        stamp_detector.wait_ready()
+
+        return stamp_detector
+
+    def load_image_feature(self):
+        if self.inference_process:
+            from src.inference.server import RemoteImageFeature
+
+            self.inference_server.wait_ready()
+            return RemoteImageFeature(server=self.inference_server)
+
+        return ImageFeature()
+
+    @staticmethod
+    def load_side_model():
+        import joblib
+
+        fast_model = joblib.load(FAST_SIDE_MODEL_PATH) if os.path.exists(FAST_SIDE_MODEL_PATH) else None
+
+        # The fast model runs on colour/texture statistics, only the side model depends on the Inception features
+        return check_feature_version(model=joblib.load(SIDE_MODEL_PATH), model_path=SIDE_MODEL_PATH), fast_model
+
+    @staticmethod
+    def load_orientation_model():
+        import joblib
+
+        return check_feature_version(model=joblib.load(ORIENTATION_MODEL_PATH), model_path=ORIENTATION_MODEL_PATH)
+
+    def on_component_ready(self, name, error):
+        if error is not None:
+            print(f"[ERROR] Failed to load {name}: {error}")
+        else:
+            # The loaders finish on different threads, the components depending on 2 of them are built only once
+            with self.component_lock:
+                self.__set_component(name=name, component=self.startup.get(name))
+        if all([status != "loading" for status in self.startup.get_status().values()]):
+            print(self.startup.get_report())
+        self.display_startup_status()
+
+    def __set_component(self, name, component):
+        if name == "detector":
+            self.stamp_detector = component
+            self.detection_cache = DetectionCache(detector=self.stamp_detector)
+        elif name == "feature":
+            self.image_feature = component
+        elif name == "side_model":
+            self.side_model, self.fast_side_model = component
+        elif name == "arduino":
+            self.ard_com = component
+        elif name == "orientation_model":
+            self.orientation_model = component
+        if self.image_feature is not None and self.orientation_model is not None and \
+                not isinstance(self.stamp_orientation, LocalStampOrientation):
+            self.stamp_orientation = LocalStampOrientation(image_feature=self.image_feature,
+                                                           orientation_model=self.orientation_model)
+        if self.image_feature is not None and self.side_model is not None and self.side_classifier is None:
+            self.side_classifier = StampSideClassifier(image_feature=self.image_feature, side_model=self.side_model,
+                                                       fast_model=self.fast_side_model,
+                                                       image_writer=self.image_writer)
+
+    @mainthread
+    def display_startup_status(self):
+        status = self.startup.get_status()
+        if all([s_value == "ready" for s_value in status.values()]):
+            self.ids.startup_status.text = "Ready"
+        else:
+            self.ids.startup_status.text = ", ".join([f"{name}: {s_value}" for name, s_value in status.items()
+                                                      if s_value != "ready"])
+
+    def __submit_detection(self, frames):
+        # A worker queue which stays full gives a failed future, so the control loop never blocks on it
+        try:
+            return self.stamp_detector.submit_batch(frames=frames, deadline=DETECTION_DEADLINE,
+                                                    timeout=DETECTION_DEADLINE)
+        except queue.Full:
+            detection_future = Future()
+            detection_future.set_exception(TimeoutError("Inference queue stayed full"))
+            return detection_future
 
     @staticmethod
     def check_roi(roi, rect):
@@ -66,43 +199,57 @@ class MainScreen(Screen):
             return False
 
     def __initialize_collection_dir(self):
-        collection_dirs = glob.glob(os.path.join(OUTPUT_DIR, "*.*"))
-        output_indices = []
-        for c_dir in collection_dirs:
-            c_index = int(ntpath.basename(c_dir).replace("collection", ""))
-            output_indices.append(c_index)
-        if output_indices:
-            self.collection_num = max(output_indices) + 1
-        else:
-            self.collection_num = 1
+        self.collection_num = self.catalogue.get_next_index("collection")
+
+        return
+
+    def __restore_checkpoint(self):
+        st_time = time.time()
+        state = self.checkpoint.load()
+        if state is None:
+            return
+        for key, value in state["counters"].items():
+            setattr(self, key, value)
+        self.stamp_aligner.restore(stamps=state["stamps"], buffered=state["buffered"])
+        print(f"[INFO] Restored collection {self.collection_num}, picture {self.picture_num} with "
+              f"{len(state['stamps']) + len(state['buffered'])} stamps in {time.time() - st_time:.3f}s")
+
+        return
+
+    def __save_checkpoint(self):
+        stamps, buffered = self.stamp_aligner.get_stamps()
+        self.checkpoint.save(counters={"collection_num": self.collection_num, "picture_num": self.picture_num,
+                                       "stamp_num": self.stamp_num, "finished_collection": self.finished_collection},
+                             stamps=stamps, buffered=buffered)
 
         return
 
     def on_enter(self, *args):
-        self.ids.stamp_cam.start(port_num=self.stamp_detector_cam_num)
-        self.ids.top_cam.start(port_num=self.top_cam_num)
-        self.ids.bottom_cam.start(port_num=self.bottom_cam)
+        # The GUI and the pipeline share the grab thread of every camera
+        self.ids.stamp_cam.start(capture=self.capture_manager.start("stamp", port_num=self.stamp_detector_cam_num))
+        self.ids.top_cam.start(capture=self.capture_manager.start("top", port_num=self.top_cam_num))
+        self.ids.bottom_cam.start(capture=self.capture_manager.start("bottom", port_num=self.bottom_cam))
 
     def on_leave(self, *args):
         self.ids.stamp_cam.stop()
         self.ids.top_cam.stop()
         self.ids.bottom_cam.stop()
+        self.capture_manager.stop()
         self.start_ret = False
-        self.ard_com.receive_ret = False
-        self.ard_threading.join()
-        self.run_time_threading.join()
-        self.main_threading.join()
+        if self.ard_com is not None:
+            self.ard_com.receive_ret = False
+        for thread in [self.ard_threading, self.run_time_threading, self.main_threading]:
+            if thread is not None:
+                thread.join()
         super(MainScreen, self).on_leave(*args)
 
-    def get_stamp_side(self, frame_path):
-        frame_feature = self.image_feature.get_feature_from_file(img_path=frame_path)
-        stamp_side_proba = max(self.side_model.predict_proba([frame_feature])[0])
-        stamp_side = self.side_model.predict([frame_feature])[0]
-
-        return stamp_side, stamp_side_proba
-
     def start_process(self):
+        if not self.startup.is_ready():
+            print(f"[WARNING] Components are not ready yet: {self.startup.get_status()}")
+            return
         self.start_ret = True
+        self.detection_cache.invalidate()
+        self.pick_queue.invalidate()
         self.ard_com.receive_ret = True
         self.ard_com.send_command_arduino(command=f"1000, 1000")
         self.ard_threading = threading.Thread(target=self.ard_com.receive_command_arduino)
@@ -120,19 +267,28 @@ class MainScreen(Screen):
             self.start_ret = False
             print("[WARNING] Please input number of picture per collection among 2, 4, 6, 8 and 10")
         while self.start_ret:
-            frame = self.ids.stamp_cam.get_frame()
-            if frame is None:
-                break
+            if self.ard_com.ard_res not in ["d", "m"]:
+                time.sleep(0.01)
+                continue
             if self.ard_com.ard_res == "d":
-                detected_stamp_rect, detected_stamp_scores = self.stamp_detector.detect_from_images(frame=frame,
-                                                                                                    stamp_top_ret=True)
-                if detected_stamp_scores:
-                    detected_stamp = detected_stamp_rect[detected_stamp_scores.index(max(detected_stamp_scores))]
-                    stamp_x = int((detected_stamp[0] + detected_stamp[2]) / 2)
-                    stamp_y = int((detected_stamp[1] + detected_stamp[3]) / 2)
-                    print(f"[INFO] Pick Stamp at {stamp_x}, {stamp_y}")
-                    ard_x = (stamp_y - 996) * 0.09368 + 190
-                    ard_y = (stamp_x - 1249) * 0.09368 - 20
+                # Only frames grabbed after the Arduino response are used, instead of whatever the camera had last
+                stamp_capture = self.capture_manager.get("stamp").wait_for_frame(after_ts=self.ard_com.res_time)
+                if stamp_capture is None:
+                    # The response is kept, so the frame is waited for again in the next iteration
+                    print("[WARN] No new frame from the stamp camera, retrying")
+                    continue
+                frame = stamp_capture[0]
+                stamp_pick = self.pick_queue.next_pick(frame=frame)
+                if stamp_pick is None:
+                    detected_stamp_rect, detected_stamp_scores = \
+                        self.detection_cache.detect_from_images(frame=frame, stamp_top_ret=True)
+                    print(f"[INFO] Detection cache: {self.detection_cache.get_stats()}")
+                    self.pick_queue.fill(rect_list=detected_stamp_rect, scores=detected_stamp_scores, frame=frame)
+                    stamp_pick = self.pick_queue.next_pick(frame=frame)
+                if stamp_pick is not None:
+                    stamp_x, stamp_y = stamp_pick["pixel_pos"]
+                    print(f"[INFO] Pick Stamp at {stamp_x}, {stamp_y}, {len(self.pick_queue)} stamps left in queue")
+                    ard_x, ard_y = stamp_pick["arm_pos"]
                     print(f"[INFO] Pick Stamp at {ard_x}, {ard_y} as Robot Arm Pos")
                     self.ard_com.send_command_arduino(command=f"{ard_x},{ard_y}")
                     self.ard_com.ard_res = None
@@ -140,16 +296,42 @@ class MainScreen(Screen):
                     self.ard_com.send_command_arduino(command="150,0")
                     self.ard_com.ard_res = None
             if self.ard_com.ard_res == "m":
-                top_frame = self.ids.top_cam.get_frame()
-                bottom_frame = self.ids.bottom_cam.get_frame()
-                if top_frame is None or bottom_frame is None:
-                    break
-                cv2.imwrite(os.path.join(TEMP_IMAGE_DIR, f"top_frame_{time.time()}.jpg"), top_frame)
-                cv2.imwrite(os.path.join(TEMP_IMAGE_DIR, f"bottom_frame_{time.time()}.jpg"), bottom_frame)
+                # The stamp is in front of the cameras once the Arduino answered "m"
+                res_time = self.ard_com.res_time
+                top_capture = self.capture_manager.get("top").wait_for_frame(after_ts=res_time)
+                bottom_capture = self.capture_manager.get("bottom").wait_for_frame(after_ts=res_time)
+                if top_capture is None or bottom_capture is None:
+                    print("[WARN] No new frame from the top or bottom camera, retrying")
+                    continue
+                top_frame, bottom_frame = top_capture[0], bottom_capture[0]
+                captures = {"top": top_frame, "bottom": bottom_frame}
+                stage_time = time.time()
+                # The gate runs while the worker detects, a gated capture only discards the detection
+                detection_future = self.__submit_detection(frames=[top_frame, bottom_frame])
+                if self.multi_gate:
+                    top_gate = estimate_multi_single_stamp(frame=top_frame)
+                    bottom_gate = estimate_multi_single_stamp(frame=bottom_frame)
+                    if {top_gate, bottom_gate} & {"Multi", "None"}:
+                        print(f"[INFO] Multi or None Detected by gate: {top_gate}, {bottom_gate}")
+                        detection_future.cancel()
+                        self.ard_com.send_command_arduino(command="none")
+                        self.capture_store.save(frames=captures,
+                                                outcome=f"gate_{top_gate.lower()}_{bottom_gate.lower()}")
+                        self.ard_com.ard_res = None
+                        continue
                 top_height, top_width = top_frame.shape[:2]
                 bottom_height, bottom_width = bottom_frame.shape[:2]
-                top_stamps_rect, _ = self.stamp_detector.detect_from_images(frame=top_frame)
-                bottom_stamps_rect, _ = self.stamp_detector.detect_from_images(frame=bottom_frame)
+                try:
+                    [(top_stamps_rect, _), (bottom_stamps_rect, _)] = \
+                        detection_future.result(timeout=DETECTION_DEADLINE)
+                except Exception as e:
+                    # A stuck or failed worker returns the stamp like a multi or none capture instead of blocking
+                    print(f"[WARN] Detection failed: {e!r}")
+                    self.ard_com.send_command_arduino(command="none")
+                    self.capture_store.save(frames=captures, outcome="detection_failed")
+                    self.ard_com.ard_res = None
+                    continue
+                print(f"[INFO] Inference worker: {self.stamp_detector.get_stats()}")
                 if len(top_stamps_rect) == 1 and len(bottom_stamps_rect) == 1:
                     if self.check_roi(roi=self.front_init_pos, rect=top_stamps_rect) and \
                             self.check_roi(roi=self.back_init_pos, rect=bottom_stamps_rect):
@@ -159,15 +341,17 @@ class MainScreen(Screen):
                                                                                          top_height),
                                                   max(top_stamps_rect[0][0] - 20, 0):min(top_stamps_rect[0][2] + 20,
                                                                                          top_width)]
-                        cv2.imwrite(TOP_IMAGE_PATH, top_stamp_roi)
                         bottom_stamp_roi = \
                             bottom_frame[max(bottom_stamps_rect[0][1] - 20, 0):min(bottom_stamps_rect[0][3] + 20,
                                                                                    bottom_height),
                                          max(bottom_stamps_rect[0][0] - 20, 0):min(bottom_stamps_rect[0][2] + 20,
                                                                                    bottom_width)]
-                        cv2.imwrite(BOTTOM_IMAGE_PATH, bottom_stamp_roi)
-                        top_side, top_proba = self.get_stamp_side(frame_path=TOP_IMAGE_PATH)
-                        bottom_side, bottom_proba = self.get_stamp_side(frame_path=BOTTOM_IMAGE_PATH)
+                        stage_timings = {"detection": time.time() - stage_time}
+                        stage_time = time.time()
+                        [(top_side, top_proba), (bottom_side, bottom_proba)] = \
+                            self.side_classifier.classify(top_roi=top_stamp_roi, bottom_roi=bottom_stamp_roi)
+                        stage_timings["side"] = time.time() - stage_time
+                        print(f"[INFO] Side classification: {self.side_classifier.last_report}")
                         if top_side == "front" and bottom_side == "front":
                             if top_proba > bottom_proba:
                                 front_stamp_image = top_stamp_roi
@@ -182,11 +366,16 @@ class MainScreen(Screen):
                                 else:
                                     self.ard_com.send_command_arduino(command="retry")
                                     self.ard_com.ard_res = None
+                                    self.capture_store.save(frames=captures, outcome="back")
                                     continue
                         processed_image = front_stamp_image
                         # processed_image = self.image_utils.run(frame=front_stamp_image)
-                        rotated_image_path, rotated_image = rotate_stamp(frame=processed_image)
-                        orientation = self.stamp_orientation.estimate_rotate_angle(frame_path=rotated_image_path)
+                        stage_time = time.time()
+                        _, rotated_image = rotate_stamp(frame=processed_image)
+                        stage_timings["rotation"] = time.time() - stage_time
+                        stage_time = time.time()
+                        orientation = self.stamp_orientation.estimate_rotate_angle(frame=rotated_image)
+                        stage_timings["orientation"] = time.time() - stage_time
                         if orientation == "normal":
                             final_stamp_image = rotated_image
                         elif orientation == "clock":
@@ -195,41 +384,67 @@ class MainScreen(Screen):
                             final_stamp_image = cv2.rotate(rotated_image, cv2.ROTATE_90_COUNTERCLOCKWISE)
                         else:
                             final_stamp_image = cv2.rotate(rotated_image, cv2.ROTATE_180)
-                        cv2.imwrite(os.path.join(TEMP_FINAL_IMAGE_DIR, f"{self.picture_num}_{self.stamp_num}.jpg"),
-                                    final_stamp_image)
-                        res, align_image_path = self.stamp_aligner.pack_stamps(stamp_frame=final_stamp_image,
-                                                                               collection_num=self.collection_num,
-                                                                               picture_num=self.picture_num)
+                        final_stamp_name = f"{self.collection_num}_{self.picture_num}_{self.stamp_num}.jpg"
+                        stamp_id = self.catalogue.add_stamp(collection_num=self.collection_num,
+                                                            picture_num=self.picture_num, stamp_num=self.stamp_num,
+                                                            path=os.path.join(TEMP_FINAL_IMAGE_DIR, final_stamp_name),
+                                                            side="top" if front_stamp_image is top_stamp_roi
+                                                            else "bottom", orientation=orientation,
+                                                            timings=stage_timings)
+                        stage_time = time.time()
+                        res, _ = self.stamp_aligner.pack_stamps(stamp_frame=final_stamp_image,
+                                                                collection_num=self.collection_num,
+                                                                picture_num=self.picture_num, stamp_id=stamp_id)
+                        self.catalogue.add_timings(stamp_id=stamp_id, timings={"packing": time.time() - stage_time})
+                        self.capture_store.save(frames=captures, outcome="single", stamp_id=stamp_id)
+                        self.final_stamp_store.save(frames={"final": final_stamp_image}, outcome="single",
+                                                    stamp_id=stamp_id, file_names={"final": final_stamp_name})
                         self.stamp_num += 1
                         ard_cmd = "retry"
                         if res:
                             self.picture_num += 1
                         if self.picture_num > pic_per_collection:
                             ard_cmd = "complete"
-                        Clock.schedule_once(lambda dt: self.insert_image(rotated_image_path, align_image_path))
+                        # Only downscaled frames are handed to the GUI, the pages are written when complete
+                        rotated_scale = min(STAMP_PREVIEW_SIZE / max(rotated_image.shape[:2]), 1.0)
+                        rotated_preview = cv2.resize(rotated_image, None, fx=rotated_scale, fy=rotated_scale,
+                                                     interpolation=cv2.INTER_AREA)
+                        align_preview = self.stamp_aligner.get_preview()
+                        Clock.schedule_once(lambda dt: self.insert_image(rotated_preview, align_preview))
                         self.ard_com.send_command_arduino(command=ard_cmd)
                         if self.picture_num > pic_per_collection:
-                            create_main_collection_image(collection_num=self.collection_num)
+                            # The pages of the collection have to be on disk before they are composed
+                            self.image_writer.flush()
+                            create_main_collection_image(collection_num=self.collection_num,
+                                                         catalogue=self.catalogue, image_writer=self.image_writer)
+                            print(f"[INFO] Stage timings: {self.catalogue.get_stage_timings()}")
+                            print(f"[INFO] Image writer: {self.image_writer.get_stats()}")
+                            print(f"[INFO] Capture store: {self.capture_store.get_stats()}")
+                            print(f"[INFO] Cameras: {self.capture_manager.get_stats()}")
                             self.picture_num = 1
                             self.collection_num += 1
                             self.stamp_num = 0
                             self.finished_collection += 1
+                        if res:
+                            # The crops of a closed page leave the checkpoint only once the page is on disk
+                            self.image_writer.flush()
+                        self.__save_checkpoint()
                     else:
                         print("[INFO] Multi or None Detected")
                         self.ard_com.send_command_arduino(command="none")
+                        self.capture_store.save(frames=captures, outcome="out_of_roi")
                 else:
                     print("[INFO] Multi or None Detected")
                     self.ard_com.send_command_arduino(command="none")
+                    self.capture_store.save(frames=captures, outcome="multi_none")
                 self.ard_com.ard_res = None
 
         return
 
     @mainthread
-    def insert_image(self, rotate_img_path, align_img_path):
-        self.ids.rotated_image.source = rotate_img_path
-        self.ids.align_image.source = align_img_path
-        self.ids.rotated_image.reload()
-        self.ids.align_image.reload()
+    def insert_image(self, rotated_preview, align_preview):
+        self.ids.rotated_image.texture = frame_to_buf(frame=rotated_preview)
+        self.ids.align_image.texture = frame_to_buf(frame=align_preview)
         self.ids.finished_collection.text = str(self.finished_collection)
         self.ids.no_stamps.text = str(self.stamp_num)
         # print(self.rotated_image_path)
@@ -255,9 +470,14 @@ class MainScreen(Screen):
             self.run_time_threading.join()
         if self.main_threading is not None:
             self.main_threading.join()
-        self.ard_com.receive_ret = False
+        if self.ard_com is not None:
+            self.ard_com.receive_ret = False
         if self.ard_threading is not None:
             self.ard_threading.join()
+        self.image_writer.flush()
+        # The stamps of the dropped collection are left out of the next one
+        self.stamp_aligner.reset()
+        self.checkpoint.clear()
         self.processing_time = 0
         self.stamp_num = 0
         self.picture_num = 1
@@ -269,6 +489,7 @@ class MainScreen(Screen):
         if self.picture_num <= pic_per_collection:
             if os.path.exists(os.path.join(OUTPUT_DIR, f"collection{self.collection_num}")):
                 shutil.rmtree(os.path.join(OUTPUT_DIR, f"collection{self.collection_num}"))
+            self.catalogue.remove_collection(collection_num=self.collection_num)
         else:
             self.collection_num += 1
 
@@ -283,10 +504,21 @@ class MainScreen(Screen):
 
     def close_window(self):
         self.start_ret = False
-        self.ard_com.receive_ret = False
-        self.run_time_threading.join()
-        self.ard_threading.join()
-        self.main_threading.join()
+        if self.ard_com is not None:
+            self.ard_com.receive_ret = False
+        for thread in [self.run_time_threading, self.ard_threading, self.main_threading]:
+            if thread is not None:
+                thread.join()
+        self.startup.shutdown()
+        if self.stamp_detector is not None:
+            self.stamp_detector.stop()
+        if self.inference_server is not None:
+            self.inference_server.stop()
+        self.capture_manager.stop()
+        self.image_writer.close()
+        self.capture_store.close()
+        self.final_stamp_store.close()
+        self.catalogue.close()
         App.get_running_app().stop()
 
     def on_close(self):
@@ -48,46 +48,25 @@ class VideoWidget(Image):
 
     def __init__(self, **kwargs):
         self._capture = None
+        self._frame_seq = None
         self.port_num = 0
         super(VideoWidget, self).__init__(**kwargs)
 
-    def on_port_num(self, *args):
+    def start(self, capture):
         """
-        This function should be called once this widget is created.
-        If we call this function in self.__init__() function, height & width will have default value.
-        :param args:
+        Start live video feed of the camera capture, which grabs the frames on its own thread
         :return:
         """
-        try:
-            self._capture = cv2.VideoCapture(self.port_num)
-            self._capture.set(cv2.CAP_PROP_FRAME_WIDTH, self.camera_width)
-            self._capture.set(cv2.CAP_PROP_FRAME_HEIGHT, self.camera_height)
-            # self._frame = None
-        except Exception as e:
-            Logger.error('KioskVideoWidget: Failed to assign port number - {}'.format(e))
-            self._capture = None
-
-    def start(self, port_num):
-        """
-        Start live video feed
-        :return:
-        """
-        self.port_num = port_num
+        self._capture = capture
+        self.port_num = capture.port_num
         if self.is_running:
             return
 
-        if self.port_num is not None:
-            if self._capture is None:
-                self.on_port_num()
-
-            if self._event_take_video is None:
-                self._event_take_video = Clock.schedule_interval(lambda dt: self._take_video(), 1.0 / 30.0)
-            else:
-                self._event_take_video()
-            self.is_running = True
+        if self._event_take_video is None:
+            self._event_take_video = Clock.schedule_interval(lambda dt: self._take_video(), 1.0 / 30.0)
         else:
-            self.source = BAD_FRAME_PATH
-            Logger.warning('KioskVideo: Port is not set yet')
+            self._event_take_video()
+        self.is_running = True
 
     def pause(self):
         if self._event_take_video and self._event_take_video.is_triggered:
@@ -97,16 +76,16 @@ class VideoWidget(Image):
 
     def _take_video(self):
         """
-        Capture video frame and update image widget
+        Display the latest frame of the capture, the UI thread never waits on the camera
         :return:
         """
-        try:
-            if type(self.port_num) == int:
-                ret, frame = self._capture.read()
-            else:
-                frame = None
-        except (cv2.error, AttributeError, ConnectionError):
-            frame = None
+        if self._capture is None:
+            frame, frame_seq = None, None
+        else:
+            frame, _, frame_seq = self._capture.read()
+        if frame is not None and frame_seq == self._frame_seq:
+            return
+        self._frame_seq = frame_seq
         self._update_video(origin_frame=frame)
 
     def _update_video(self, origin_frame, *args):
@@ -122,6 +101,9 @@ class VideoWidget(Image):
             self._frame = origin_frame
 
     def get_frame(self):
+        if self._capture is not None:
+            return self._capture.get_frame()
+
         return self._frame
 
     def save_to_file(self, filename):
@@ -135,10 +117,7 @@ class VideoWidget(Image):
             Logger.error('KioskVideoWidget: Tried to save to file, but current frame is none!')
 
     def stop(self):
+        # The camera itself is released by its CaptureManager
         self.pause()
-        try:
-            if self._capture is not None:
-                self._capture.release()
-                self._capture = None
-        except AttributeError:
-            pass
+        self._capture = None
+        self._frame_seq = None
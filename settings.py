@@ -8,10 +8,18 @@ MODEL_DIR = os.path.join(CUR_DIR, 'utils', 'model')
 OUTPUT_DIR = make_directory_if_not_exists(os.path.join(CUR_DIR, 'output'))
 TEMP_IMAGE_DIR = make_directory_if_not_exists(os.path.join(CUR_DIR, 'temp'))
 TEMP_FINAL_IMAGE_DIR = make_directory_if_not_exists(os.path.join(CUR_DIR, 'temp_final'))
+CATALOGUE_PATH = os.path.join(OUTPUT_DIR, 'catalogue.db')
+CHECKPOINT_DIR = os.path.join(CUR_DIR, 'checkpoint')
 
 CREDENTIAL_PATH = os.path.join(CUR_DIR, 'utils', 'credential', 'vision_key.txt')
+VISION_CACHE_DIR = os.path.join(CUR_DIR, 'vision_cache')
 STAMP_MODEL_PATH = os.path.join(MODEL_DIR, 'stamp_detector_v2.pb')
 SIDE_MODEL_PATH = os.path.join(MODEL_DIR, 'side_classifier.pkl')
+FAST_SIDE_MODEL_PATH = os.path.join(MODEL_DIR, 'side_classifier_fast.pkl')
+ORIENTATION_MODEL_PATH = os.path.join(MODEL_DIR, 'orientation_classifier.pkl')
+FEATURE_MODEL_PATH = os.path.join(MODEL_DIR, 'classify_image_graph_def.pb')
+STAMP_ONNX_MODEL_PATH = os.path.join(MODEL_DIR, 'stamp_detector_v2.onnx')
+FEATURE_ONNX_MODEL_PATH = os.path.join(MODEL_DIR, 'inception_pool3.onnx')
 CONFIG_FILE_PATH = os.path.join(CUR_DIR, 'user_config.cfg')
 TOP_IMAGE_PATH = os.path.join(CUR_DIR, 'top.jpg')
 BOTTOM_IMAGE_PATH = os.path.join(CUR_DIR, 'bottom.jpg')
@@ -22,13 +30,82 @@ MAIN_SCREEN = "main_screen"
 APP_WIDTH = '1920'
 APP_HEIGHT = '1080'
 ROTATION_Y_THREAD = 50
+ORIENTATION_ENGINE = "google"
+VISION_ENDPOINT_URL = 'https://vision.googleapis.com/v1/images:annotate'
+VISION_CONNECT_TIMEOUT = 3
+VISION_READ_TIMEOUT = 10
+VISION_DEADLINE = 15
+VISION_MAX_RETRIES = 2
+VISION_RETRY_BACKOFF = 0.5
+VISION_POOL_SIZE = 4
+VISION_BATCH_SIZE = 16
+VISION_CACHE_ENTRIES = 2000
+OCR_MAX_SIDE = 1024
+OCR_JPEG_QUALITY = 85
 CONFIDENCE = 0.6
 BAUD_RATE = 115200
 STAMP_AREA_THRESH = 0.02
+# Frames larger than this are searched for contours downscaled, the stamp ROIs are usually searched at full resolution
+CONTOUR_MAX_SIDE = 1024
+MULTI_GATE_UNSURE_RATIO = 0.5
 PIXEL_TO_MM = 11.2
 PAPER_WIDTH = 210
 PAPER_HEIGHT = 290
+PACKING_ALGO = "maxrects_bssf"
+PACKING_ROTATION = False
+PACKING_LOOK_AHEAD = 1
+PAGE_PREVIEW_WIDTH = 480
+COLLECTION_IMAGE_SCALE = 0.7
+COLLECTION_DECODE_WORKERS = 4
+IMAGE_WRITER_WORKERS = 2
+IMAGE_WRITER_QUEUE_SIZE = 8
+IMAGE_WRITER_POLICY = "drop"
+CAPTURE_MAX_COUNT = 2000
+CAPTURE_MAX_MB = 20000
+CAPTURE_MAX_AGE_HOURS = 72
+CAPTURE_SUCCESS_SAMPLE = 10
+CAPTURE_SCALE = 1.0
+CAMERA_WIDTH = 3840
+CAMERA_HEIGHT = 2160
+STAMP_PREVIEW_SIZE = 320
 DETECTION_REGION = [466, 390, 2870, 2325]
+DETECTION_MODE = "full"
+INFERENCE_BACKEND = "tf1"
+DETECTOR_INPUT = 'image_tensor:0'
+DETECTOR_OUTPUTS = ['detection_boxes:0', 'detection_scores:0', 'detection_classes:0', 'num_detections:0']
+FEATURE_INPUT = 'Mul:0'
+FEATURE_OUTPUTS = ['pool_3:0']
+FEATURE_INPUT_SIZE = 299
+# 1: JPEG round trip and TensorFlow 1 ResizeBilinear, as the shipped classifiers were trained on, 2: cv2 bilinear resize
+FEATURE_VERSION = 1
+INFERENCE_QUEUE_SIZE = 4
+# Seconds the control loop waits for the top/bottom detection before it gives up on the capture
+DETECTION_DEADLINE = 10
+SAVE_SIDE_IMAGES = False
+CASCADE_CONFIDENCE = 0.9
+STATISTICS_IMAGE_SIZE = 128
+SHARED_FRAME_SLOTS = 4
+SHARED_FRAME_SLOT_BYTES = 3840 * 2160 * 3
+# Seconds to wait for the inference process to load its models and to answer one call
+INFERENCE_LOAD_TIMEOUT = 300
+INFERENCE_RESULT_TIMEOUT = 30
+DETECTION_LONG_SIDE = 1280
+DETECTION_TILE_SIZE = 1024
+DETECTION_TILE_OVERLAP = 256
+NMS_IOU_THRESH = 0.5
+NMS_CONTAIN_THRESH = 0.8
+MOTION_SIGNATURE_WIDTH = 160
+MOTION_DIFF_THRESH = 25
+MOTION_CHANGED_RATIO = 0.002
+CACHE_PICK_MARGIN = 40
+ARM_PIXEL_ORIGIN = [1249, 996]
+ARM_POS_OFFSET = [190, -20]
+ARM_MM_PER_PIXEL = 0.09368
+ARM_HOME_POS = [150, 0]
+PICK_SCORE_WEIGHT = 1.0
+PICK_ISOLATION_WEIGHT = 0.5
+PICK_DISTANCE_WEIGHT = 0.3
+PICK_ISOLATION_NORM = 200
 FRONT_ROI = []
 BACK_ROI = []
 
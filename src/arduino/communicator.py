@@ -12,6 +12,8 @@ class ArduinoCom:
         params.read(CONFIG_FILE_PATH)
         self.ard = serial.Serial(params.get('DEFAULT', 'arduino_port'), BAUD_RATE, timeout=5)
         self.ard_res = "detect"
+        # time.monotonic() of the last response, set before ard_res so that it is never older than the response read
+        self.res_time = time.monotonic()
         self.receive_ret = True
         time.sleep(2)
 
@@ -31,6 +33,7 @@ class ArduinoCom:
             response = self.ard.read(self.ard.inWaiting())
             decode_res = response.decode().replace("\r\n", "")
             if decode_res != "":
+                self.res_time = time.monotonic()
                 self.ard_res = decode_res
                 print(f"[INFO] From Arduino: {self.ard_res}")
             time.sleep(0.1)
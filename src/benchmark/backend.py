@@ -0,0 +1,63 @@
+import os
+import sys
+import glob
+import time
+import cv2
+
+from src.benchmark.utils import get_peak_rss_mb, run_isolated
+from src.inference.backend import BACKENDS
+from settings import CUR_DIR
+
+
+def benchmark_backend(backend_name, img_dir, repeat):
+    from src.stamp.detector import StampDetector
+    from src.feature.extractor import ImageFeature
+
+    frames = [cv2.imread(i_file) for i_file in sorted(glob.glob(os.path.join(img_dir, "*.jpg")))]
+    report = {"backend": backend_name}
+    try:
+        st_time = time.time()
+        stamp_detector = StampDetector(backend_name=backend_name)
+        image_feature = ImageFeature(backend_name=backend_name)
+        report["load_time"] = time.time() - st_time
+
+        st_time = time.time()
+        rects, _ = stamp_detector.detect_from_images(frame=frames[0])
+        image_feature.get_feature_from_cvimg(cvimg=frames[0])
+        report["first_latency"] = time.time() - st_time
+
+        latencies = []
+        for _ in range(repeat):
+            for frame in frames:
+                st_time = time.time()
+                stamp_detector.detect_from_images(frame=frame)
+                image_feature.get_feature_from_cvimg(cvimg=frame)
+                latencies.append(time.time() - st_time)
+        report["steady_latency"] = sum(latencies) / len(latencies)
+    except Exception as e:
+        report["error"] = str(e)
+    report["peak_rss_mb"] = get_peak_rss_mb()
+
+    return report
+
+
+def compare_backends(img_dir, backend_names=None, repeat=3):
+    """Reports load time, first inference latency, steady-state latency (detection + feature extraction per
+    image) and peak memory of every backend. Each backend runs in its own process.
+    """
+    reports = []
+    for backend_name in backend_names or list(BACKENDS.keys()):
+        report = run_isolated(benchmark_backend, backend_name, img_dir, repeat)
+        reports.append(report)
+        if "error" in report:
+            print(f"[WARN] backend: {backend_name}, failed: {report['error']}")
+        else:
+            print(f"[INFO] backend: {backend_name}, load: {report['load_time']:.2f}s, "
+                  f"first inference: {report['first_latency']:.3f}s, steady: {report['steady_latency']:.3f}s, "
+                  f"peak memory: {report['peak_rss_mb']}MB")
+
+    return reports
+
+
+if __name__ == '__main__':
+    compare_backends(img_dir=os.path.join(CUR_DIR, 'test'), backend_names=sys.argv[1:] or None)
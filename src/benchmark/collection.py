@@ -0,0 +1,81 @@
+import os
+import sys
+import time
+import tempfile
+import numpy as np
+import cv2
+
+from src.benchmark.utils import get_peak_rss_mb, run_isolated
+from src.stamp.collection_creator import compose_collection_image
+from settings import PAPER_HEIGHT, PAPER_WIDTH, PIXEL_TO_MM
+
+PICTURE_COUNTS = [2, 4, 6, 8, 10]
+
+
+def legacy_compose_collection_image(pictures):
+    # The composer before the streaming one, kept as the reference of the benchmark (without the disk write)
+    pic_width = int(PAPER_WIDTH * PIXEL_TO_MM)
+    pic_height = int(PAPER_HEIGHT * PIXEL_TO_MM)
+    cols = len(pictures) // 2
+    if cols < 2:
+        collection_image = np.ones([pic_height, pic_width * 2, 3], dtype=np.uint8) * 255
+    else:
+        collection_image = np.ones([pic_height * 2, pic_width * cols, 3], dtype=np.uint8) * 255
+    for pic_idx, pic in enumerate(pictures):
+        pic_image = cv2.imread(pic)
+        if pic_idx < 2:
+            collection_image[:pic_height, pic_width * pic_idx:pic_width * (pic_idx + 1)] = pic_image
+        else:
+            if pic_idx < cols:
+                collection_image[:pic_height, pic_width * pic_idx:pic_width * (pic_idx + 1)] = pic_image
+            else:
+                collection_image[pic_height:pic_height * 2, pic_width * (pic_idx - cols):pic_width * (
+                        pic_idx - cols + 1)] = pic_image
+
+    return cv2.resize(collection_image, None, fx=0.7, fy=0.7)
+
+
+def create_synthetic_pictures(picture_dir, count):
+    pic_width = int(PAPER_WIDTH * PIXEL_TO_MM)
+    pic_height = int(PAPER_HEIGHT * PIXEL_TO_MM)
+    random_state = np.random.RandomState(0)
+    pictures = []
+    for pic_idx in range(count):
+        pic_image = np.full([pic_height, pic_width, 3], 255, dtype=np.uint8)
+        for _ in range(20):
+            left, top = random_state.randint(0, pic_width - 400), random_state.randint(0, pic_height - 400)
+            pic_image[top:top + 350, left:left + 300] = random_state.randint(0, 255, [350, 300, 3], dtype=np.uint8)
+        pic_path = os.path.join(picture_dir, f"Picture{pic_idx + 1}.jpg")
+        cv2.imwrite(pic_path, pic_image)
+        pictures.append(pic_path)
+
+    return pictures
+
+
+def measure_composer(name, pictures):
+    compose_func = legacy_compose_collection_image if name == "legacy" else compose_collection_image
+    st_time = time.time()
+    collection_image = compose_func(pictures)
+    elapsed = time.time() - st_time
+
+    return elapsed, get_peak_rss_mb(), collection_image.shape[:2]
+
+
+def benchmark_collection(picture_counts=None):
+    """Reports time and peak RSS of composing a collection of 2 to 10 pictures, every run in a fresh process.
+    """
+    report = {}
+    with tempfile.TemporaryDirectory() as picture_dir:
+        all_pictures = create_synthetic_pictures(picture_dir=picture_dir, count=max(picture_counts or PICTURE_COUNTS))
+        for picture_count in picture_counts or PICTURE_COUNTS:
+            for name in ["legacy", "streaming"]:
+                elapsed, peak_rss, size = run_isolated(measure_composer, name, all_pictures[:picture_count])
+                report[(name, picture_count)] = {"time": elapsed, "peak_rss": peak_rss}
+                print(f"[INFO] {name}, {picture_count} pictures: {elapsed:.2f}s, peak RSS {peak_rss}MB, "
+                      f"output {size[1]}x{size[0]}")
+
+    return report
+
+
+if __name__ == '__main__':
+    benchmark_collection(picture_counts=[int(v) for v in sys.argv[1:]] or None)
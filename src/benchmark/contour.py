@@ -0,0 +1,114 @@
+import os
+import sys
+import glob
+import time
+import numpy as np
+import cv2
+
+from src.image_processing.contour import find_largest_contour
+from src.stamp.rotator import get_stamp_contour
+from src.stamp.multi_detector import estimate_multi_single_stamp
+from settings import STAMP_AREA_THRESH, CUR_DIR
+
+DOWNSCALED_MAX_SIDE = 512
+
+
+def baseline_get_stamp_contour(roi_frame):
+    # The full resolution contour search as shipped before the downscaled search
+    gray_frame = cv2.cvtColor(roi_frame, cv2.COLOR_BGR2GRAY)
+    _, thresh_frame = cv2.threshold(gray_frame, 200, 255, cv2.THRESH_BINARY_INV)
+    dilate_frame = cv2.dilate(thresh_frame, np.ones((4, 4), np.uint8), iterations=1)
+    st_contours, _ = cv2.findContours(dilate_frame, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_NONE)
+
+    return sorted(st_contours, key=cv2.contourArea, reverse=True)[0]
+
+
+def baseline_find_stamp_contours(frame, area_thresh=STAMP_AREA_THRESH):
+    # The full resolution single/multi contour search as shipped before, without the debug windows
+    gray_frame = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+    _, thresh_frame = cv2.threshold(gray_frame, 200, 255, cv2.THRESH_BINARY)
+    gs_contours, _ = cv2.findContours(thresh_frame, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_NONE)
+    glass_contour = sorted(gs_contours, key=cv2.contourArea, reverse=True)[0]
+    gs_left, gs_top, gs_width, gs_height = cv2.boundingRect(glass_contour)
+    glass_frame_inv = cv2.bitwise_not(thresh_frame[gs_top:gs_top + gs_height, gs_left:gs_left + gs_width])
+    st_contours, _ = cv2.findContours(glass_frame_inv, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_NONE,
+                                      offset=(gs_left, gs_top))
+
+    return [s_cnt for s_cnt in st_contours if cv2.contourArea(s_cnt) >= gs_height * gs_width * area_thresh]
+
+
+def baseline_estimate_multi_single_stamp(frame):
+    stamp_contours = baseline_find_stamp_contours(frame=frame)
+    if len(stamp_contours) == 1:
+        peri = cv2.arcLength(stamp_contours[0], True)
+        approx = cv2.approxPolyDP(stamp_contours[0], 0.01 * peri, True)
+        return "Single" if len(approx) == 4 else "Multi"
+
+    return "None" if not stamp_contours else "Multi"
+
+
+def get_stamp_roi(frame, margin=20):
+    # The ROI the rotator gets: the bounding box of the largest stamp on the glass with the margin of the main process
+    stamp_contours = baseline_find_stamp_contours(frame=frame)
+    left, top, width, height = cv2.boundingRect(max(stamp_contours, key=cv2.contourArea))
+    frm_height, frm_width = frame.shape[:2]
+
+    return frame[max(top - margin, 0):min(top + height + margin, frm_height),
+                 max(left - margin, 0):min(left + width + margin, frm_width)]
+
+
+def get_corner_drift(contour, ref_contour):
+    # Largest distance between the corners of the minAreaRect of the contour and those of the reference
+    box = cv2.boxPoints(cv2.minAreaRect(contour))
+    ref_box = cv2.boxPoints(cv2.minAreaRect(ref_contour))
+
+    return max([np.min(np.linalg.norm(box - ref_point, axis=1)) for ref_point in ref_box])
+
+
+def measure(func, frames, repeat):
+    func(frames[0])
+    st_time = time.perf_counter()
+    for _ in range(repeat):
+        for frame in frames:
+            func(frame)
+
+    return (time.perf_counter() - st_time) / (repeat * len(frames))
+
+
+def get_downscaled_stamp_contour(roi_frame):
+    # The ROIs fit into CONTOUR_MAX_SIDE, this forces the downscaled search with the corner refinement on them
+    _, stamp_quad = find_largest_contour(frame=roi_frame, thresh_type=cv2.THRESH_BINARY_INV, dilate_size=4,
+                                         max_side=DOWNSCALED_MAX_SIDE)
+
+    return stamp_quad
+
+
+def benchmark_contour(img_paths, repeat=20):
+    """Times the stamp contour search on the stamp ROIs and the single/multi estimation on the whole frames, both
+    against the full resolution path they replace, and reports the corner drift of the stamp quad.
+    """
+    cv2.setNumThreads(1)
+    frames = [cv2.imread(img_path) for img_path in img_paths]
+    rois = [get_stamp_roi(frame=frame) for frame in frames]
+    print(f"[INFO] {len(frames)} frames of {frames[0].shape[1]}x{frames[0].shape[0]}, "
+          f"ROIs of {rois[0].shape[1]}x{rois[0].shape[0]}")
+    for name, func, inputs in [("stamp contour baseline", baseline_get_stamp_contour, rois),
+                               ("stamp contour current", get_stamp_contour, rois),
+                               (f"stamp contour at {DOWNSCALED_MAX_SIDE}px", get_downscaled_stamp_contour, rois),
+                               ("multi/single baseline", baseline_estimate_multi_single_stamp, frames),
+                               ("multi/single current", estimate_multi_single_stamp, frames)]:
+        print(f"[INFO] {name}: {measure(func=func, frames=inputs, repeat=repeat) * 1000:.2f}ms")
+    for img_path, frame, roi in zip(img_paths, frames, rois):
+        ref_contour = baseline_get_stamp_contour(roi_frame=roi)
+        drift = get_corner_drift(contour=get_stamp_contour(roi_frame=roi)[1], ref_contour=ref_contour)
+        downscaled_drift = get_corner_drift(contour=get_downscaled_stamp_contour(roi_frame=roi),
+                                            ref_contour=ref_contour)
+        print(f"[INFO] {os.path.basename(img_path)}: corner drift {drift:.1f}px "
+              f"({downscaled_drift:.1f}px at {DOWNSCALED_MAX_SIDE}px), "
+              f"multi/single {baseline_estimate_multi_single_stamp(frame)} -> {estimate_multi_single_stamp(frame)}")
+
+    return
+
+
+if __name__ == '__main__':
+    benchmark_contour(img_paths=sys.argv[1:] or sorted(glob.glob(os.path.join(CUR_DIR, 'test', '*.jpg'))))
@@ -0,0 +1,54 @@
+import os
+import glob
+import time
+import cv2
+
+from src.stamp.detector import StampDetector, get_iou
+from settings import CUR_DIR
+
+DETECTION_MODES = ["full", "downscale", "tile"]
+RECALL_IOU_THRESH = 0.5
+
+
+def get_recall(reference_rects, detected_rects):
+    if not reference_rects:
+        return 1.0
+    matched = 0
+    for r_rect in reference_rects:
+        if any([get_iou(r_rect, d_rect)[0] >= RECALL_IOU_THRESH for d_rect in detected_rects]):
+            matched += 1
+
+    return matched / len(reference_rects)
+
+
+def benchmark_detection_modes(img_dir, repeat=3, stamp_top_ret=False):
+    """Compares the latency and the recall of every detection mode with the full resolution output as reference.
+    """
+    stamp_detector = StampDetector()
+    img_files = sorted(glob.glob(os.path.join(img_dir, "*.jpg")))
+    frames = [cv2.imread(i_file) for i_file in img_files]
+    # The first session call builds the graph kernels, so it is kept out of the measurement
+    stamp_detector.detect_from_images(frame=frames[0], stamp_top_ret=stamp_top_ret, mode="full")
+    references = [stamp_detector.detect_from_images(frame=frame, stamp_top_ret=stamp_top_ret, mode="full")[0]
+                  for frame in frames]
+    report = {}
+    for mode in DETECTION_MODES:
+        latencies = []
+        recalls = []
+        for frame, reference_rects in zip(frames, references):
+            for _ in range(repeat):
+                st_time = time.time()
+                detected_rects, _ = stamp_detector.detect_from_images(frame=frame, stamp_top_ret=stamp_top_ret,
+                                                                      mode=mode)
+                latencies.append(time.time() - st_time)
+            recalls.append(get_recall(reference_rects=reference_rects, detected_rects=detected_rects))
+        report[mode] = {"latency": sum(latencies) / len(latencies), "recall": sum(recalls) / len(recalls)}
+
+    for mode in DETECTION_MODES:
+        print(f"[INFO] mode: {mode}, latency: {report[mode]['latency']:.3f}s, recall: {report[mode]['recall']:.3f}")
+
+    return report
+
+
+if __name__ == '__main__':
+    benchmark_detection_modes(img_dir=os.path.join(CUR_DIR, 'test'))
@@ -0,0 +1,69 @@
+import os
+import glob
+import sys
+import time
+import cv2
+
+from src.stamp.multi_detector import estimate_multi_single_stamp
+from settings import STAMP_AREA_THRESH, CUR_DIR
+
+GATE_LABELS = ["Single", "Multi", "None"]
+AREA_THRESH_SWEEP = [0.005, 0.01, 0.015, 0.02, 0.03, 0.04, 0.05]
+
+
+def load_labelled_frames(img_dir):
+    """Loads the glass plate images from the "Single", "Multi" and "None" sub folders of img_dir.
+    """
+    labelled_frames = []
+    for label in GATE_LABELS:
+        for i_file in sorted(glob.glob(os.path.join(img_dir, label, "*.jpg"))):
+            labelled_frames.append((label, cv2.imread(i_file)))
+
+    return labelled_frames
+
+
+def benchmark_multi_gate(img_dir, area_thresh_list=None):
+    """Reports the accuracy and the latency of the classical single/multi gate for every area threshold.
+    "Unsure" answers are passed to the stamp detector, so they are counted apart from the wrong answers and a gate
+    answer of "Multi" or "None" for a single stamp image is the costly mistake, because the stamp is rejected.
+    """
+    labelled_frames = load_labelled_frames(img_dir=img_dir)
+    if not labelled_frames:
+        print(f"[WARN] No labelled images in {img_dir}")
+        return {}
+    report = {}
+    for area_thresh in area_thresh_list or AREA_THRESH_SWEEP:
+        latencies = []
+        correct = 0
+        unsure = 0
+        single_rejected = 0
+        for label, frame in labelled_frames:
+            st_time = time.time()
+            gate_res = estimate_multi_single_stamp(frame=frame, area_thresh=area_thresh)
+            latencies.append(time.time() - st_time)
+            if gate_res == label:
+                correct += 1
+            elif gate_res == "Unsure":
+                unsure += 1
+            elif label == "Single" and gate_res in ["Multi", "None"]:
+                single_rejected += 1
+        decided = len(labelled_frames) - unsure
+        report[area_thresh] = {
+            "accuracy": correct / decided if decided else 0.0,
+            "unsure_rate": unsure / len(labelled_frames),
+            "single_rejected": single_rejected,
+            "latency": sum(latencies) / len(latencies),
+            "max_latency": max(latencies)
+        }
+
+    for area_thresh, res in report.items():
+        current = " (current)" if area_thresh == STAMP_AREA_THRESH else ""
+        print(f"[INFO] area_thresh: {area_thresh}{current}, accuracy: {res['accuracy']:.3f}, "
+              f"unsure: {res['unsure_rate']:.3f}, single rejected: {res['single_rejected']}, "
+              f"latency: {res['latency'] * 1000:.1f}ms, max: {res['max_latency'] * 1000:.1f}ms")
+
+    return report
+
+
+if __name__ == '__main__':
+    benchmark_multi_gate(img_dir=sys.argv[1] if len(sys.argv) > 1 else os.path.join(CUR_DIR, 'test', 'multi_gate'))
@@ -0,0 +1,36 @@
+import sys
+import cv2
+
+from src.benchmark.vision_client import start_stub_server
+from src.stamp.orientator import vote_rotation
+from utils.google_ocr import GoogleVisionAPI
+from settings import OCR_MAX_SIDE, OCR_JPEG_QUALITY
+
+
+def compare_payloads(img_paths, use_stub=False):
+    """Reports payload bytes and round trip time of the full size upload (as rotated.jpg was sent) against the
+    downscaled in-memory upload, and whether both give the same rotation.
+    """
+    server = None
+    if use_stub:
+        server, endpoint_url = start_stub_server()
+        google_api = GoogleVisionAPI(endpoint_url=endpoint_url, api_key="stub", cache_dir=None)
+    else:
+        google_api = GoogleVisionAPI(cache_dir=None)
+    frames = [cv2.imread(img_path) for img_path in img_paths]
+    rotations = {}
+    for name, max_side, quality in [("full", None, 95), ("downscaled", OCR_MAX_SIDE, OCR_JPEG_QUALITY)]:
+        google_api.payloads.clear()
+        rotations[name] = [vote_rotation(google_api.detect_text_from_image(frame=frame, max_side=max_side,
+                                                                          quality=quality)) for frame in frames]
+        print(f"[INFO] {name}: {google_api.get_payload_stats()}")
+    agreed = sum([f_rot == d_rot for f_rot, d_rot in zip(rotations["full"], rotations["downscaled"])])
+    print(f"[INFO] same rotation for {agreed} of {len(frames)} images")
+    if server is not None:
+        server.shutdown()
+
+    return
+
+
+if __name__ == '__main__':
+    compare_payloads(img_paths=[arg for arg in sys.argv[1:] if arg != "--stub"], use_stub="--stub" in sys.argv)
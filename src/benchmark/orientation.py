@@ -0,0 +1,57 @@
+import os
+import sys
+import glob
+import json
+import time
+import joblib
+import cv2
+
+from src.feature.extractor import ImageFeature
+from src.stamp.local_orientator import LocalStampOrientation
+from src.stamp.orientator import vote_rotation
+from settings import ORIENTATION_MODEL_PATH
+
+
+def record_vision_responses(img_dir):
+    """Saves the Vision response of every image next to it as {image name}.json, the reference of the benchmark.
+    """
+    from utils.google_ocr import GoogleVisionAPI
+
+    google_api = GoogleVisionAPI()
+    for img_path in sorted(glob.glob(os.path.join(img_dir, "*.jpg"))):
+        with open(img_path.replace(".jpg", ".json"), 'w') as json_file:
+            json.dump(google_api.detect_text(path=img_path) or {}, json_file)
+
+    return
+
+
+def benchmark_orientation(img_dir):
+    """Compares the offline orientation engine with the recorded Vision responses: agreement and latency.
+    """
+    local_orientation = LocalStampOrientation(image_feature=ImageFeature(),
+                                              orientation_model=joblib.load(ORIENTATION_MODEL_PATH))
+    latencies = []
+    agreed = 0
+    for json_path in sorted(glob.glob(os.path.join(img_dir, "*.json"))):
+        with open(json_path) as json_file:
+            vision_rotation = vote_rotation(response=json.load(json_file))
+        frame = cv2.imread(json_path.replace(".json", ".jpg"))
+        st_time = time.time()
+        local_rotation = local_orientation.estimate_rotate_angle(frame=frame)
+        latencies.append(time.time() - st_time)
+        if local_rotation == vision_rotation:
+            agreed += 1
+        else:
+            print(f"[WARN] {os.path.basename(json_path)}: vision {vision_rotation}, local {local_rotation}")
+    if latencies:
+        print(f"[INFO] images: {len(latencies)}, agreement: {agreed / len(latencies):.3f}, "
+              f"mean latency: {sum(latencies) / len(latencies):.3f}s, max latency: {max(latencies):.3f}s")
+
+    return agreed, latencies
+
+
+if __name__ == '__main__':
+    if len(sys.argv) > 2 and sys.argv[1] == "record":
+        record_vision_responses(img_dir=sys.argv[2])
+    else:
+        benchmark_orientation(img_dir=sys.argv[1])
@@ -0,0 +1,76 @@
+import os
+import ntpath
+import glob
+import sys
+import time
+import numpy as np
+import cv2
+
+from src.stamp.packing import StampPacker, PACKING_ALGOS
+from settings import PIXEL_TO_MM, PAPER_WIDTH, PAPER_HEIGHT, TEMP_FINAL_IMAGE_DIR
+
+LOOK_AHEAD_SWEEP = [1, 4, 8]
+
+
+def load_size_stream(stream_path):
+    """Loads the recorded stamp sizes in the order of the stream, either from a text file with "width,height" per line
+    or from the final stamp images of a folder named as "{collection}_{picture}_{stamp}.jpg".
+    """
+    if os.path.isfile(stream_path):
+        with open(stream_path) as f:
+            return [tuple([int(v) for v in line.split(",")]) for line in f if line.strip()]
+    image_paths = glob.glob(os.path.join(stream_path, "*.jpg"))
+    sorted_image_paths = sorted(image_paths, key=lambda k: [int(v) for v in
+                                                            ntpath.basename(k).replace(".jpg", "").split("_")])
+    size_stream = []
+    for i_path in sorted_image_paths:
+        height, width = cv2.imread(i_path).shape[:2]
+        size_stream.append((width, height))
+
+    return size_stream
+
+
+def run_packing(size_stream, pack_algo, rotation, look_ahead):
+    stamp_packer = StampPacker(page_width=int(PAPER_WIDTH * PIXEL_TO_MM), page_height=int(PAPER_HEIGHT * PIXEL_TO_MM),
+                               pack_algo=pack_algo, rotation=rotation, look_ahead=look_ahead)
+    stamp_frames = [np.zeros([height, width, 3], dtype=np.uint8) for width, height in size_stream]
+    st_time = time.time()
+    for stamp_frame in stamp_frames:
+        stamp_packer.push(stamp_frame=stamp_frame)
+    while len(stamp_packer):
+        stamp_packer.place_next()
+    pack_time = time.time() - st_time
+    page_fills = stamp_packer.page_fills + [stamp_packer.layout.get_fill_ratio()]
+
+    return {
+        "pages": len(page_fills),
+        "fill_ratio": sum(page_fills) / len(page_fills),
+        "time_per_stamp": pack_time / len(size_stream),
+        "repacks": stamp_packer.layout.repack_count
+    }
+
+
+def benchmark_packing(stream_path, pack_algos=None):
+    """Compares the pages used, the mean fill ratio of the pages and the packing time per stamp of every packing
+    algorithm, with and without rotation, for every look-ahead buffer size on the same stamp size stream.
+    """
+    size_stream = load_size_stream(stream_path=stream_path)
+    if not size_stream:
+        print(f"[WARN] No stamp sizes in {stream_path}")
+        return {}
+    report = {}
+    for pack_algo in pack_algos or list(PACKING_ALGOS.keys()):
+        for rotation in [False, True]:
+            for look_ahead in LOOK_AHEAD_SWEEP:
+                res = run_packing(size_stream=size_stream, pack_algo=pack_algo, rotation=rotation,
+                                  look_ahead=look_ahead)
+                report[(pack_algo, rotation, look_ahead)] = res
+                print(f"[INFO] algo: {pack_algo}, rotation: {rotation}, look ahead: {look_ahead}, "
+                      f"pages: {res['pages']}, fill ratio: {res['fill_ratio']:.3f}, "
+                      f"time per stamp: {res['time_per_stamp'] * 1000:.2f}ms, repacks: {res['repacks']}")
+
+    return report
+
+
+if __name__ == '__main__':
+    benchmark_packing(stream_path=sys.argv[1] if len(sys.argv) > 1 else TEMP_FINAL_IMAGE_DIR)
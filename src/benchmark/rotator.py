@@ -0,0 +1,83 @@
+import sys
+import math
+import time
+import tracemalloc
+import numpy as np
+import cv2
+
+from src.stamp.rotator import rotate_stamp, order_points
+from settings import PIXEL_TO_MM
+
+
+def legacy_get_stamp_contour(roi_frame):
+    # The full resolution contour search as shipped before, independent of src.image_processing.contour
+    gray_frame = cv2.cvtColor(roi_frame, cv2.COLOR_BGR2GRAY)
+    _, thresh_frame = cv2.threshold(gray_frame, 200, 255, cv2.THRESH_BINARY_INV)
+    dilate_frame = cv2.dilate(thresh_frame, np.ones((4, 4), np.uint8), iterations=1)
+    st_contours, _ = cv2.findContours(dilate_frame, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_NONE)
+
+    return sorted(st_contours, key=cv2.contourArea, reverse=True)[0]
+
+
+def legacy_rotate_stamp(frame):
+    # The deskew path before the buffer reuse, kept as the reference of the benchmark (without the disk write)
+    stamp_contour = legacy_get_stamp_contour(roi_frame=frame)
+    stamp_rect = cv2.minAreaRect(stamp_contour)
+    stamp_box = np.int0(cv2.boxPoints(stamp_rect))
+    stamp_box[stamp_box < 0] = 0
+    ordered_points = order_points(pts=stamp_box)
+    width = int(math.sqrt((ordered_points[1][0] - ordered_points[2][0]) ** 2 +
+                          (ordered_points[1][1] - ordered_points[2][1]) ** 2))
+    height = int(math.sqrt((ordered_points[0][0] - ordered_points[1][0]) ** 2 +
+                           (ordered_points[0][1] - ordered_points[1][1]) ** 2))
+    origin_pts = np.float32(ordered_points)
+    trans_pts = np.float32([[0, 0], [0, height], [width, height], [width, 0]])
+    trans = cv2.getPerspectiveTransform(origin_pts, trans_pts)
+    trans_frame = cv2.warpPerspective(frame, trans, (width, height))
+    stamp_image = np.ones([height + round(PIXEL_TO_MM * 2), width + round(2 * PIXEL_TO_MM), 3], dtype=np.uint8) * 255
+    stamp_image[round(PIXEL_TO_MM):round(PIXEL_TO_MM) + height, round(PIXEL_TO_MM):round(PIXEL_TO_MM) + width] = \
+        trans_frame
+    trans_contour = legacy_get_stamp_contour(roi_frame=stamp_image)
+    black_image = np.zeros([height + round(PIXEL_TO_MM * 2), width + round(2 * PIXEL_TO_MM), 3], np.uint8)
+    mask = cv2.drawContours(black_image, [trans_contour], -1, (255, 255, 255), -1)
+    not_mask = cv2.bitwise_not(mask)
+    blur_edge_frame = (mask / 255.0 * stamp_image).astype(np.uint8)
+
+    return blur_edge_frame + not_mask
+
+
+def create_synthetic_stamp(width=900, height=700, angle=7):
+    frame = np.full([height + 300, width + 300, 3], 250, dtype=np.uint8)
+    center = ((width + 300) / 2, (height + 300) / 2)
+    box = np.int0(cv2.boxPoints((center, (width, height), angle)))
+    cv2.fillPoly(frame, [box], (60, 90, 150))
+    cv2.putText(frame, "STAMP", (int(center[0]) - 150, int(center[1])), cv2.FONT_HERSHEY_SIMPLEX, 3, (20, 20, 20), 5)
+
+    return frame
+
+
+def measure(rotate_func, frames, repeat):
+    rotate_func(frames[0])
+    tracemalloc.start()
+    st_time = time.time()
+    for _ in range(repeat):
+        for frame in frames:
+            rotate_func(frame)
+    per_stamp = (time.time() - st_time) / (repeat * len(frames))
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return per_stamp, peak / 1024 / 1024
+
+
+def benchmark_rotator(img_paths, repeat=20):
+    frames = [cv2.imread(img_path) for img_path in img_paths] or [create_synthetic_stamp()]
+    for name, rotate_func in [("legacy", legacy_rotate_stamp), ("current", lambda f: rotate_stamp(frame=f)[1])]:
+        per_stamp, peak_mb = measure(rotate_func=rotate_func, frames=frames, repeat=repeat)
+        print(f"[INFO] {name}: {per_stamp * 1000:.2f}ms per stamp, peak allocation {peak_mb:.1f}MB")
+
+    return
+
+
+if __name__ == '__main__':
+    benchmark_rotator(img_paths=sys.argv[1:])
@@ -0,0 +1,26 @@
+import sys
+import multiprocessing
+
+try:
+    import resource
+except ImportError:
+    resource = None
+
+
+def get_peak_rss_mb():
+    # Peak resident memory of the current process, None where the resource module is not available (Windows)
+    if resource is None:
+        return None
+    peak_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    if sys.platform == "darwin":
+        return peak_rss / 1024 / 1024
+
+    return peak_rss / 1024
+
+
+def run_isolated(target, *args):
+    """Runs the target in a fresh process, so that its load time and peak memory are not shared with other runs.
+    """
+    ctx = multiprocessing.get_context("spawn")
+    with ctx.Pool(processes=1) as pool:
+        return pool.apply(target, args)
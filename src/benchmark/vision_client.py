@@ -0,0 +1,88 @@
+import os
+import sys
+import json
+import time
+import glob
+import tempfile
+import threading
+import socketserver
+
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from utils.google_ocr import GoogleVisionAPI
+from settings import CUR_DIR
+
+
+class StubVisionHandler(BaseHTTPRequestHandler):
+    """Answers images:annotate requests with an empty text annotation per image after a configurable delay.
+    Every `fail_every`-th request returns `fail_status` (503 by default) with `fail_body` to exercise the retry policy
+    and the error handling.
+    """
+    delay = 0.05
+    fail_every = 0
+    fail_status = 503
+    fail_body = b""
+    request_count = 0
+
+    def do_POST(self):
+        StubVisionHandler.request_count += 1
+        body = json.loads(self.rfile.read(int(self.headers['Content-Length'])))
+        time.sleep(self.delay)
+        if self.fail_every and StubVisionHandler.request_count % self.fail_every == 0:
+            self.send_response(self.fail_status)
+            self.send_header('Content-Length', str(len(self.fail_body)))
+            self.end_headers()
+            self.wfile.write(self.fail_body)
+            return
+        ret_json = json.dumps({"responses": [{"textAnnotations": []} for _ in body["requests"]]}).encode()
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(ret_json)))
+        self.end_headers()
+        self.wfile.write(ret_json)
+
+    def log_message(self, *args):
+        pass
+
+
+class StubVisionServer(socketserver.ThreadingMixIn, HTTPServer):
+    # http.server.ThreadingHTTPServer exists only on Python 3.7 or later
+    daemon_threads = True
+
+
+def start_stub_server(delay=0.05, fail_every=0, fail_status=503, fail_body=b""):
+    StubVisionHandler.delay = delay
+    StubVisionHandler.fail_every = fail_every
+    StubVisionHandler.fail_status = fail_status
+    StubVisionHandler.fail_body = fail_body
+    StubVisionHandler.request_count = 0
+    server = StubVisionServer(("127.0.0.1", 0), StubVisionHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+
+    return server, f"http://127.0.0.1:{server.server_address[1]}/v1/images:annotate"
+
+
+def benchmark_vision_client(img_paths, delay=0.05, fail_every=5):
+    """Runs the client against a local stub server: single calls, cached calls and one batched call.
+    """
+    server, endpoint_url = start_stub_server(delay=delay, fail_every=fail_every)
+    with tempfile.TemporaryDirectory() as cache_dir:
+        google_api = GoogleVisionAPI(endpoint_url=endpoint_url, api_key="stub", cache_dir=cache_dir)
+        for img_path in img_paths:
+            google_api.detect_text(path=img_path)
+        print(f"[INFO] single requests: {google_api.get_latency_stats()}")
+        for img_path in img_paths:
+            google_api.detect_text(path=img_path)
+        print(f"[INFO] repeated (cached) requests: {google_api.get_latency_stats()}")
+
+        google_api = GoogleVisionAPI(endpoint_url=endpoint_url, api_key="stub", cache_dir=None)
+        st_time = time.time()
+        responses = google_api.detect_text_batch(paths=img_paths)
+        print(f"[INFO] batched request of {len(responses)} images: {time.time() - st_time:.3f}s, "
+              f"{google_api.get_latency_stats()}")
+    server.shutdown()
+
+    return
+
+
+if __name__ == '__main__':
+    benchmark_vision_client(img_paths=sys.argv[1:] or sorted(glob.glob(os.path.join(CUR_DIR, 'test', '*.jpg'))))
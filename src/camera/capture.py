@@ -0,0 +1,135 @@
+import threading
+import time
+import cv2
+
+from settings import CAMERA_WIDTH, CAMERA_HEIGHT
+
+
+class CameraCapture:
+    """Grabs the frames of one camera on its own thread into a latest frame slot.
+
+    The slot is a (frame, monotonic timestamp, sequence number) tuple which is replaced as a whole, so readers take
+    it without locking and never wait on the camera. A frame replaced before anybody read it is counted as dropped.
+    """
+
+    def __init__(self, port_num, width=CAMERA_WIDTH, height=CAMERA_HEIGHT):
+        self.port_num = port_num
+        self.width = width
+        self.height = height
+        self.latest = (None, 0.0, 0)
+        self.read_seq = 0
+        self.frames = 0
+        self.failed = 0
+        self.dropped = 0
+        self.fps = 0.0
+        self.running = False
+        self.new_frame = threading.Condition()
+        self.thread = None
+
+    def start(self):
+        if self.running:
+            return self
+        self.running = True
+        self.thread = threading.Thread(target=self.__run, daemon=True)
+        self.thread.start()
+
+        return self
+
+    def __run(self):
+        capture = cv2.VideoCapture(self.port_num)
+        capture.set(cv2.CAP_PROP_FRAME_WIDTH, self.width)
+        capture.set(cv2.CAP_PROP_FRAME_HEIGHT, self.height)
+        fps_time = time.monotonic()
+        fps_frames = 0
+        while self.running:
+            try:
+                ret, frame = capture.read()
+            except cv2.error:
+                ret, frame = False, None
+            if not ret or frame is None:
+                self.failed += 1
+                time.sleep(0.01)
+                continue
+            frame_time = time.monotonic()
+            _, _, last_seq = self.latest
+            if last_seq > self.read_seq:
+                self.dropped += 1
+            self.latest = (frame, frame_time, last_seq + 1)
+            self.frames += 1
+            with self.new_frame:
+                self.new_frame.notify_all()
+            fps_frames += 1
+            if frame_time - fps_time >= 1.0:
+                self.fps = fps_frames / (frame_time - fps_time)
+                fps_time = frame_time
+                fps_frames = 0
+        capture.release()
+
+    def read(self):
+        """Returns:  (frame, monotonic timestamp, sequence number) of the latest frame, frame is None before the first
+                  frame
+        """
+        latest = self.latest
+        self.read_seq = max(self.read_seq, latest[2])
+
+        return latest
+
+    def get_frame(self):
+        return self.read()[0]
+
+    def wait_for_frame(self, after_ts=None, timeout=1.0):
+        """Waits for a frame grabbed after after_ts (time.monotonic() based, now by default).
+
+        Returns:  (frame, timestamp, sequence number), None on timeout
+        """
+        after_ts = time.monotonic() if after_ts is None else after_ts
+        deadline = time.monotonic() + timeout
+        with self.new_frame:
+            while self.latest[1] <= after_ts:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0 or not self.running:
+                    return None
+                self.new_frame.wait(remaining)
+
+        return self.read()
+
+    def get_stats(self):
+        return {"fps": round(self.fps, 1), "frames": self.frames, "failed": self.failed, "dropped": self.dropped}
+
+    def stop(self):
+        self.running = False
+        with self.new_frame:
+            self.new_frame.notify_all()
+        if self.thread is not None:
+            self.thread.join()
+            self.thread = None
+
+
+class CaptureManager:
+    """Keeps one CameraCapture per camera name, shared by the GUI and the pipeline.
+    """
+
+    def __init__(self):
+        self.cameras = {}
+
+    def start(self, name, port_num, width=CAMERA_WIDTH, height=CAMERA_HEIGHT):
+        camera = self.cameras.get(name)
+        if camera is not None and camera.port_num != port_num:
+            camera.stop()
+            camera = None
+        if camera is None:
+            camera = CameraCapture(port_num=port_num, width=width, height=height)
+            self.cameras[name] = camera
+
+        return camera.start()
+
+    def get(self, name):
+        return self.cameras.get(name)
+
+    def get_stats(self):
+        return {name: camera.get_stats() for name, camera in self.cameras.items()}
+
+    def stop(self):
+        for camera in self.cameras.values():
+            camera.stop()
+        self.cameras = {}
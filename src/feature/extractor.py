@@ -1,42 +1,77 @@
 import os
-import tensorflow as tf
 import sys
 import numpy as np
 import cv2
 
 from src.feature.download import download_and_extract_model
-from settings import MODEL_DIR
+from src.inference.backend import create_backend, get_backend_name, TF1Backend
+from settings import MODEL_DIR, FEATURE_MODEL_PATH, FEATURE_INPUT_SIZE, FEATURE_VERSION
+
+
+def resize_bilinear_legacy(image, size):
+    # TensorFlow 1 ResizeBilinear without align_corners and half pixel centers, as in the Inception graph
+    in_height, in_width = image.shape[:2]
+    ys = np.arange(size) * (in_height / size)
+    xs = np.arange(size) * (in_width / size)
+    y0, x0 = np.floor(ys).astype(np.int64), np.floor(xs).astype(np.int64)
+    y1, x1 = np.minimum(y0 + 1, in_height - 1), np.minimum(x0 + 1, in_width - 1)
+    y_lerp = (ys - y0).astype(np.float32)[:, None, None]
+    x_lerp = (xs - x0).astype(np.float32)[None, :, None]
+    top_rows, bottom_rows = image[y0].astype(np.float32), image[y1].astype(np.float32)
+    top = top_rows[:, x0] + (top_rows[:, x1] - top_rows[:, x0]) * x_lerp
+    bottom = bottom_rows[:, x0] + (bottom_rows[:, x1] - bottom_rows[:, x0]) * x_lerp
+
+    return top + (bottom - top) * y_lerp
+
+
+def preprocess_cvimg(cvimg, feature_version=FEATURE_VERSION, decoded_jpeg=False):
+    """Same steps as the graph runs after DecodeJpeg: bilinear resize to 299 and scaling to [-1, 1]. Version 1 also
+    reproduces the JPEG encoding and the resize of the graph, unless the image was decoded from a JPEG file already.
+    """
+    if feature_version == 1:
+        if not decoded_jpeg:
+            cvimg = cv2.imdecode(cv2.imencode('.jpg', cvimg)[1], cv2.IMREAD_COLOR)
+        rgb_img = resize_bilinear_legacy(cv2.cvtColor(cvimg, cv2.COLOR_BGR2RGB), FEATURE_INPUT_SIZE)
+    else:
+        resized_img = cv2.resize(cvimg, (FEATURE_INPUT_SIZE, FEATURE_INPUT_SIZE), interpolation=cv2.INTER_LINEAR)
+        rgb_img = cv2.cvtColor(resized_img, cv2.COLOR_BGR2RGB).astype(np.float32)
+
+    return (rgb_img - 128.0) / 128.0
+
+
+def check_feature_version(model, model_path, feature_version=FEATURE_VERSION):
+    """Raises ValueError if the classifier was trained on features of another preprocessing version. The models
+    trained before the version tag existed are version 1.
+    """
+    model_version = getattr(model, "feature_version", 1)
+    if model_version != feature_version:
+        raise ValueError(f"{model_path} was trained on feature version {model_version}, but FEATURE_VERSION is "
+                         f"{feature_version}. Retrain it with src/trainer or set FEATURE_VERSION = {model_version}")
+
+    return model
 
 
 class ImageFeature:
-    def __init__(self):
+    def __init__(self, backend_name=None, feature_version=FEATURE_VERSION):
         self.model_dir = MODEL_DIR
-
-        self.__create_graph()
-        config = tf.ConfigProto()
-        config.gpu_options.allow_growth = True
-        self.sess = tf.Session(config=config)
-        self.softmax_tensor = self.sess.graph.get_tensor_by_name('pool_3:0')
+        self.feature_version = feature_version
+        if backend_name is None:
+            backend_name = get_backend_name()
+        if backend_name == TF1Backend.name:
+            self.__create_graph()
+        self.backend = create_backend(model_kind="feature", backend_name=backend_name)
 
         sys.stdout.write("...init mxnet model.\n")
         test_img = np.ones((20, 20, 3), dtype=np.uint8)
-        test_data = cv2.imencode('.jpg', test_img)[1].tostring()
-        prediction = self.sess.run(self.softmax_tensor, {'DecodeJpeg/contents:0': test_data})
-        prediction = np.squeeze(prediction)
+        prediction = self.get_feature_from_cvimg(cvimg=test_img)
         sys.stdout.write(
             "...length of feature {}    {}.\n".format(len(prediction), "success" * (len(prediction) == 2048)))
 
     def __create_graph(self):
-        # Creates a graph from saved GraphDef file and returns a saver.
-        # Creates graph from saved graph_def.pb.
-        if not os.path.exists(os.path.join(self.model_dir, 'classify_image_graph_def.pb')):
+        # Downloads the Inception graph_def.pb the first time, the backend creates the graph from it.
+        if not os.path.exists(FEATURE_MODEL_PATH):
             data_url = 'http://download.tensorflow.org/models/image/imagenet/inception-2015-12-05.tgz'
             download_and_extract_model(data_url=data_url, save_dir=self.model_dir)
-        with tf.gfile.FastGFile(os.path.join(
-                self.model_dir, 'classify_image_graph_def.pb'), 'rb') as f:
-            graph_def = tf.GraphDef()
-            graph_def.ParseFromString(f.read())
-            _ = tf.import_graph_def(graph_def, name='')
 
     def get_feature_from_file(self, img_path):
         """Runs extract the feature from the image.
@@ -45,19 +80,27 @@ class ImageFeature:
         Returns:  predictions: 2048 * 1 feature vector
         """
 
-        if not tf.gfile.Exists(img_path):
-            tf.logging.fatal('File does not exist %s', img_path)
-        image_data = tf.gfile.FastGFile(img_path, 'rb').read()
+        if not os.path.exists(img_path):
+            print(f"[ERROR] File does not exist {img_path}")
 
-        prediction = self.sess.run(self.softmax_tensor, {'DecodeJpeg/contents:0': image_data})
-        prediction = np.squeeze(prediction)
-        return prediction
+        image_batch = preprocess_cvimg(cvimg=cv2.imread(img_path), feature_version=self.feature_version,
+                                       decoded_jpeg=img_path.lower().endswith((".jpg", ".jpeg")))[None]
+
+        return self.backend.run(inputs=image_batch)[0].reshape([-1])
 
     def get_feature_from_cvimg(self, cvimg):
-        image_data = cv2.imencode('.jpg', cvimg)[1].tostring()
-        prediction = self.sess.run(self.softmax_tensor, {'DecodeJpeg/contents:0': image_data})
-        prediction = np.squeeze(prediction)
-        return prediction
+        return self.get_features_from_cvimgs(cvimgs=[cvimg])[0]
+
+    def get_features_from_cvimgs(self, cvimgs):
+        """Extracts the features of several in-memory images with a single session call.
+
+        Returns:  N * 2048 feature array
+        """
+        image_batch = np.stack([preprocess_cvimg(cvimg=cvimg, feature_version=self.feature_version)
+                                for cvimg in cvimgs])
+        predictions = self.backend.run(inputs=image_batch)[0]
+
+        return predictions.reshape([len(cvimgs), -1])
 
 
 if __name__ == '__main__':
@@ -0,0 +1,29 @@
+import numpy as np
+import cv2
+
+from settings import STATISTICS_IMAGE_SIZE
+
+
+def get_color_texture_feature(cvimg):
+    """Cheap colour and texture statistics of the image: HSV histograms, gradient and edge statistics.
+
+    Returns:  42 * 1 feature vector
+    """
+    small_img = cv2.resize(cvimg, (STATISTICS_IMAGE_SIZE, STATISTICS_IMAGE_SIZE), interpolation=cv2.INTER_AREA)
+    hsv_img = cv2.cvtColor(small_img, cv2.COLOR_BGR2HSV)
+    pixel_num = float(STATISTICS_IMAGE_SIZE * STATISTICS_IMAGE_SIZE)
+    hue_hist = cv2.calcHist([hsv_img], [0], None, [16], [0, 180]).flatten() / pixel_num
+    sat_hist = cv2.calcHist([hsv_img], [1], None, [8], [0, 256]).flatten() / pixel_num
+    val_hist = cv2.calcHist([hsv_img], [2], None, [8], [0, 256]).flatten() / pixel_num
+
+    gray_img = cv2.cvtColor(small_img, cv2.COLOR_BGR2GRAY)
+    grad_x = cv2.Sobel(gray_img, cv2.CV_32F, 1, 0, ksize=3)
+    grad_y = cv2.Sobel(gray_img, cv2.CV_32F, 0, 1, ksize=3)
+    magnitude = cv2.magnitude(grad_x, grad_y)
+    laplacian = cv2.Laplacian(gray_img, cv2.CV_32F)
+    edge_density = np.count_nonzero(cv2.Canny(gray_img, 50, 150)) / pixel_num
+    hsv_mean, hsv_std = cv2.meanStdDev(hsv_img)
+    texture = [magnitude.mean() / 255.0, magnitude.std() / 255.0, laplacian.var() / 65025.0, edge_density]
+    color = np.concatenate([hsv_mean.flatten(), hsv_std.flatten()]) / 255.0
+
+    return np.concatenate([hue_hist, sat_hist, val_hist, texture, color]).astype(np.float32)
@@ -0,0 +1,79 @@
+import math
+import numpy as np
+import cv2
+
+from settings import CONTOUR_MAX_SIDE
+
+
+def get_contour_scale(frame, max_side=CONTOUR_MAX_SIDE):
+    return min(1.0, max_side / max(frame.shape[:2]))
+
+
+def get_binary_frame(frame, thresh_type, scale, thresh=200, dilate_size=0):
+    """Thresholds the frame sampled down by scale. The colour frame is sampled with INTER_NEAREST before the gray
+    conversion, which gives the binary frame of the full resolution threshold sampled down, without converting every
+    full resolution pixel. The dilation kernel is given in full resolution pixels.
+    """
+    if scale < 1:
+        frame = cv2.resize(frame, None, fx=scale, fy=scale, interpolation=cv2.INTER_NEAREST)
+    gray_frame = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+    _, binary_frame = cv2.threshold(gray_frame, thresh, 255, thresh_type)
+    if dilate_size:
+        kernel_size = max(int(round(dilate_size * scale)), 1)
+        binary_frame = cv2.dilate(binary_frame, np.ones((kernel_size, kernel_size), np.uint8), iterations=1)
+
+    return binary_frame
+
+
+def upscale_contour(contour, scale, offset=(0, 0)):
+    # A downscaled pixel stands for a block of 1 / scale full resolution pixels, its point is the centre of the block
+    return np.int32(np.round((contour.astype(np.float32) + np.float32(offset) + 0.5) / scale - 0.5))
+
+
+def refine_corners(frame, contour, scale, thresh_type, thresh=200, dilate_size=0):
+    """Refines the minAreaRect of a contour found on the downscaled frame at full resolution, thresholding only a
+    small window around each of its corners. The stamp pixels of the 4 windows hold the corners and the ends of the
+    edges, which set the minAreaRect of the whole stamp.
+
+    Returns:  float32 quad of the refined minAreaRect corners, in full resolution coordinates
+    """
+    radius = int(math.ceil(2 / scale)) + 2
+    frm_height, frm_width = frame.shape[:2]
+    box = cv2.boxPoints(cv2.minAreaRect(contour))
+    points = []
+    for corner in box:
+        left, top = max(int(corner[0]) - radius, 0), max(int(corner[1]) - radius, 0)
+        right, bottom = min(int(corner[0]) + radius + 1, frm_width), min(int(corner[1]) + radius + 1, frm_height)
+        if right <= left or bottom <= top:
+            return box.reshape([-1, 1, 2])
+        window = get_binary_frame(frame[top:bottom, left:right], thresh_type, 1.0, thresh=thresh,
+                                  dilate_size=dilate_size)
+        label_count, labels, stats, _ = cv2.connectedComponentsWithStats(window, connectivity=8)
+        if label_count < 2:
+            return box.reshape([-1, 1, 2])
+        # The stamp is the largest component of the window, the specks of the background are left out
+        stamp_label = 1 + int(np.argmax(stats[1:, cv2.CC_STAT_AREA]))
+        ys, xs = np.nonzero(labels == stamp_label)
+        points.append(np.stack([xs + left, ys + top], axis=1))
+    refined_box = cv2.boxPoints(cv2.minAreaRect(np.concatenate(points).astype(np.int32)))
+
+    return refined_box.reshape([-1, 1, 2])
+
+
+def find_largest_contour(frame, thresh_type, dilate_size=0, refine=True, max_side=CONTOUR_MAX_SIDE):
+    """Finds the largest external contour on a downscaled copy of the frame, together with the quad of its
+    minAreaRect corners. Unless the frame is small enough to be searched at full resolution, the contour is the one of
+    the downscaled frame moved back to full resolution and the quad is refined at full resolution if refine is set.
+
+    Returns:  contour in full resolution coordinates, quad of its minAreaRect corners
+    """
+    scale = get_contour_scale(frame, max_side=max_side)
+    binary_frame = get_binary_frame(frame, thresh_type, scale, dilate_size=dilate_size)
+    contours, _ = cv2.findContours(binary_frame, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+    largest_contour = max(contours, key=cv2.contourArea)
+    if scale < 1:
+        largest_contour = upscale_contour(largest_contour, scale)
+    if scale >= 1 or not refine:
+        return largest_contour, cv2.boxPoints(cv2.minAreaRect(largest_contour)).reshape([-1, 1, 2])
+
+    return largest_contour, refine_corners(frame, largest_contour, scale, thresh_type, dilate_size=dilate_size)
@@ -0,0 +1,52 @@
+import numpy as np
+import cv2
+
+from settings import MOTION_SIGNATURE_WIDTH, MOTION_DIFF_THRESH, MOTION_CHANGED_RATIO, CACHE_PICK_MARGIN
+
+
+def get_frame_signature(frame, region=None):
+    """Creates a small blurred grayscale copy of the frame which is cheap to compare.
+        Args: frame: BGR frame, region: optional [left, top, right, bottom] crop
+
+    Returns:  signature image and the (width, height) of the compared area
+    """
+    if region is not None:
+        frame = frame[region[1]:region[3], region[0]:region[2]]
+    frm_height, frm_width = frame.shape[:2]
+    sig_height = max(int(frm_height * MOTION_SIGNATURE_WIDTH / frm_width), 1)
+    small_frame = cv2.resize(frame, (MOTION_SIGNATURE_WIDTH, sig_height), interpolation=cv2.INTER_AREA)
+    signature = cv2.GaussianBlur(cv2.cvtColor(small_frame, cv2.COLOR_BGR2GRAY), (3, 3), 0)
+
+    return signature, (frm_width, frm_height)
+
+
+def get_changed_rect(prev_signature, cur_signature):
+    """Compares 2 signatures of the same area.
+
+    Returns:  [left, top, right, bottom] of the changed pixels in the coordinates of the compared area, or None
+    """
+    prev_image, (frm_width, frm_height) = prev_signature
+    cur_image, _ = cur_signature
+    if prev_image.shape != cur_image.shape:
+        return [0, 0, frm_width, frm_height]
+    changed_mask = cv2.absdiff(prev_image, cur_image) > MOTION_DIFF_THRESH
+    if np.count_nonzero(changed_mask) <= changed_mask.size * MOTION_CHANGED_RATIO:
+        return None
+    ys, xs = np.nonzero(changed_mask)
+    scale_x = frm_width / cur_image.shape[1]
+    scale_y = frm_height / cur_image.shape[0]
+
+    return [int(xs.min() * scale_x), int(ys.min() * scale_y), int((xs.max() + 1) * scale_x),
+            int((ys.max() + 1) * scale_y)]
+
+
+def is_change_inside(changed_rect, rect, region=None, margin=CACHE_PICK_MARGIN):
+    """Checks whether a changed rect of get_changed_rect lies inside the [left, top, right, bottom] rect of the frame,
+    widened by margin. region is the crop the signatures were taken from, None for the whole frame.
+    """
+    offset_x, offset_y = (region[0], region[1]) if region is not None else (0, 0)
+    left, top = changed_rect[0] + offset_x, changed_rect[1] + offset_y
+    right, bottom = changed_rect[2] + offset_x, changed_rect[3] + offset_y
+
+    return rect[0] - margin <= left and rect[1] - margin <= top and right <= rect[2] + margin and \
+        bottom <= rect[3] + margin
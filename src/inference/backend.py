@@ -0,0 +1,117 @@
+import configparser
+import numpy as np
+
+from settings import CONFIG_FILE_PATH, INFERENCE_BACKEND, STAMP_MODEL_PATH, FEATURE_MODEL_PATH, \
+    STAMP_ONNX_MODEL_PATH, FEATURE_ONNX_MODEL_PATH, DETECTOR_INPUT, DETECTOR_OUTPUTS, FEATURE_INPUT, \
+    FEATURE_OUTPUTS, FEATURE_INPUT_SIZE
+
+
+class InferenceBackend:
+    """Runs one exported model. `run` feeds a single input array and returns the outputs in `output_names` order.
+    """
+    name = ""
+
+    def __init__(self, model_path, input_name, output_names, input_shape=None):
+        self.model_path = model_path
+        self.input_name = input_name
+        self.output_names = output_names
+        self.input_shape = input_shape
+
+    def run(self, inputs):
+        raise NotImplementedError
+
+    def close(self):
+        pass
+
+
+class TF1Backend(InferenceBackend):
+    name = "tf1"
+
+    def __init__(self, model_path, input_name, output_names, input_shape=None):
+        super(TF1Backend, self).__init__(model_path, input_name, output_names, input_shape)
+        import tensorflow as tf
+
+        graph = tf.Graph()
+        with graph.as_default():
+            graph_def = tf.GraphDef()
+            with tf.gfile.GFile(model_path, 'rb') as fid:
+                graph_def.ParseFromString(fid.read())
+            input_map = {}
+            if input_shape is not None:
+                # Replaces an input with a fixed shape (e.g. batch size 1) by a placeholder of the given shape
+                input_map[input_name] = tf.placeholder(tf.float32, shape=input_shape, name='batch_input')
+                self.input_name = 'batch_input:0'
+            tf.import_graph_def(graph_def, input_map=input_map, name='')
+        config = tf.ConfigProto()
+        config.gpu_options.allow_growth = True
+        self.sess = tf.Session(graph=graph, config=config)
+        self.output_tensors = [graph.get_tensor_by_name(o_name) for o_name in output_names]
+
+    def run(self, inputs):
+        return self.sess.run(self.output_tensors, feed_dict={self.input_name: inputs})
+
+    def close(self):
+        self.sess.close()
+
+
+class OnnxRuntimeBackend(InferenceBackend):
+    name = "onnxruntime"
+
+    def __init__(self, model_path, input_name, output_names, input_shape=None):
+        super(OnnxRuntimeBackend, self).__init__(model_path, input_name, output_names, input_shape)
+        import onnxruntime
+
+        self.sess = onnxruntime.InferenceSession(model_path, providers=['CPUExecutionProvider'])
+
+    def run(self, inputs):
+        return self.sess.run(self.output_names, {self.input_name: inputs})
+
+
+class OpenCVDnnBackend(InferenceBackend):
+    name = "opencv"
+
+    def __init__(self, model_path, input_name, output_names, input_shape=None):
+        super(OpenCVDnnBackend, self).__init__(model_path, input_name, output_names, input_shape)
+        import cv2
+
+        self.net = cv2.dnn.readNet(model_path)
+        self.net.setPreferableBackend(cv2.dnn.DNN_BACKEND_OPENCV)
+        self.net.setPreferableTarget(cv2.dnn.DNN_TARGET_CPU)
+
+    def run(self, inputs):
+        self.net.setInput(inputs.astype(np.float32), self.input_name)
+        outputs = self.net.forward(self.output_names)
+
+        return list(outputs)
+
+
+BACKENDS = {TF1Backend.name: TF1Backend, OnnxRuntimeBackend.name: OnnxRuntimeBackend,
+            OpenCVDnnBackend.name: OpenCVDnnBackend}
+# TF1 runs the frozen graphs, the other runtimes load the same models exported to ONNX
+MODELS = {
+    "detector": {"tf1": STAMP_MODEL_PATH, "export": STAMP_ONNX_MODEL_PATH, "input": DETECTOR_INPUT,
+                 "outputs": DETECTOR_OUTPUTS},
+    "feature": {"tf1": FEATURE_MODEL_PATH, "export": FEATURE_ONNX_MODEL_PATH, "input": FEATURE_INPUT,
+                "outputs": FEATURE_OUTPUTS, "input_shape": [None, FEATURE_INPUT_SIZE, FEATURE_INPUT_SIZE, 3]}
+}
+
+
+def get_backend_name():
+    params = configparser.ConfigParser()
+    params.read(CONFIG_FILE_PATH)
+
+    return params.get('DEFAULT', 'inference_backend', fallback=INFERENCE_BACKEND) or INFERENCE_BACKEND
+
+
+def create_backend(model_kind, backend_name=None):
+    """Creates the backend for "detector" or "feature" model, by default the one set in user_config.
+    """
+    if backend_name is None:
+        backend_name = get_backend_name()
+    if backend_name not in BACKENDS:
+        raise ValueError(f"Unknown inference backend: {backend_name}, available: {list(BACKENDS.keys())}")
+    model_info = MODELS[model_kind]
+    model_path = model_info["tf1"] if backend_name == TF1Backend.name else model_info["export"]
+
+    return BACKENDS[backend_name](model_path=model_path, input_name=model_info["input"],
+                                  output_names=model_info["outputs"], input_shape=model_info.get("input_shape"))
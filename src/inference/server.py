@@ -0,0 +1,262 @@
+import sys
+import queue
+import pickle
+import itertools
+import threading
+import multiprocessing
+import numpy as np
+
+from concurrent.futures import Future
+from src.inference.backend import TF1Backend, get_backend_name
+from settings import SHARED_FRAME_SLOTS, SHARED_FRAME_SLOT_BYTES, INFERENCE_LOAD_TIMEOUT, INFERENCE_RESULT_TIMEOUT
+
+try:
+    from multiprocessing import shared_memory, resource_tracker
+except ImportError:
+    # Python 3.7 and earlier
+    shared_memory = resource_tracker = None
+
+
+def check_server_support(backend_name):
+    """Raises RuntimeError if the inference process can not run with this interpreter and backend: the shared memory
+    frames need Python 3.8 or later, on which tensorflow-gpu 1.14 of the tf1 backend is not available.
+    """
+    if shared_memory is None:
+        raise RuntimeError(f"inference_process needs Python 3.8 or later for the shared memory frames, running "
+                           f"Python {sys.version_info.major}.{sys.version_info.minor}. Set inference_process = false "
+                           f"in user_config.cfg")
+    if backend_name == TF1Backend.name:
+        raise RuntimeError("inference_process does not support the tf1 backend, as tensorflow-gpu 1.14 does not run on "
+                           "Python 3.8. Set inference_backend to onnxruntime or opencv in user_config.cfg")
+
+
+def get_slot_view(ring, slot_bytes, frame_desc):
+    slot, shape, dtype_str = frame_desc
+
+    return np.ndarray(shape, dtype=np.dtype(dtype_str), buffer=ring.buf, offset=slot * slot_bytes)
+
+
+def get_picklable_error(error):
+    # An exception which can not be pickled would be dropped by the feeder thread of the queue and never answered
+    try:
+        pickle.loads(pickle.dumps(error))
+        return error
+    except Exception:
+        return RuntimeError(f"{type(error).__name__}: {error}")
+
+
+def serve_inference(ring_name, slot_bytes, request_queue, response_queue, backend_name):
+    """Main loop of the inference process. Frames are read from the shared memory ring, only their slot, shape and
+    dtype come through the request queue.
+    """
+    ring = None
+    try:
+        from src.stamp.detector import StampDetector
+        from src.feature.extractor import ImageFeature
+
+        ring = shared_memory.SharedMemory(name=ring_name)
+        # The ring belongs to the client process, which unlinks it, so the tracker of this process must not do it too
+        resource_tracker.unregister(ring._name, 'shared_memory')
+        models = {"detector": StampDetector(backend_name=backend_name),
+                  "feature": ImageFeature(backend_name=backend_name)}
+        response_queue.put((None, "ready", None))
+    except Exception as e:
+        response_queue.put((None, None, get_picklable_error(e)))
+        if ring is not None:
+            ring.close()
+        return
+    while True:
+        request = request_queue.get()
+        if request is None:
+            break
+        req_id, model_kind, method, frame_args, kwargs = request
+        try:
+            for arg_name, frame_desc in frame_args.items():
+                if isinstance(frame_desc, list):
+                    kwargs[arg_name] = [get_slot_view(ring, slot_bytes, f_desc) for f_desc in frame_desc]
+                else:
+                    kwargs[arg_name] = get_slot_view(ring, slot_bytes, frame_desc)
+            response_queue.put((req_id, getattr(models[model_kind], method)(**kwargs), None))
+        except Exception as e:
+            response_queue.put((req_id, None, get_picklable_error(e)))
+    ring.close()
+
+    return
+
+
+class InferenceServer:
+    """Runs StampDetector and ImageFeature in a separate process, so their Python work does not hold the GIL of the
+    UI process. Frames are copied into shared memory slots instead of being pickled.
+    """
+
+    def __init__(self, backend_name=None, slot_count=SHARED_FRAME_SLOTS, slot_bytes=SHARED_FRAME_SLOT_BYTES):
+        if backend_name is None:
+            backend_name = get_backend_name()
+        check_server_support(backend_name=backend_name)
+        ctx = multiprocessing.get_context("spawn")
+        self.slot_count = slot_count
+        self.slot_bytes = slot_bytes
+        self.ring = shared_memory.SharedMemory(create=True, size=slot_count * slot_bytes)
+        self.free_slots = queue.Queue()
+        for slot in range(slot_count):
+            self.free_slots.put(slot)
+        self.slot_lock = threading.Lock()
+        self.pending_lock = threading.Lock()
+        self.pending = {}
+        self.req_ids = itertools.count()
+        self.load_error = None
+        self.process_error = None
+        self.stopping = False
+        self.ready = threading.Event()
+        self.request_queue = ctx.Queue()
+        self.response_queue = ctx.Queue()
+        self.process = ctx.Process(target=serve_inference, daemon=True,
+                                   args=(self.ring.name, slot_bytes, self.request_queue, self.response_queue,
+                                         backend_name))
+        self.process.start()
+        self.dispatcher = threading.Thread(target=self.__dispatch, daemon=True)
+        self.dispatcher.start()
+
+    def __dispatch(self):
+        while True:
+            try:
+                response = self.response_queue.get(timeout=1)
+            except queue.Empty:
+                if not self.stopping and not self.process.is_alive():
+                    self.__fail_pending(error=RuntimeError(f"Inference process exited with code "
+                                                           f"{self.process.exitcode}"))
+                    break
+                continue
+            if response is None:
+                break
+            req_id, result, error = response
+            if req_id is None:
+                self.load_error = error
+                self.ready.set()
+                continue
+            with self.pending_lock:
+                future, slots = self.pending.pop(req_id, (None, []))
+            for slot in slots:
+                self.free_slots.put(slot)
+            if future is None:
+                continue
+            if error is not None:
+                future.set_exception(error)
+            else:
+                future.set_result(result)
+
+        return
+
+    def __fail_pending(self, error):
+        # The process is gone, so neither the load nor the calls in flight will ever be answered
+        print(f"[ERROR] {error}")
+        self.process_error = error
+        if not self.ready.is_set():
+            self.load_error = error
+            self.ready.set()
+        with self.pending_lock:
+            pending = list(self.pending.values())
+            self.pending.clear()
+        for future, slots in pending:
+            for slot in slots:
+                self.free_slots.put(slot)
+            future.set_exception(error)
+
+        return
+
+    def wait_ready(self, timeout=INFERENCE_LOAD_TIMEOUT):
+        if not self.ready.wait(timeout=timeout):
+            raise TimeoutError(f"Inference process did not load its models in {timeout}s")
+        if self.load_error is not None:
+            raise self.load_error
+
+        return True
+
+    def __put_frames(self, frames):
+        if len(frames) > self.slot_count:
+            raise ValueError(f"{len(frames)} frames do not fit into {self.slot_count} shared memory slots")
+        # The slots of one request are taken together, so that concurrent requests can not hold each other's slots
+        with self.slot_lock:
+            slots = [self.free_slots.get() for _ in frames]
+        frame_descs = []
+        for slot, frame in zip(slots, frames):
+            if frame.nbytes > self.slot_bytes:
+                for f_slot in slots:
+                    self.free_slots.put(f_slot)
+                raise ValueError(f"Frame of {frame.nbytes} bytes is larger than the slot of {self.slot_bytes} bytes")
+            frame_desc = (slot, frame.shape, frame.dtype.str)
+            get_slot_view(self.ring, self.slot_bytes, frame_desc)[...] = frame
+            frame_descs.append(frame_desc)
+
+        return slots, frame_descs
+
+    def call(self, model_kind, method, frame_args=None, kwargs=None):
+        """Calls the method of "detector" or "feature" model in the inference process.
+            Args: frame_args: dict of argument name to a frame or a list of frames passed through shared memory
+
+        Returns:  Future of the method result
+        """
+        if self.process_error is not None:
+            raise self.process_error
+        slots = []
+        shared_args = {}
+        for arg_name, frames in (frame_args or {}).items():
+            if isinstance(frames, list):
+                arg_slots, shared_args[arg_name] = self.__put_frames(frames=frames)
+            else:
+                arg_slots, frame_descs = self.__put_frames(frames=[frames])
+                shared_args[arg_name] = frame_descs[0]
+            slots += arg_slots
+        future = Future()
+        future.set_running_or_notify_cancel()
+        req_id = next(self.req_ids)
+        with self.pending_lock:
+            if self.process_error is not None:
+                for slot in slots:
+                    self.free_slots.put(slot)
+                raise self.process_error
+            self.pending[req_id] = (future, slots)
+        self.request_queue.put((req_id, model_kind, method, shared_args, kwargs or {}))
+
+        return future
+
+    def stop(self):
+        self.stopping = True
+        self.request_queue.put(None)
+        self.process.join(timeout=10)
+        self.response_queue.put(None)
+        self.dispatcher.join()
+        self.ring.close()
+        self.ring.unlink()
+
+        return
+
+
+class RemoteStampDetector:
+    def __init__(self, server):
+        self.server = server
+
+    def detect_from_images(self, frame, stamp_top_ret=False):
+        return self.server.call(model_kind="detector", method="detect_from_images", frame_args={"frame": frame},
+                                kwargs={"stamp_top_ret": stamp_top_ret}).result(timeout=INFERENCE_RESULT_TIMEOUT)
+
+    def detect_batch(self, frames, regions=None):
+        return self.server.call(model_kind="detector", method="detect_batch", frame_args={"frames": list(frames)},
+                                kwargs={"regions": regions}).result(timeout=INFERENCE_RESULT_TIMEOUT)
+
+
+class RemoteImageFeature:
+    def __init__(self, server):
+        self.server = server
+
+    def get_feature_from_file(self, img_path):
+        return self.server.call(model_kind="feature", method="get_feature_from_file",
+                                kwargs={"img_path": img_path}).result(timeout=INFERENCE_RESULT_TIMEOUT)
+
+    def get_feature_from_cvimg(self, cvimg):
+        return self.server.call(model_kind="feature", method="get_feature_from_cvimg",
+                                frame_args={"cvimg": cvimg}).result(timeout=INFERENCE_RESULT_TIMEOUT)
+
+    def get_features_from_cvimgs(self, cvimgs):
+        return self.server.call(model_kind="feature", method="get_features_from_cvimgs",
+                                frame_args={"cvimgs": list(cvimgs)}).result(timeout=INFERENCE_RESULT_TIMEOUT)
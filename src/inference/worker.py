@@ -0,0 +1,101 @@
+import time
+import queue
+import threading
+
+from collections import deque
+from concurrent.futures import Future
+from settings import INFERENCE_QUEUE_SIZE
+
+
+class InferenceWorker:
+    """Owns a detector on its own thread and serves its requests from a bounded queue.
+
+    `submit`/`submit_batch` return a `concurrent.futures.Future`. A future can be cancelled while it is queued,
+    and a request with a deadline (seconds after submission) fails with TimeoutError if it is not started in time.
+    The blocking `detect_from_images`/`detect_batch` keep the detector signatures, so the worker can replace it.
+    """
+
+    def __init__(self, detector_factory, max_queue=INFERENCE_QUEUE_SIZE):
+        self.detector_factory = detector_factory
+        self.detector = None
+        self.load_error = None
+        self.requests = queue.Queue(maxsize=max_queue)
+        self.service_times = deque(maxlen=100)
+        self.processed = 0
+        self.expired = 0
+        self.ready = threading.Event()
+        self.thread = threading.Thread(target=self.__run, daemon=True)
+        self.thread.start()
+
+    def __run(self):
+        try:
+            # The session is created on this thread, so it never runs on the caller's one
+            self.detector = self.detector_factory()
+        except Exception as e:
+            self.load_error = e
+        self.ready.set()
+        while True:
+            request = self.requests.get()
+            if request is None:
+                break
+            future, method, kwargs, deadline = request
+            if not future.set_running_or_notify_cancel():
+                continue
+            if self.load_error is not None:
+                future.set_exception(self.load_error)
+                continue
+            if deadline is not None and time.monotonic() > deadline:
+                self.expired += 1
+                future.set_exception(TimeoutError("Inference request missed its deadline"))
+                continue
+            st_time = time.monotonic()
+            try:
+                future.set_result(getattr(self.detector, method)(**kwargs))
+            except Exception as e:
+                future.set_exception(e)
+            self.service_times.append(time.monotonic() - st_time)
+            self.processed += 1
+
+        return
+
+    def wait_ready(self, timeout=None):
+        self.ready.wait(timeout=timeout)
+        if self.load_error is not None:
+            raise self.load_error
+
+        return self.ready.is_set()
+
+    def __submit(self, method, kwargs, deadline, block, timeout):
+        future = Future()
+        deadline = time.monotonic() + deadline if deadline is not None else None
+        # Raises queue.Full when the queue stays full for the timeout or block is False
+        self.requests.put((future, method, kwargs, deadline), block=block, timeout=timeout)
+
+        return future
+
+    def submit(self, frame, stamp_top_ret=False, deadline=None, block=True, timeout=None):
+        return self.__submit(method="detect_from_images", kwargs={"frame": frame, "stamp_top_ret": stamp_top_ret},
+                             deadline=deadline, block=block, timeout=timeout)
+
+    def submit_batch(self, frames, regions=None, deadline=None, block=True, timeout=None):
+        return self.__submit(method="detect_batch", kwargs={"frames": frames, "regions": regions},
+                             deadline=deadline, block=block, timeout=timeout)
+
+    def detect_from_images(self, frame, stamp_top_ret=False):
+        return self.submit(frame=frame, stamp_top_ret=stamp_top_ret).result()
+
+    def detect_batch(self, frames, regions=None):
+        return self.submit_batch(frames=frames, regions=regions).result()
+
+    def get_stats(self):
+        service_times = list(self.service_times)
+
+        return {"queue_depth": self.requests.qsize(), "processed": self.processed, "expired": self.expired,
+                "last_service_time": service_times[-1] if service_times else 0,
+                "mean_service_time": sum(service_times) / len(service_times) if service_times else 0}
+
+    def stop(self):
+        self.requests.put(None)
+        self.thread.join()
+
+        return
@@ -5,13 +5,16 @@ import configparser
 import numpy as np
 import cv2
 
-from rectpack import newPacker
+from src.stamp.packing import StampPacker
+from utils.catalogue import Catalogue
+from utils.image_writer import AsyncImageWriter
 from utils.folder_file_manager import make_directory_if_not_exists
-from settings import PIXEL_TO_MM, PAPER_HEIGHT, PAPER_WIDTH, CONFIG_FILE_PATH, OUTPUT_DIR
+from settings import PIXEL_TO_MM, PAPER_HEIGHT, PAPER_WIDTH, CONFIG_FILE_PATH, OUTPUT_DIR, PACKING_ALGO, \
+    PACKING_ROTATION, PACKING_LOOK_AHEAD
 
 
 class StampAligner:
-    def __init__(self):
+    def __init__(self, catalogue=None, image_writer=None):
         params = configparser.ConfigParser()
         params.read(CONFIG_FILE_PATH)
         # self.collection_num = params.get('DEFAULT', 'collection_number')
@@ -23,8 +26,14 @@ class StampAligner:
         self.row_height = 0
         self.row_stamps = {"row_stamp": [], "width": 0, "height": 0}
         self.stamp_status = []
-        self.rectangles = []
-        self.rectangle_sizes = []
+        self.catalogue = catalogue or Catalogue()
+        self.image_writer = image_writer or AsyncImageWriter(workers=0)
+        self.stamp_packer = StampPacker(page_width=self.paper_width, page_height=self.paper_height,
+                                        pack_algo=params.get('DEFAULT', 'packing_algo', fallback=PACKING_ALGO),
+                                        rotation=params.getboolean('DEFAULT', 'packing_rotation',
+                                                                   fallback=PACKING_ROTATION),
+                                        look_ahead=params.getint('DEFAULT', 'packing_look_ahead',
+                                                                 fallback=PACKING_LOOK_AHEAD))
 
     def align_stamps(self, stamp_frame):
         height, width = stamp_frame.shape[:2]
@@ -64,16 +73,11 @@ class StampAligner:
                 height_pos += r_stamps["height"]
             # processed_image = self.image_utils.run(frame=stamp_paper_image)
             processed_image = stamp_paper_image
-            output_images = glob.glob(os.path.join(OUTPUT_DIR, "*.jpg"))
-            output_indices = []
-            for o_image in output_images:
-                image_index = int(ntpath.basename(o_image).replace("StampPaper", "").replace(".jpg", ""))
-                output_indices.append(image_index)
-            if output_indices:
-                cnt_index = max(output_indices) + 1
-            else:
-                cnt_index = 0
-            cv2.imwrite(os.path.join(OUTPUT_DIR, f'StampPaper{cnt_index}.jpg'), processed_image)
+            cnt_index = self.catalogue.reserve_index("stamp_paper")
+            self.image_writer.write(os.path.join(OUTPUT_DIR, f'StampPaper{cnt_index}.jpg'), processed_image,
+                                    tag="stamp_paper")
+            self.catalogue.add_stamp_paper(paper_num=cnt_index,
+                                           path=os.path.join(OUTPUT_DIR, f'StampPaper{cnt_index}.jpg'))
             print(f"[INFO] Successfully saved the final StampPaper Image into "
                   f"{os.path.join(OUTPUT_DIR, f'StampPaper{cnt_index}.jpg')}")
             self.stamp_status = []
@@ -84,52 +88,39 @@ class StampAligner:
         else:
             return "retry"
 
-    def pack_stamps(self, stamp_frame, collection_num, picture_num):
+    def pack_stamps(self, stamp_frame, collection_num, picture_num, stamp_id=None):
+        """Packs the stamp into the open page, the full resolution page is written only when it is complete and is
+        recorded into the catalogue with the placements of its stamps by stamp_id.
+
+        Returns:  complete status, path of the written page (None while the page is open)
+        """
+        complete_status = self.stamp_packer.push(stamp_frame=stamp_frame, stamp_id=stamp_id)
+        if not complete_status:
+            return complete_status, None
         collection_dir = make_directory_if_not_exists(os.path.join(OUTPUT_DIR, f"collection{collection_num}"))
         align_stamp_path = os.path.join(collection_dir, f'Picture{picture_num}.jpg')
-        complete_status = False
-        height, width = stamp_frame.shape[:2]
-        self.rectangle_sizes.append((width, height))
-        self.rectangles.append(stamp_frame)
-        bins = [(self.paper_width, self.paper_height)]
-        packer = newPacker(rotation=False)
-        for r in self.rectangle_sizes:
-            packer.add_rect(*r)
-        for b in bins:
-            packer.add_bin(*b)
-        packer.pack()
-        all_rects = packer.rect_list()
-        stamp_paper_image = np.ones([self.paper_height, self.paper_width, 3], dtype=np.uint8) * 255
-        drawn_indices = []
-        for rect in all_rects:
-            _, x, y, w, h, _ = rect
-            frame = None
-            try:
-                indices = [i for i, x in enumerate(self.rectangle_sizes) if x == (w, h)]
-                if len(indices) == 1:
-                    frame = self.rectangles[indices[0]]
-                    drawn_indices.append(indices[0])
-                else:
-                    for idx in indices:
-                        if idx not in drawn_indices:
-                            frame = self.rectangles[idx]
-                            drawn_indices.append(idx)
-                            break
-                stamp_paper_image[self.paper_height - y - h:self.paper_height - y, x:x + w] = frame
-            except Exception as e:
-                print(e)
-        if len(all_rects) < len(self.rectangles):
-            complete_status = True
-            self.rectangles = [stamp_frame]
-            self.rectangle_sizes = [(width, height)]
-        else:
-            cv2.imwrite(align_stamp_path, stamp_paper_image)
+        self.image_writer.write(align_stamp_path, self.stamp_packer.layout.canvas, tag="page")
+        self.catalogue.add_picture(collection_num=collection_num, picture_num=picture_num, path=align_stamp_path,
+                                   placements=self.stamp_packer.closed_placements)
+        print(f"[INFO] Successfully saved the page into {align_stamp_path}")
         # cv2.imshow("Stamp Frame", stamp_frame)
-        # cv2.imshow("Packed Frame", cv2.resize(stamp_paper_image, None, fx=0.3, fy=0.3))
+        # cv2.imshow("Packed Frame", cv2.resize(self.stamp_packer.layout.canvas, None, fx=0.3, fy=0.3))
         # cv2.waitKey()
 
         return complete_status, align_stamp_path
 
+    def get_stamps(self):
+        return self.stamp_packer.get_stamps()
+
+    def restore(self, stamps, buffered):
+        self.stamp_packer.restore(stamps=stamps, buffered=buffered)
+
+    def get_preview(self):
+        return self.stamp_packer.layout.get_preview()
+
+    def reset(self):
+        self.stamp_packer.reset()
+
 
 if __name__ == '__main__':
     stamp_aligner = StampAligner()
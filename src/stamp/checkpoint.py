@@ -0,0 +1,76 @@
+import os
+import json
+import time
+import cv2
+
+from utils.folder_file_manager import make_directory_if_not_exists
+from settings import CHECKPOINT_DIR
+
+
+class PageCheckpoint:
+    """Checkpoint of the collection counters and of the stamps of the open page, so that the page is restored after a
+    crash or a restart instead of processing its stamps again. Every stamp crop is written once as PNG, and the state
+    is written as JSON through a temporary file, so that a crash while saving leaves the previous state in place.
+    """
+
+    def __init__(self, checkpoint_dir=CHECKPOINT_DIR):
+        self.checkpoint_dir = make_directory_if_not_exists(checkpoint_dir)
+        self.state_path = os.path.join(self.checkpoint_dir, "state.json")
+        self.saved_ids = set([int(c_file[5:-4]) for c_file in os.listdir(self.checkpoint_dir)
+                              if c_file.startswith("stamp") and c_file.endswith(".png") and c_file[5:-4].isdigit()])
+
+    def __get_stamp_path(self, stamp_id):
+        return os.path.join(self.checkpoint_dir, f"stamp{stamp_id}.png")
+
+    def save(self, counters, stamps, buffered):
+        """Saves the counters with the (id, frame) of the stamps of the open page and of the buffered stamps.
+        """
+        stamp_ids = []
+        for stamp_id, stamp_frame in stamps + buffered:
+            stamp_ids.append(stamp_id)
+            if stamp_id in self.saved_ids:
+                continue
+            tmp_path = os.path.join(self.checkpoint_dir, f"stamp{stamp_id}.tmp.png")
+            cv2.imwrite(tmp_path, stamp_frame, [cv2.IMWRITE_PNG_COMPRESSION, 3])
+            os.replace(tmp_path, self.__get_stamp_path(stamp_id))
+            self.saved_ids.add(stamp_id)
+        state = {
+            "counters": counters,
+            "stamp_ids": [stamp_id for stamp_id, _ in stamps],
+            "buffered_ids": [stamp_id for stamp_id, _ in buffered],
+            "saved": time.time()
+        }
+        tmp_path = self.state_path + ".tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(state, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.state_path)
+        # The crops of the closed pages are removed only once the state does not refer to them anymore
+        for stamp_id in self.saved_ids - set(stamp_ids):
+            os.remove(self.__get_stamp_path(stamp_id))
+        self.saved_ids &= set(stamp_ids)
+
+    def load(self):
+        """Returns:  None without a checkpoint, otherwise the state with the counters and the (id, frame) lists of the
+                  stamps of the open page ("stamps") and of the buffered stamps ("buffered")
+        """
+        if not os.path.exists(self.state_path):
+            return None
+        with open(self.state_path) as f:
+            state = json.load(f)
+        for key, ids_key in [("stamps", "stamp_ids"), ("buffered", "buffered_ids")]:
+            state[key] = []
+            for stamp_id in state[ids_key]:
+                stamp_frame = cv2.imread(self.__get_stamp_path(stamp_id))
+                if stamp_frame is None:
+                    print(f"[WARN] Missing checkpoint crop of stamp {stamp_id}")
+                    continue
+                state[key].append((stamp_id, stamp_frame))
+
+        return state
+
+    def clear(self):
+        for c_file in os.listdir(self.checkpoint_dir):
+            os.remove(os.path.join(self.checkpoint_dir, c_file))
+        self.saved_ids = set()
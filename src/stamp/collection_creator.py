@@ -1,37 +1,72 @@
 import os
-import glob
 import numpy as np
 import cv2
 
-from settings import PAPER_HEIGHT, PAPER_WIDTH, PIXEL_TO_MM, OUTPUT_DIR
+from concurrent.futures import ThreadPoolExecutor
+from utils.catalogue import Catalogue
+from utils.image_writer import AsyncImageWriter
+from settings import PAPER_HEIGHT, PAPER_WIDTH, PIXEL_TO_MM, OUTPUT_DIR, COLLECTION_IMAGE_SCALE, \
+    COLLECTION_DECODE_WORKERS
 
 
-def create_main_collection_image(collection_num):
-    main_collection_pic_path = os.path.join(OUTPUT_DIR, f"collection{collection_num}",
-                                            f"Collection{collection_num}.jpg")
+def get_collection_grid(picture_count):
+    # 1x2 for up to 3 pictures, otherwise 2 rows filled row by row
+    cols = picture_count // 2
+    if cols < 2:
+        return 1, 2
+
+    return 2, cols
+
+
+def get_cell_rects(picture_count, scale=COLLECTION_IMAGE_SCALE):
+    """Returns:  size of the collection image at output scale, (left, top, right, bottom) of the cell of every picture
+    """
     pic_width = int(PAPER_WIDTH * PIXEL_TO_MM)
     pic_height = int(PAPER_HEIGHT * PIXEL_TO_MM)
-    pictures = []
-    for init_pic in glob.glob(os.path.join(OUTPUT_DIR, f"collection{collection_num}", "*.jpg")):
-        if "Picture" in init_pic:
-            pictures.append(init_pic)
-    cols = len(pictures) // 2
-    if cols < 2:
-        collection_image = np.ones([pic_height, pic_width * 2, 3], dtype=np.uint8) * 255
-    else:
-        collection_image = np.ones([pic_height * 2, pic_width * cols, 3], dtype=np.uint8) * 255
-    for pic_idx, pic in enumerate(pictures):
-        pic_image = cv2.imread(pic)
-        if pic_idx < 2:
-            collection_image[:pic_height, pic_width * pic_idx:pic_width * (pic_idx + 1)] = pic_image
-        else:
-            if pic_idx < cols:
-                collection_image[:pic_height, pic_width * pic_idx:pic_width * (pic_idx + 1)] = pic_image
-            else:
-                collection_image[pic_height:pic_height * 2, pic_width * (pic_idx - cols):pic_width * (
-                        pic_idx - cols + 1)] = pic_image
-
-    cv2.imwrite(main_collection_pic_path, cv2.resize(collection_image, None, fx=0.7, fy=0.7))
+    rows, cols = get_collection_grid(picture_count=picture_count)
+    cell_rects = []
+    for pic_idx in range(min(picture_count, rows * cols)):
+        row, col = divmod(pic_idx, cols)
+        cell_rects.append((int(round(pic_width * col * scale)), int(round(pic_height * row * scale)),
+                           int(round(pic_width * (col + 1) * scale)), int(round(pic_height * (row + 1) * scale))))
+
+    return (int(round(pic_width * cols * scale)), int(round(pic_height * rows * scale))), cell_rects
+
+
+def compose_collection_image(pictures, scale=COLLECTION_IMAGE_SCALE, workers=COLLECTION_DECODE_WORKERS):
+    """Composes the pictures into a canvas at output scale. The pictures are decoded in parallel and every picture is
+    resized to its cell before it is placed, so that at most workers full resolution pictures are held at once.
+    """
+    (col_width, col_height), cell_rects = get_cell_rects(picture_count=len(pictures), scale=scale)
+    collection_image = np.full([col_height, col_width, 3], 255, dtype=np.uint8)
+
+    def place_picture(pic_path, cell_rect):
+        left, top, right, bottom = cell_rect
+        pic_image = cv2.imread(pic_path)
+        if pic_image is None:
+            print(f"[WARN] Failed to read {pic_path}")
+            return
+        collection_image[top:bottom, left:right] = cv2.resize(pic_image, (right - left, bottom - top),
+                                                              interpolation=cv2.INTER_AREA)
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        # The cells do not overlap, so the workers write into the canvas without locking
+        list(executor.map(place_picture, pictures, cell_rects))
+
+    return collection_image
+
+
+def create_main_collection_image(collection_num, catalogue=None, image_writer=None):
+    """Composes the pictures of the collection, which must be on disk already (flush the image writer first).
+    """
+    catalogue = catalogue or Catalogue()
+    image_writer = image_writer or AsyncImageWriter(workers=0)
+    main_collection_pic_path = os.path.join(OUTPUT_DIR, f"collection{collection_num}",
+                                            f"Collection{collection_num}.jpg")
+    # Ordered by the picture number, so that the layout does not depend on the file system
+    pictures = catalogue.get_pictures(collection_num=collection_num)
+    image_writer.write(main_collection_pic_path, compose_collection_image(pictures=pictures), tag="collection")
+    catalogue.complete_collection(collection_num=collection_num, image_path=main_collection_pic_path)
     # print(f"[INFO] Successfully saved collection image into {main_collection_pic_path}")
 
     return
@@ -10,8 +10,10 @@ from src.feature.extractor import ImageFeature
 from src.stamp.aligner import StampAligner
 from src.stamp.orientator import StampOrientation
 from src.stamp.rotator import rotate_stamp
+from src.stamp.pick_queue import pixel_to_arm
+from src.stamp.side_classifier import StampSideClassifier
 from src.image_processing.utils import ImageUtils
-from settings import SIDE_MODEL_PATH, TOP_IMAGE_PATH, BOTTOM_IMAGE_PATH, CONFIG_FILE_PATH
+from settings import SIDE_MODEL_PATH, CONFIG_FILE_PATH
 
 
 class StampController:
@@ -28,6 +30,7 @@ class StampController:
         self.image_utils = ImageUtils()
         self.side_model = joblib.load(SIDE_MODEL_PATH)
         self.image_feature = ImageFeature()
+        self.side_classifier = StampSideClassifier(image_feature=self.image_feature, side_model=self.side_model)
 
     # @staticmethod
     # def click_event(event, x, y, flags, params):
@@ -35,13 +38,6 @@ class StampController:
     #     if event == cv2.EVENT_LBUTTONDOWN:
     #         print(f"[INFO] Point X: {int(x * 3264 / 1600)}, Point Y: {int(y * 2448 / 1200)}")
 
-    def get_stamp_side(self, frame_path):
-        frame_feature = self.image_feature.get_feature_from_file(img_path=frame_path)
-        stamp_side_proba = max(self.side_model.predict_proba([frame_feature])[0])
-        stamp_side = self.side_model.predict([frame_feature])[0]
-
-        return stamp_side, stamp_side_proba
-
     def run(self):
         cap = cv2.VideoCapture(self.stamp_detector_cam_num)
         top_cap = cv2.VideoCapture(self.top_cam_num)
@@ -76,16 +72,15 @@ class StampController:
                     stamp_y = int((detected_stamp[1] + detected_stamp[3]) / 2)
                     cv2.circle(frame, (stamp_x, stamp_y), 5, (0, 0, 255), 3)
                     print(f"[INFO] Pick Stamp at {stamp_x}, {stamp_y}")
-                    ard_x = (stamp_y - 996) * 0.09368 + 190
-                    ard_y = (stamp_x - 1249) * 0.09368 - 20
+                    ard_x, ard_y = pixel_to_arm(stamp_x=stamp_x, stamp_y=stamp_y)
                     print(f"[INFO] Pick Stamp at {ard_x}, {ard_y} as Robot Arm Pos")
                     self.ard_com.send_command_arduino(command=f"{ard_x},{ard_y}")
                     self.ard_com.ard_res = None
             if self.ard_com.ard_res == "moved":
                 top_height, top_width = top_frame.shape[:2]
                 bottom_height, bottom_width = bottom_frame.shape[:2]
-                top_stamps_rect, _ = self.stamp_detector.detect_from_images(frame=top_frame)
-                bottom_stamps_rect, _ = self.stamp_detector.detect_from_images(frame=bottom_frame)
+                [(top_stamps_rect, _), (bottom_stamps_rect, _)] = \
+                    self.stamp_detector.detect_batch(frames=[top_frame, bottom_frame])
                 if len(top_stamps_rect) == 1 and len(bottom_stamps_rect) == 1:
                     print("[INFO] Single Detected!")
                     self.ard_com.send_command_arduino(command="single")
@@ -93,15 +88,13 @@ class StampController:
                                                                                      top_height),
                                               max(top_stamps_rect[0][0] - 20, 0):min(top_stamps_rect[0][2] + 20,
                                                                                      top_width)]
-                    cv2.imwrite(TOP_IMAGE_PATH, top_stamp_roi)
                     bottom_stamp_roi = \
                         bottom_frame[max(bottom_stamps_rect[0][1] - 20, 0):min(bottom_stamps_rect[0][3] + 20,
                                                                                bottom_height),
                                      max(bottom_stamps_rect[0][0] - 20, 0):min(bottom_stamps_rect[0][2] + 20,
                                                                                bottom_width)]
-                    cv2.imwrite(BOTTOM_IMAGE_PATH, bottom_stamp_roi)
-                    top_side, top_proba = self.get_stamp_side(frame_path=TOP_IMAGE_PATH)
-                    bottom_side, bottom_proba = self.get_stamp_side(frame_path=BOTTOM_IMAGE_PATH)
+                    [(top_side, top_proba), (bottom_side, bottom_proba)] = \
+                        self.side_classifier.classify(top_roi=top_stamp_roi, bottom_roi=bottom_stamp_roi)
                     if top_side == "front" and bottom_side == "front":
                         if top_proba > bottom_proba:
                             front_stamp_image = top_stamp_roi
@@ -120,7 +113,7 @@ class StampController:
                     processed_image = front_stamp_image
                     # processed_image = self.image_utils.run(frame=front_stamp_image)
                     rotated_img_path, rotated_image = rotate_stamp(frame=processed_image)
-                    orientation = self.stamp_orientation.estimate_rotate_angle(frame_path=rotated_img_path)
+                    orientation = self.stamp_orientation.estimate_rotate_angle(frame=rotated_image)
                     if orientation == "normal":
                         final_stamp_image = rotated_image
                     elif orientation == "clock":
@@ -154,4 +147,4 @@ class StampController:
 
 
 if __name__ == '__main__':
-    StampController().get_stamp_side(frame_path="")
+    StampController().run()
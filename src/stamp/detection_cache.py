@@ -0,0 +1,62 @@
+from src.image_processing.motion import get_frame_signature, get_changed_rect, is_change_inside
+from settings import DETECTION_REGION
+
+
+class DetectionCache:
+    """Returns the last detection result of the pick camera while the tray has not changed.
+
+    If the only change is inside one of the cached boxes (the stamp which was just picked), that box is dropped
+    and the rest of the result is kept.
+    """
+
+    def __init__(self, detector):
+        self.detector = detector
+        self.hits = 0
+        self.partial_hits = 0
+        self.misses = 0
+        self.signature = None
+        self.stamp_top_ret = None
+        self.rect_list = []
+        self.scores = []
+
+    def invalidate(self):
+        self.signature = None
+        self.rect_list = []
+        self.scores = []
+
+    def get_stats(self):
+        total = self.hits + self.partial_hits + self.misses
+
+        return {"hits": self.hits, "partial_hits": self.partial_hits, "misses": self.misses,
+                "hit_rate": (self.hits + self.partial_hits) / total if total else 0}
+
+    def __find_changed_stamp(self, changed_rect, region):
+        for idx, rect in enumerate(self.rect_list):
+            if is_change_inside(changed_rect=changed_rect, rect=rect, region=region):
+                return idx
+
+        return None
+
+    def detect_from_images(self, frame, stamp_top_ret=False):
+        region = DETECTION_REGION if stamp_top_ret else None
+        signature = get_frame_signature(frame=frame, region=region)
+        if self.signature is not None and self.stamp_top_ret == stamp_top_ret:
+            changed_rect = get_changed_rect(prev_signature=self.signature, cur_signature=signature)
+            if changed_rect is None:
+                self.hits += 1
+                return list(self.rect_list), list(self.scores)
+            changed_idx = self.__find_changed_stamp(changed_rect=changed_rect, region=region)
+            # An emptied list is detected again, because the tray may hold stamps the detector missed last time
+            if changed_idx is not None and len(self.rect_list) > 1:
+                del self.rect_list[changed_idx]
+                del self.scores[changed_idx]
+                self.signature = signature
+                self.partial_hits += 1
+                return list(self.rect_list), list(self.scores)
+
+        self.misses += 1
+        self.rect_list, self.scores = self.detector.detect_from_images(frame=frame, stamp_top_ret=stamp_top_ret)
+        self.signature = signature
+        self.stamp_top_ret = stamp_top_ret
+
+        return list(self.rect_list), list(self.scores)
@@ -1,65 +1,169 @@
-import tensorflow as tf
+import configparser
 import cv2
 import numpy as np
 import time
 
-from settings import STAMP_MODEL_PATH, CONFIDENCE, CUR_DIR, DETECTION_REGION
+from src.inference.backend import create_backend
+from settings import CONFIDENCE, CUR_DIR, DETECTION_REGION, CONFIG_FILE_PATH, DETECTION_MODE, \
+    DETECTION_LONG_SIDE, DETECTION_TILE_SIZE, DETECTION_TILE_OVERLAP, NMS_IOU_THRESH, NMS_CONTAIN_THRESH
 
+DETECTION_MODES = ["full", "downscale", "tile"]
 
-class StampDetector:
 
-    def __init__(self):
-        detection_graph = tf.Graph()
-        with detection_graph.as_default():
-            od_graph_def = tf.GraphDef()
-            with tf.gfile.GFile(STAMP_MODEL_PATH, 'rb') as fid:
-                serialized_graph = fid.read()
-                od_graph_def.ParseFromString(serialized_graph)
-                tf.import_graph_def(od_graph_def, name='')
+def check_detection_mode(mode):
+    if mode not in DETECTION_MODES:
+        raise ValueError(f"Unknown detection_mode: {mode}, available: {DETECTION_MODES}")
+
+
+def get_iou(rect_a, rect_b):
+    inter_width = min(rect_a[2], rect_b[2]) - max(rect_a[0], rect_b[0])
+    inter_height = min(rect_a[3], rect_b[3]) - max(rect_a[1], rect_b[1])
+    if inter_width <= 0 or inter_height <= 0:
+        return 0, 0
+    inter_area = inter_width * inter_height
+    area_a = (rect_a[2] - rect_a[0]) * (rect_a[3] - rect_a[1])
+    area_b = (rect_b[2] - rect_b[0]) * (rect_b[3] - rect_b[1])
+    iou = inter_area / float(area_a + area_b - inter_area)
+    contain = inter_area / float(max(min(area_a, area_b), 1))
+
+    return iou, contain
+
+
+def non_max_suppression(rect_list, scores, iou_thresh=NMS_IOU_THRESH, contain_thresh=NMS_CONTAIN_THRESH):
+    # Besides the usual IoU test, a box mostly contained in a kept box is dropped, which removes the partial
+    # stamps cut by the tile borders
+    kept_rects = []
+    kept_scores = []
+    for idx in sorted(range(len(scores)), key=lambda k: scores[k], reverse=True):
+        duplicated = False
+        for k_rect in kept_rects:
+            iou, contain = get_iou(rect_list[idx], k_rect)
+            if iou >= iou_thresh or contain >= contain_thresh:
+                duplicated = True
+                break
+        if not duplicated:
+            kept_rects.append(rect_list[idx])
+            kept_scores.append(scores[idx])
+
+    return kept_rects, kept_scores
 
-            self.sess = tf.Session(graph=detection_graph)
 
-        self.image_tensor = detection_graph.get_tensor_by_name('image_tensor:0')
-        self.boxes = detection_graph.get_tensor_by_name('detection_boxes:0')
-        self.scores = detection_graph.get_tensor_by_name('detection_scores:0')
-        self.classes = detection_graph.get_tensor_by_name('detection_classes:0')
-        self.num_detections = detection_graph.get_tensor_by_name('num_detections:0')
+def get_tile_origins(length, tile_size, overlap):
+    if length <= tile_size:
+        return [0]
+    stride = tile_size - overlap
+    origins = list(range(0, length - tile_size, stride))
+    origins.append(length - tile_size)
+
+    return origins
+
+
+class StampDetector:
+
+    def __init__(self, detection_mode=None, backend_name=None):
+        if detection_mode is None:
+            params = configparser.ConfigParser()
+            params.read(CONFIG_FILE_PATH)
+            detection_mode = params.get('DEFAULT', 'detection_mode', fallback=DETECTION_MODE) or DETECTION_MODE
+        # A misspelled mode would otherwise run as "full" without any notice
+        check_detection_mode(mode=detection_mode)
+        self.detection_mode = detection_mode
+        self.backend = create_backend(model_kind="detector", backend_name=backend_name)
 
     def detect_objects(self, image_np):
         # Expand dimensions since the models expects images to have shape: [1, None, None, 3]
         image_np_expanded = np.expand_dims(image_np, axis=0)
 
         # Actual detection.
-        return self.sess.run([self.boxes, self.scores, self.classes, self.num_detections],
-                             feed_dict={self.image_tensor: image_np_expanded})
-
-    def detect_from_images(self, frame, stamp_top_ret=False):
-
-        if stamp_top_ret:
-            frame = frame[DETECTION_REGION[1]:DETECTION_REGION[3], DETECTION_REGION[0]:DETECTION_REGION[2]]
-        [frm_height, frm_width] = frame.shape[:2]
-        frame_rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+        return self.run_batch(image_batch=image_np_expanded)
+
+    def run_batch(self, image_batch):
+        return self.backend.run(inputs=image_batch)
+
+    @staticmethod
+    def letterbox_batch(frames):
+        # Pads every frame at the right/bottom to the largest size in the list, converting BGR to RGB on the way
+        batch_height = max([frame.shape[0] for frame in frames])
+        batch_width = max([frame.shape[1] for frame in frames])
+        image_batch = np.zeros([len(frames), batch_height, batch_width, 3], dtype=np.uint8)
+        for i, frame in enumerate(frames):
+            frm_height, frm_width = frame.shape[:2]
+            image_batch[i, :frm_height, :frm_width] = frame[:, :, ::-1]
+
+        return image_batch
+
+    @staticmethod
+    def prepare_inputs(crop, mode):
+        """Splits or scales the crop for the given detection mode.
+
+        Returns:  list of (input_image, scale, offset_x, offset_y)
+        """
+        crop_height, crop_width = crop.shape[:2]
+        if mode == "downscale":
+            scale = DETECTION_LONG_SIDE / max(crop_height, crop_width)
+            if scale < 1:
+                # Resizing before the colour conversion keeps every following step at the reduced size
+                resized_crop = cv2.resize(crop, None, fx=scale, fy=scale, interpolation=cv2.INTER_AREA)
+                return [(resized_crop, scale, 0, 0)]
+        elif mode == "tile":
+            inputs = []
+            for y in get_tile_origins(crop_height, DETECTION_TILE_SIZE, DETECTION_TILE_OVERLAP):
+                for x in get_tile_origins(crop_width, DETECTION_TILE_SIZE, DETECTION_TILE_OVERLAP):
+                    inputs.append((crop[y:y + DETECTION_TILE_SIZE, x:x + DETECTION_TILE_SIZE], 1, x, y))
+            return inputs
+
+        return [(crop, 1, 0, 0)]
+
+    def detect_batch(self, frames, regions=None, mode=None):
+        """Detects the stamps in several frames with a single session call.
+            Args: frames: list of BGR frames, regions: optional list of [left, top, right, bottom] crops per frame,
+                  mode: "full", "downscale" or "tile", the configured detection mode by default
+
+        Returns:  list of (detected_rect_list, detected_scores) per frame in frame coordinates
+        """
+        if regions is None:
+            regions = [None] * len(frames)
+        if mode is None:
+            mode = self.detection_mode
+        check_detection_mode(mode=mode)
+        crops = []
+        inputs = []
+        for frm_idx, (frame, region) in enumerate(zip(frames, regions)):
+            if region is not None:
+                frame = frame[region[1]:region[3], region[0]:region[2]]
+            crops.append(frame)
+            for input_info in self.prepare_inputs(crop=frame, mode=mode):
+                inputs.append((frm_idx,) + input_info)
+        image_batch = self.letterbox_batch(frames=[input_info[1] for input_info in inputs])
+        batch_height, batch_width = image_batch.shape[1:3]
         st_time = time.time()
 
-        (boxes, scores, classes, _) = self.detect_objects(frame_rgb)
+        (boxes, scores, classes, _) = self.run_batch(image_batch=image_batch)
         print(f"detection time: {time.time() - st_time}")
-        print(scores[0][:3])
-        detected_rect_list = []
-        detected_scores = []
-
-        for i in range(len(scores[0])):
-            if scores[0][i] >= CONFIDENCE:
-                left, top = int(boxes[0][i][1] * frm_width), int(boxes[0][i][0] * frm_height)
-                right, bottom = int(boxes[0][i][3] * frm_width), int(boxes[0][i][2] * frm_height)
-                if stamp_top_ret:
-                    detected_rect_list.append([left + DETECTION_REGION[0], top + DETECTION_REGION[1],
-                                               right + DETECTION_REGION[0], bottom + DETECTION_REGION[1]])
-                else:
-                    detected_rect_list.append([left, top, right, bottom])
-                detected_scores.append(scores[0][i])
-                # cv2.rectangle(frame, (left, top), (right, bottom), (0, 0, 255), 1)
-        # cv2.imshow("Stamps", cv2.resize(frame, None, fx=0.5, fy=0.5))
-        # cv2.waitKey()
+        results = [([], []) for _ in crops]
+        for input_idx, (frm_idx, _, scale, tile_x, tile_y) in enumerate(inputs):
+            print(scores[input_idx][:3])
+            [frm_height, frm_width] = crops[frm_idx].shape[:2]
+            offset_x, offset_y = (regions[frm_idx][0], regions[frm_idx][1]) if regions[frm_idx] is not None \
+                else (0, 0)
+            detected_rect_list, detected_scores = results[frm_idx]
+            for i in range(len(scores[input_idx])):
+                if scores[input_idx][i] >= CONFIDENCE:
+                    box = boxes[input_idx][i]
+                    left = min(int(box[1] * batch_width / scale) + tile_x, frm_width)
+                    top = min(int(box[0] * batch_height / scale) + tile_y, frm_height)
+                    right = min(int(box[3] * batch_width / scale) + tile_x, frm_width)
+                    bottom = min(int(box[2] * batch_height / scale) + tile_y, frm_height)
+                    detected_rect_list.append([left + offset_x, top + offset_y, right + offset_x, bottom + offset_y])
+                    detected_scores.append(scores[input_idx][i])
+        if mode == "tile":
+            results = [non_max_suppression(rect_list=rects, scores=f_scores) for rects, f_scores in results]
+
+        return results
+
+    def detect_from_images(self, frame, stamp_top_ret=False, mode=None):
+        region = DETECTION_REGION if stamp_top_ret else None
+        detected_rect_list, detected_scores = self.detect_batch(frames=[frame], regions=[region], mode=mode)[0]
         # max_detected_stamp_rect = detected_rect_list[detected_scores.index(max(detected_scores))]
 
         return detected_rect_list, detected_scores
@@ -0,0 +1,23 @@
+import cv2
+import numpy as np
+
+
+class LocalStampOrientation:
+    """Estimates the rotation of the stamp offline with a 4-way classifier (normal, clock, counter_clock, reflection)
+    on the Inception feature, returning the same labels as StampOrientation.
+
+    The classifier is trained by ClassifierTrainer.train_orientation on the images of
+    utils/training_images.collect_rotated_images.
+    """
+
+    def __init__(self, image_feature, orientation_model):
+        self.image_feature = image_feature
+        self.orientation_model = orientation_model
+
+    def estimate_rotate_angle(self, frame_path=None, frame=None):
+        if frame is None:
+            frame = cv2.imread(frame_path)
+        feature = self.image_feature.get_feature_from_cvimg(cvimg=frame)
+        rotation_proba = self.orientation_model.predict_proba([feature])[0]
+
+        return self.orientation_model.classes_[int(np.argmax(rotation_proba))]
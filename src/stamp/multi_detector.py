@@ -1,42 +1,55 @@
 import cv2
 
-from settings import STAMP_AREA_THRESH
-
-
-def estimate_multi_single_stamp(frame):
-    ret_val = "Multi"
-    gray_frame = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
-    _, thresh_frame = cv2.threshold(gray_frame, 200, 255, cv2.THRESH_BINARY)
-    gs_contours, _ = cv2.findContours(thresh_frame, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_NONE)
-    glass_contour = sorted(gs_contours, key=cv2.contourArea, reverse=True)[0]
-    gs_left, gs_top, gs_right, gs_bottom = cv2.boundingRect(glass_contour)
-    # cv2.rectangle(frame, (glass_rect[0], glass_rect[1]), (glass_rect[2], glass_rect[3]), (0, 0, 255), 5)
-    # cv2.imshow("Gray frame", gray_frame)
-    # cv2.imshow("Thresh Frame", thresh_frame)
-    # cv2.imshow("Glass Region", frame)
-    # cv2.waitKey()
-    glass_frame = thresh_frame[gs_top:gs_bottom, gs_left:gs_right]
+from src.image_processing.contour import get_contour_scale, get_binary_frame, upscale_contour
+from settings import STAMP_AREA_THRESH, MULTI_GATE_UNSURE_RATIO
+
+
+def estimate_multi_single_stamp(frame, area_thresh=STAMP_AREA_THRESH, debug=False):
+    """Classifies the glass plate image with thresholding and contours, without the stamp detector.
+
+    Returns:  "Single", "Multi", "None" or "Unsure", the latter when a contour is close to the area threshold or the
+              single contour is not a quadrangle
+    """
+    # The glass and the stamps are searched on a downscaled binary frame, which is enough for the quadrangle check
+    scale = get_contour_scale(frame)
+    thresh_frame = get_binary_frame(frame, cv2.THRESH_BINARY, scale)
+    gs_contours, _ = cv2.findContours(thresh_frame, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+    if not gs_contours:
+        return "Unsure"
+    glass_contour = max(gs_contours, key=cv2.contourArea)
+    gs_left, gs_top, gs_width, gs_height = cv2.boundingRect(glass_contour)
+    glass_frame = thresh_frame[gs_top:gs_top + gs_height, gs_left:gs_left + gs_width]
     glass_frame_inv = cv2.bitwise_not(glass_frame)
-    # cv2.imshow("Glass Inv Frame", glass_frame_inv)
-    # cv2.waitKey()
-    st_contours, _ = cv2.findContours(glass_frame_inv, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_NONE)
+    st_contours, _ = cv2.findContours(glass_frame_inv, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
     stamp_contours = []
+    unsure_contours = 0
     for s_cnt in st_contours:
-        if cv2.contourArea(s_cnt) < (gs_bottom - gs_top) * (gs_right - gs_left) * STAMP_AREA_THRESH:
-            continue
-        # print(cv2.contourArea(s_cnt), (gs_bottom - gs_top) * (gs_right - gs_left))
-        stamp_contours.append(s_cnt)
-    if len(stamp_contours) == 1:
-        cv2.drawContours(frame, [stamp_contours[0]], 0, (0, 0, 255), 3)
-        peri = cv2.arcLength(stamp_contours[0], True)
-        approx = cv2.approxPolyDP(stamp_contours[0], 0.01 * peri, True)
-        cv2.drawContours(frame, [approx], 0, (0, 255, 0), 2)
-        cv2.imshow("Approx Contour", cv2.resize(frame, None, fx=0.5, fy=0.5))
+        cnt_area = cv2.contourArea(s_cnt)
+        if cnt_area >= gs_height * gs_width * area_thresh:
+            stamp_contours.append(s_cnt)
+        elif cnt_area >= gs_height * gs_width * area_thresh * MULTI_GATE_UNSURE_RATIO:
+            unsure_contours += 1
+    if debug:
+        debug_frame = frame.copy()
+        cv2.rectangle(debug_frame, (int(gs_left / scale), int(gs_top / scale)),
+                      (int((gs_left + gs_width) / scale), int((gs_top + gs_height) / scale)), (0, 0, 255), 5)
+        for s_cnt in stamp_contours:
+            cv2.drawContours(debug_frame, [upscale_contour(s_cnt, scale, offset=(gs_left, gs_top))], 0,
+                             (0, 0, 255), 3)
+        cv2.imshow("Glass Inv Frame", glass_frame_inv)
+        cv2.imshow("Stamp Contours", cv2.resize(debug_frame, None, fx=0.5, fy=0.5))
         cv2.waitKey()
-        if len(approx) == 4:
-            ret_val = "Single"
-    elif len(stamp_contours) == 0:
+
+    if len(stamp_contours) > 1:
+        ret_val = "Multi"
+    elif unsure_contours:
+        ret_val = "Unsure"
+    elif not stamp_contours:
         ret_val = "None"
+    else:
+        peri = cv2.arcLength(stamp_contours[0], True)
+        approx = cv2.approxPolyDP(stamp_contours[0], 0.01 * peri, True)
+        ret_val = "Single" if len(approx) == 4 else "Unsure"
 
     # print(f"[INFO] {ret_val} Stamp(s)")
 
@@ -46,10 +59,10 @@ def estimate_multi_single_stamp(frame):
 if __name__ == '__main__':
     import glob
     import os
+    import sys
 
-    multi = estimate_multi_single_stamp(frame=cv2.imread(""))
-    img_files = glob.glob(os.path.join("", "*.jpg"))
+    img_files = glob.glob(os.path.join(sys.argv[1], "*.jpg"))
     for i_file in img_files:
-        multi = estimate_multi_single_stamp(frame=cv2.imread(i_file))
+        multi = estimate_multi_single_stamp(frame=cv2.imread(i_file), debug=True)
         if multi != "Single":
-            print(f"[WANR] {i_file}: {multi}")
+            print(f"[WARN] {i_file}: {multi}")
@@ -0,0 +1,219 @@
+import numpy as np
+import cv2
+
+from rectpack import newPacker, MaxRectsBssf, MaxRectsBl, MaxRectsBlsf, MaxRectsBaf, SkylineBl, SkylineBlWm, \
+    SkylineMwf, SkylineMwfl, GuillotineBssfSas, GuillotineBafSas, GuillotineBlsfSas
+from settings import PAGE_PREVIEW_WIDTH
+
+PACKING_ALGOS = {
+    "maxrects_bssf": MaxRectsBssf,
+    "maxrects_bl": MaxRectsBl,
+    "maxrects_blsf": MaxRectsBlsf,
+    "maxrects_baf": MaxRectsBaf,
+    "skyline_bl": SkylineBl,
+    "skyline_bl_wm": SkylineBlWm,
+    "skyline_mwf": SkylineMwf,
+    "skyline_mwfl": SkylineMwfl,
+    "guillotine_bssf_sas": GuillotineBssfSas,
+    "guillotine_baf_sas": GuillotineBafSas,
+    "guillotine_blsf_sas": GuillotineBlsfSas
+}
+
+
+class PageLayout:
+    """Keeps the placements of the page being filled as data, so that adding a stamp only places the new rectangle and
+    draws it into a downscaled preview. The whole page is packed again from scratch only when the new rectangle does
+    not fit into the free space left by the current placements, and the full resolution page is rendered only once,
+    when it is closed.
+    """
+    def __init__(self, page_width, page_height, pack_algo=MaxRectsBssf, rotation=False,
+                 preview_width=PAGE_PREVIEW_WIDTH):
+        self.page_width = page_width
+        self.page_height = page_height
+        self.pack_algo = pack_algo
+        self.rotation = rotation
+        self.preview_scale = min(preview_width / page_width, 1.0)
+        self.canvas = None
+        self.preview = np.full([int(round(page_height * self.preview_scale)), int(round(page_width * self.preview_scale)),
+                                3], 255, dtype=np.uint8)
+        self.stamps = {}
+        self.thumbnails = {}
+        self.placements = {}
+        self.bin = None
+        self.next_id = 0
+        self.repack_count = 0
+        self.reset()
+
+    def __len__(self):
+        return len(self.stamps)
+
+    def reset(self):
+        self.preview[:] = 255
+        self.stamps = {}
+        self.thumbnails = {}
+        self.placements = {}
+        self.bin = self.pack_algo(self.page_width, self.page_height, rot=self.rotation)
+
+    def get_fill_ratio(self):
+        used_area = sum([w * h for _, _, w, h in self.placements.values()])
+
+        return used_area / (self.page_width * self.page_height)
+
+    def get_preview(self):
+        return self.preview.copy()
+
+    def get_placements(self):
+        """Returns:  placements of the page in image coordinates as (id, x, y, width, height, rotated)
+        """
+        return [(rid, x, y, w, h, self.stamps[rid].shape[:2] != (h, w))
+                for rid, (x, y, w, h) in self.placements.items()]
+
+    def __set_placement(self, rid, x, y, w, h):
+        # rectpack places the rectangles from the bottom left corner of the bin
+        self.placements[rid] = (x, self.page_height - y - h, w, h)
+
+    def __fit_frame(self, rid, stamp_frame):
+        _, _, w, h = self.placements[rid]
+        if self.stamps[rid].shape[:2] != (h, w):
+            # Placed with 90 degrees rotation
+            stamp_frame = cv2.rotate(stamp_frame, cv2.ROTATE_90_CLOCKWISE)
+
+        return stamp_frame
+
+    def __draw_preview(self, rid):
+        x, y, w, h = self.placements[rid]
+        left, top = int(round(x * self.preview_scale)), int(round(y * self.preview_scale))
+        right, bottom = int(round((x + w) * self.preview_scale)), int(round((y + h) * self.preview_scale))
+        if right <= left or bottom <= top:
+            return
+        thumbnail = self.__fit_frame(rid, self.thumbnails[rid])
+        if thumbnail.shape[:2] != (bottom - top, right - left):
+            thumbnail = cv2.resize(thumbnail, (right - left, bottom - top), interpolation=cv2.INTER_AREA)
+        self.preview[top:bottom, left:right] = thumbnail
+
+    def render(self):
+        """Draws the stamps of the page at full resolution into a new page canvas, which can be handed over to a
+        background writer.
+        """
+        self.canvas = np.full([self.page_height, self.page_width, 3], 255, dtype=np.uint8)
+        for rid, (x, y, w, h) in self.placements.items():
+            self.canvas[y:y + h, x:x + w] = self.__fit_frame(rid, self.stamps[rid])
+
+        return self.canvas
+
+    def __repack(self, width, height, rid):
+        packer = newPacker(pack_algo=self.pack_algo, rotation=self.rotation)
+        for s_id, (_, _, s_width, s_height) in self.placements.items():
+            packer.add_rect(s_width, s_height, s_id)
+        packer.add_rect(width, height, rid)
+        packer.add_bin(self.page_width, self.page_height)
+        packer.pack()
+        all_rects = packer.rect_list()
+        if len(all_rects) < len(self.placements) + 1:
+            return False
+        self.repack_count += 1
+        self.bin = packer[0]
+        for _, x, y, w, h, s_id in all_rects:
+            self.__set_placement(s_id, x, y, w, h)
+
+        return True
+
+    def add(self, stamp_frame, rid=None):
+        """Places the stamp on the page, with a generated id unless rid is given.
+
+        Returns:  stable id of the stamp, None if it does not fit into the page even after repacking
+        """
+        height, width = stamp_frame.shape[:2]
+        if rid is None:
+            rid = self.next_id
+            self.next_id += 1
+        rect = self.bin.add_rect(width, height, rid)
+        if rect is not None:
+            self.__set_placement(rid, rect.x, rect.y, rect.width, rect.height)
+        elif not self.__repack(width, height, rid):
+            return None
+        self.stamps[rid] = stamp_frame
+        self.thumbnails[rid] = cv2.resize(stamp_frame, None, fx=self.preview_scale, fy=self.preview_scale,
+                                          interpolation=cv2.INTER_AREA) if self.preview_scale < 1 else stamp_frame
+        if rect is not None:
+            self.__draw_preview(rid)
+        else:
+            self.preview[:] = 255
+            for s_id in self.stamps:
+                self.__draw_preview(s_id)
+
+        return rid
+
+
+class StampPacker:
+    """Feeds the stamps into a PageLayout through a look-ahead buffer of look_ahead stamps, placing the largest
+    buffered stamp that fits into the open page first. With look_ahead of 1 every stamp is placed as it comes.
+    """
+    def __init__(self, page_width, page_height, pack_algo="maxrects_bssf", rotation=False, look_ahead=1):
+        self.layout = PageLayout(page_width=page_width, page_height=page_height, pack_algo=PACKING_ALGOS[pack_algo],
+                                 rotation=rotation)
+        self.look_ahead = max(look_ahead, 1)
+        self.stamp_buffer = []
+        self.page_fills = []
+        self.closed_placements = []
+
+    def __len__(self):
+        return len(self.stamp_buffer)
+
+    def push(self, stamp_frame, stamp_id=None):
+        """Buffers the stamp and places one stamp once the buffer is full. stamp_id is kept as the id of the placement.
+
+        Returns:  whether the open page got complete, the page is then rendered into layout.canvas and the stamp
+                  placed starts the next page
+        """
+        if stamp_id is None:
+            stamp_id = self.layout.next_id
+            self.layout.next_id += 1
+        self.stamp_buffer.append((stamp_id, stamp_frame))
+        if len(self.stamp_buffer) < self.look_ahead:
+            return False
+
+        return self.place_next()
+
+    def place_next(self):
+        self.stamp_buffer.sort(key=lambda k: k[1].shape[0] * k[1].shape[1], reverse=True)
+        for i, (stamp_id, stamp_frame) in enumerate(self.stamp_buffer):
+            if self.layout.add(stamp_frame=stamp_frame, rid=stamp_id) is not None:
+                del self.stamp_buffer[i]
+                return False
+        stamp_id, stamp_frame = self.stamp_buffer.pop(0)
+        if not len(self.layout):
+            print(f"[WARN] Stamp of {stamp_frame.shape[1]}x{stamp_frame.shape[0]} does not fit into the page")
+            return False
+        self.page_fills.append(self.layout.get_fill_ratio())
+        self.closed_placements = self.layout.get_placements()
+        self.layout.render()
+        self.layout.reset()
+        self.layout.add(stamp_frame=stamp_frame, rid=stamp_id)
+
+        return True
+
+    def get_stamps(self):
+        """Returns:  (id, frame) of the stamps of the open page in the order they were placed, (id, frame) of the
+                  buffered stamps
+        """
+        return list(self.layout.stamps.items()), list(self.stamp_buffer)
+
+    def restore(self, stamps, buffered):
+        """Places the stamps of an open page again, as returned by get_stamps. A stamp which does not fit anymore is
+        put back into the buffer.
+        """
+        self.reset()
+        for stamp_id, stamp_frame in stamps:
+            if self.layout.add(stamp_frame=stamp_frame, rid=stamp_id) is None:
+                print(f"[WARN] Restored stamp {stamp_id} does not fit into the page anymore")
+                self.stamp_buffer.append((stamp_id, stamp_frame))
+        self.stamp_buffer.extend(buffered)
+        stamp_ids = [stamp_id for stamp_id, _ in stamps + buffered]
+        self.layout.next_id = max(stamp_ids + [self.layout.next_id - 1]) + 1
+
+    def reset(self):
+        self.layout.reset()
+        self.stamp_buffer = []
+        self.page_fills = []
+        self.closed_placements = []
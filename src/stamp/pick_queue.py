@@ -0,0 +1,82 @@
+import math
+
+from src.image_processing.motion import get_frame_signature, get_changed_rect, is_change_inside
+from settings import DETECTION_REGION, ARM_PIXEL_ORIGIN, ARM_POS_OFFSET, ARM_MM_PER_PIXEL, \
+    ARM_HOME_POS, PICK_SCORE_WEIGHT, PICK_ISOLATION_WEIGHT, PICK_DISTANCE_WEIGHT, PICK_ISOLATION_NORM
+
+
+def pixel_to_arm(stamp_x, stamp_y):
+    ard_x = (stamp_y - ARM_PIXEL_ORIGIN[1]) * ARM_MM_PER_PIXEL + ARM_POS_OFFSET[0]
+    ard_y = (stamp_x - ARM_PIXEL_ORIGIN[0]) * ARM_MM_PER_PIXEL + ARM_POS_OFFSET[1]
+
+    return ard_x, ard_y
+
+
+def get_rect_gap(rect_a, rect_b):
+    gap_x = max(rect_a[0] - rect_b[2], rect_b[0] - rect_a[2], 0)
+    gap_y = max(rect_a[1] - rect_b[3], rect_b[1] - rect_a[3], 0)
+
+    return max(gap_x, gap_y)
+
+
+class PickQueue:
+    """Keeps every stamp found in one detection of the tray and hands them out best first.
+
+    Before each pick the tray is compared with the frame of the previous pick. Changes outside the stamp which
+    was just picked mean the tray was disturbed, and the queue is dropped so that the caller detects again.
+    """
+
+    def __init__(self):
+        self.entries = []
+        self.last_pick = None
+        self.signature = None
+
+    def __len__(self):
+        return len(self.entries)
+
+    def invalidate(self):
+        self.entries = []
+        self.last_pick = None
+        self.signature = None
+
+    def fill(self, rect_list, scores, frame):
+        self.entries = []
+        arm_distances = []
+        for rect, score in zip(rect_list, scores):
+            stamp_x = int((rect[0] + rect[2]) / 2)
+            stamp_y = int((rect[1] + rect[3]) / 2)
+            arm_pos = pixel_to_arm(stamp_x=stamp_x, stamp_y=stamp_y)
+            gaps = [get_rect_gap(rect, n_rect) for n_rect in rect_list if n_rect is not rect]
+            isolation = min(min(gaps) / PICK_ISOLATION_NORM, 1) if gaps else 1
+            arm_distances.append(math.hypot(arm_pos[0] - ARM_HOME_POS[0], arm_pos[1] - ARM_HOME_POS[1]))
+            self.entries.append({"rect": rect, "score": score, "pixel_pos": (stamp_x, stamp_y), "arm_pos": arm_pos,
+                                 "isolation": isolation})
+        max_distance = max(arm_distances) if arm_distances else 0
+        for entry, distance in zip(self.entries, arm_distances):
+            entry["rank"] = PICK_SCORE_WEIGHT * entry["score"] + PICK_ISOLATION_WEIGHT * entry["isolation"] - \
+                PICK_DISTANCE_WEIGHT * (distance / max_distance if max_distance else 0)
+        self.entries.sort(key=lambda k: k["rank"], reverse=True)
+        self.last_pick = None
+        self.signature = get_frame_signature(frame=frame, region=DETECTION_REGION)
+
+        return
+
+    def __is_picked_area(self, changed_rect):
+        return self.last_pick is not None and is_change_inside(changed_rect=changed_rect, rect=self.last_pick["rect"],
+                                                               region=DETECTION_REGION)
+
+    def next_pick(self, frame):
+        """Returns the next stamp to pick as an entry dict with "arm_pos", or None if the tray must be detected.
+        """
+        if not self.entries:
+            return None
+        signature = get_frame_signature(frame=frame, region=DETECTION_REGION)
+        changed_rect = get_changed_rect(prev_signature=self.signature, cur_signature=signature)
+        if changed_rect is not None and not self.__is_picked_area(changed_rect=changed_rect):
+            print("[INFO] Tray was disturbed, the pick queue is dropped")
+            self.invalidate()
+            return None
+        self.signature = signature
+        self.last_pick = self.entries.pop(0)
+
+        return self.last_pick
@@ -1,11 +1,33 @@
 import os
 import math
+import threading
 import numpy as np
 import cv2
 
+from src.image_processing.contour import find_largest_contour
 from settings import PIXEL_TO_MM, CUR_DIR
 
 
+class ScratchBuffers:
+    """Per-thread uint8 work buffers which grow to the largest requested size and are reused afterwards.
+    """
+
+    def __init__(self):
+        self.local = threading.local()
+
+    def get(self, name, shape):
+        size = int(np.prod(shape))
+        buffer = getattr(self.local, name, None)
+        if buffer is None or buffer.size < size:
+            buffer = np.empty(size, dtype=np.uint8)
+            setattr(self.local, name, buffer)
+
+        return buffer[:size].reshape(shape)
+
+
+scratch_buffers = ScratchBuffers()
+
+
 def order_points(pts):
     # sort the points based on their x-coordinates
     pts_x_sorted = pts[np.argsort(pts[:, 0]), :]
@@ -22,22 +44,24 @@ def order_points(pts):
 
 
 def get_stamp_contour(roi_frame):
-    gray_frame = cv2.cvtColor(roi_frame, cv2.COLOR_BGR2GRAY)
-    _, thresh_frame = cv2.threshold(gray_frame, 200, 255, cv2.THRESH_BINARY_INV)
-    dilate_frame = cv2.dilate(thresh_frame, np.ones((4, 4), np.uint8), iterations=1)
-    st_contours, _ = cv2.findContours(dilate_frame, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_NONE)
-    stamp_contour = sorted(st_contours, key=cv2.contourArea, reverse=True)[0]
+    stamp_contour, stamp_quad = find_largest_contour(frame=roi_frame, thresh_type=cv2.THRESH_BINARY_INV, dilate_size=4)
     # cv2.drawContours(roi_frame, [stamp_contour], 0, (0, 0, 255), 1)
     # cv2.imshow("Contour Frame", roi_frame)
     # cv2.waitKey()
 
-    return stamp_contour
+    return stamp_contour, stamp_quad
+
 
+def rotate_stamp(frame, write_file=False):
+    """Deskews the stamp of the ROI frame onto a white margin of 1mm, whitening everything outside its contour.
+        Args: frame: ROI frame around the stamp, write_file: whether to save the result into rotated.jpg
 
-def rotate_stamp(frame):
+    Returns:  rotated_image_path (None if not written), final stamp image
+    """
     rotated_image_path = os.path.join(CUR_DIR, 'rotated.jpg')
-    stamp_contour = get_stamp_contour(roi_frame=frame)
-    stamp_rect = cv2.minAreaRect(stamp_contour)
+    # The quad only sets the perspective transform, the whitening mask follows the outline of the stamp contour
+    stamp_contour, stamp_quad = get_stamp_contour(roi_frame=frame)
+    stamp_rect = cv2.minAreaRect(stamp_quad)
     stamp_box = np.int0(cv2.boxPoints(stamp_rect))
     stamp_box[stamp_box < 0] = 0
     ordered_points = order_points(pts=stamp_box)
@@ -49,22 +73,22 @@ def rotate_stamp(frame):
     origin_pts = np.float32(ordered_points)
     trans_pts = np.float32([[0, 0], [0, height], [width, height], [width, 0]])
     trans = cv2.getPerspectiveTransform(origin_pts, trans_pts)
-    trans_frame = cv2.warpPerspective(frame, trans, (width, height))
-    stamp_image = np.ones([height + round(PIXEL_TO_MM * 2), width + round(2 * PIXEL_TO_MM), 3], dtype=np.uint8) * 255
-    stamp_image[round(PIXEL_TO_MM):round(PIXEL_TO_MM) + height, round(PIXEL_TO_MM):round(PIXEL_TO_MM) + width] = \
-        trans_frame
-    # cv2.imshow("Trans Image", stamp_image)
-    # cv2.waitKey()
-    trans_contour = get_stamp_contour(roi_frame=stamp_image)
-    black_image = np.zeros([height + round(PIXEL_TO_MM * 2), width + round(2 * PIXEL_TO_MM), 3], np.uint8)
-    mask = cv2.drawContours(black_image, [trans_contour], -1, (255, 255, 255), -1)
-    # cv2.imshow("Mask Image", mask)
-    # cv2.waitKey()
-    not_mask = cv2.bitwise_not(mask)
-    blur_edge_frame = (mask / 255.0 * stamp_image).astype(np.uint8)
-    final_stamp = blur_edge_frame + not_mask
+    trans_frame = cv2.warpPerspective(frame, trans, (width, height),
+                                      dst=scratch_buffers.get("warp", (height, width, 3)))
+    # The contour of the warped stamp is the first contour moved by the same transform, instead of a second search
+    trans_contour = cv2.perspectiveTransform(stamp_contour.astype(np.float32), trans)
+    mask = scratch_buffers.get("mask", (height, width))
+    mask.fill(0)
+    cv2.fillPoly(mask, [np.int32(np.round(trans_contour))], 1)
+
+    margin = round(PIXEL_TO_MM)
+    final_stamp = np.full([height + round(PIXEL_TO_MM * 2), width + round(2 * PIXEL_TO_MM), 3], 255, dtype=np.uint8)
+    np.copyto(final_stamp[margin:margin + height, margin:margin + width], trans_frame,
+              where=mask.view(np.bool_)[:, :, None])
     # cv2.imshow("Final Frame", final_stamp)
     # cv2.waitKey()
+    if not write_file:
+        return None, final_stamp
     cv2.imwrite(rotated_image_path, final_stamp)
 
     return rotated_image_path, final_stamp
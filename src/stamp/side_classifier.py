@@ -0,0 +1,74 @@
+import time
+import numpy as np
+
+from src.feature.statistics import get_color_texture_feature
+from utils.image_writer import AsyncImageWriter
+from settings import TOP_IMAGE_PATH, BOTTOM_IMAGE_PATH, SAVE_SIDE_IMAGES, CASCADE_CONFIDENCE
+
+
+def get_best_side(model, features):
+    # The label is taken from the same probabilities, instead of running predict separately
+    results = []
+    for side_proba in model.predict_proba(features):
+        best_idx = int(np.argmax(side_proba))
+        results.append((model.classes_[best_idx], side_proba[best_idx]))
+
+    return results
+
+
+class StampSideClassifier:
+    """Estimates the front/back side of the top and bottom stamp crops in memory.
+
+    With a fast model (colour/texture statistics) the classification is a cascade: the Inception feature is only
+    extracted for the crops the fast model is not confident about, and not at all once one crop is a confident
+    "front". `last_report` tells which stage decided each crop and the estimated time saved.
+    """
+
+    def __init__(self, image_feature, side_model, fast_model=None, cascade_confidence=CASCADE_CONFIDENCE,
+                 image_writer=None):
+        self.image_feature = image_feature
+        self.side_model = side_model
+        self.fast_model = fast_model
+        self.cascade_confidence = cascade_confidence
+        self.image_writer = image_writer or AsyncImageWriter(workers=0)
+        self.inception_time = None
+        self.last_report = {}
+
+    def __classify_inception(self, rois):
+        st_time = time.time()
+        features = self.image_feature.get_features_from_cvimgs(cvimgs=rois)
+        results = get_best_side(model=self.side_model, features=features)
+        per_roi_time = (time.time() - st_time) / len(rois)
+        self.inception_time = per_roi_time if self.inception_time is None else \
+            0.9 * self.inception_time + 0.1 * per_roi_time
+
+        return results
+
+    def classify(self, top_roi, bottom_roi, debug=SAVE_SIDE_IMAGES):
+        """Returns:  [(top_side, top_proba), (bottom_side, bottom_proba)]
+        """
+        if debug:
+            self.image_writer.write(TOP_IMAGE_PATH, top_roi, tag="side_roi", droppable=True)
+            self.image_writer.write(BOTTOM_IMAGE_PATH, bottom_roi, tag="side_roi", droppable=True)
+        rois = [top_roi, bottom_roi]
+        if self.fast_model is None:
+            results = self.__classify_inception(rois=rois)
+            self.last_report = {"stages": ["inception", "inception"], "saved_time": 0}
+            return results
+
+        st_time = time.time()
+        results = get_best_side(model=self.fast_model, features=[get_color_texture_feature(roi) for roi in rois])
+        fast_time = time.time() - st_time
+        stages = ["fast", "fast"]
+        confident_front = any([side == "front" and proba >= self.cascade_confidence for side, proba in results])
+        ambiguous = [] if confident_front else \
+            [idx for idx, (_, proba) in enumerate(results) if proba < self.cascade_confidence]
+        if ambiguous:
+            for idx, result in zip(ambiguous, self.__classify_inception(rois=[rois[idx] for idx in ambiguous])):
+                results[idx] = result
+                stages[idx] = "inception"
+        skipped = len(rois) - len(ambiguous)
+        saved_time = skipped * self.inception_time - fast_time if self.inception_time is not None else 0
+        self.last_report = {"stages": stages, "fast_time": fast_time, "saved_time": saved_time}
+
+        return results
@@ -0,0 +1,89 @@
+import time
+import threading
+
+from concurrent.futures import ThreadPoolExecutor
+
+
+class StartupOrchestrator:
+    """Loads the components of the application concurrently and keeps a timing report of each of them.
+
+    A loader is a callable returning the component. Heavy libraries (tensorflow, sklearn) should be imported inside
+    the loader, so the window is not kept waiting for them.
+    """
+
+    def __init__(self, max_workers=4):
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="startup")
+        self.start_time = time.monotonic()
+        self.futures = {}
+        self.timings = {}
+        self.callbacks = []
+        self.lock = threading.Lock()
+
+    def add(self, name, loader):
+        # The futures are registered under the lock, as the callbacks of the finished loaders iterate them meanwhile
+        with self.lock:
+            future = self.executor.submit(self.__load, name, loader)
+            self.futures[name] = future
+        future.add_done_callback(lambda f: self.__notify(name=name, future=f))
+
+        return future
+
+    def __load(self, name, loader):
+        st_time = time.monotonic()
+        try:
+            return loader()
+        finally:
+            self.timings[name] = (st_time - self.start_time, time.monotonic() - st_time)
+
+    def __notify(self, name, future):
+        with self.lock:
+            callbacks = list(self.callbacks)
+        for callback in callbacks:
+            callback(name, future.exception())
+
+    def on_component_ready(self, callback):
+        """Registers callback(name, error) called on the loader thread whenever a component finishes loading.
+        """
+        with self.lock:
+            self.callbacks.append(callback)
+
+        return
+
+    def __get_futures(self):
+        with self.lock:
+            return dict(self.futures)
+
+    def get(self, name, timeout=None):
+        return self.__get_futures()[name].result(timeout=timeout)
+
+    def is_ready(self, name=None):
+        futures = self.__get_futures()
+        futures = [futures[name]] if name is not None else list(futures.values())
+
+        return all([future.done() and future.exception() is None for future in futures])
+
+    def get_status(self):
+        status = {}
+        for name, future in self.__get_futures().items():
+            if not future.done():
+                status[name] = "loading"
+            elif future.exception() is not None:
+                status[name] = "failed"
+            else:
+                status[name] = "ready"
+
+        return status
+
+    def get_report(self):
+        lines = []
+        for name in self.__get_futures().keys():
+            if name in self.timings:
+                started, elapsed = self.timings[name]
+                lines.append(f"{name}: {elapsed:.2f}s (started at {started:.2f}s)")
+        finished = [started + elapsed for started, elapsed in self.timings.values()]
+        lines.append(f"total: {max(finished) if finished else 0:.2f}s")
+
+        return "[INFO] Startup timing - " + ", ".join(lines)
+
+    def shutdown(self):
+        self.executor.shutdown(wait=False)
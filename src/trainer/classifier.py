@@ -14,7 +14,7 @@ from sklearn.tree import DecisionTreeClassifier
 from sklearn.ensemble import RandomForestClassifier, AdaBoostClassifier
 from sklearn.naive_bayes import GaussianNB
 from sklearn.discriminant_analysis import QuadraticDiscriminantAnalysis
-from settings import CUR_DIR, MODEL_DIR
+from settings import CUR_DIR, MODEL_DIR, FAST_SIDE_MODEL_PATH, ORIENTATION_MODEL_PATH, FEATURE_VERSION
 
 
 class ClassifierTrainer:
@@ -48,7 +48,10 @@ class ClassifierTrainer:
 
         return converted_array
 
-    def train_best_model(self, model_path):
+    def train_best_model(self, model_path, feature_version=None):
+        """Trains the best of the classifiers and saves it, tagged with the preprocessing version of the Inception
+        features it was trained on (None for other features).
+        """
         x_train, x_test, y_train, y_test = \
             train_test_split(self.x_data, self.y_data, test_size=.3, random_state=42)
 
@@ -64,18 +67,58 @@ class ClassifierTrainer:
         best_clf.fit(self.x_data, self.y_data)
         score = best_clf.score(x_test, y_test)
         print(f"[INFO] The accuracy of the best model: {self.model_names[scores.index(max(scores))]}, {score}")
+        if feature_version is not None:
+            best_clf.feature_version = feature_version
         joblib.dump(best_clf, model_path)
         print(f"[INFO] Successfully saved in {model_path}")
 
         return
 
+    def train_fast(self):
+        """Trains the first stage of the side cascade on colour/texture statistics of the classification images.
+        """
+        import cv2
+        from src.feature.statistics import get_color_texture_feature
+
+        training_dir = os.path.join(CUR_DIR, 'classification_dir')
+        for path, sub_dirs, files in os.walk(training_dir):
+            current_category = os.path.basename(path)
+            for file in files:
+                image = cv2.imread(os.path.join(path, file))
+                if image is None:
+                    continue
+                self.x_data.append(get_color_texture_feature(cvimg=image).tolist())
+                self.y_data.append(current_category)
+
+        self.train_best_model(model_path=FAST_SIDE_MODEL_PATH)
+
+        return
+
+    def train_orientation(self, img_dir):
+        """Trains the offline orientation classifier on the images created by collect_rotated_images.
+        """
+        import glob
+        from src.feature.extractor import ImageFeature
+        from utils.training_images import get_rotation_label
+
+        feature_extractor = ImageFeature()
+        for img_path in glob.glob(os.path.join(img_dir, "*.jpg")):
+            self.x_data.append(feature_extractor.get_feature_from_file(img_path=img_path).tolist())
+            self.y_data.append(get_rotation_label(img_path=img_path))
+
+        self.train_best_model(model_path=ORIENTATION_MODEL_PATH, feature_version=feature_extractor.feature_version)
+
+        return
+
     def train(self):
         train_df = pd.read_csv(os.path.join(CUR_DIR, 'classification_dir', 'side_features.csv'))
         self.y_data = train_df["Label"].values.tolist()
         for x_d_f in train_df["Feature"].values.tolist():
             self.x_data.append(literal_eval(x_d_f))
 
-        self.train_best_model(model_path=os.path.join(MODEL_DIR, "side_classifier.pkl"))
+        # side_features.csv is created by TrainDataProcessor with the current FEATURE_VERSION
+        self.train_best_model(model_path=os.path.join(MODEL_DIR, "side_classifier.pkl"),
+                              feature_version=FEATURE_VERSION)
 
         return
 
@@ -0,0 +1,27 @@
+import numpy as np
+import pytest
+
+from settings import DETECTION_REGION
+
+
+@pytest.fixture
+def tray_frame():
+    # Plain tray frame of the pick camera, large enough for DETECTION_REGION
+    return np.full([DETECTION_REGION[3] + 100, DETECTION_REGION[2] + 100, 3], 200, dtype=np.uint8)
+
+
+@pytest.fixture
+def create_stamp():
+    def create(width, height, value=0):
+        return np.full([height, width, 3], value, dtype=np.uint8)
+
+    return create
+
+
+@pytest.fixture
+def create_frame():
+    # Small camera frame for the stores and the clients which do not look at its content
+    def create(value=0):
+        return np.full([40, 60, 3], value, dtype=np.uint8)
+
+    return create
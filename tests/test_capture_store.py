@@ -0,0 +1,95 @@
+import os
+
+from utils.capture_store import CaptureStore
+from utils.image_writer import AsyncImageWriter
+
+
+def list_captures(capture_dir):
+    return sorted([c_file for c_file in os.listdir(capture_dir) if c_file.endswith(".jpg")])
+
+
+class QueuedImageWriter(AsyncImageWriter):
+    # Holds the writes until run() to play the worker, and records whether they could be dropped
+    def __init__(self):
+        super().__init__(workers=0)
+        self.queued = []
+        self.droppable = []
+
+    def write(self, path, frame, tag="image", params=None, droppable=False, on_written=None):
+        self.queued.append((path, frame, tag, on_written))
+        self.droppable.append(droppable)
+
+        return True
+
+    def run(self):
+        for path, frame, tag, on_written in self.queued:
+            super().write(path, frame, tag=tag, on_written=on_written)
+        self.queued = []
+
+
+def test_oldest_captures_are_evicted_over_the_count(tmp_path, create_frame):
+    store = CaptureStore(capture_dir=str(tmp_path), max_count=3, success_sample=1)
+    for idx in range(5):
+        store.save(frames={"top": create_frame()}, outcome="back", file_names={"top": f"top_{idx}.jpg"})
+    assert list_captures(tmp_path) == ["top_2.jpg", "top_3.jpg", "top_4.jpg"]
+    assert store.get_stats()["count"] == 3
+
+
+def test_oldest_captures_are_evicted_over_the_size(tmp_path, create_frame):
+    store = CaptureStore(capture_dir=str(tmp_path), max_count=100, success_sample=1)
+    store.save(frames={"top": create_frame()}, outcome="back", file_names={"top": "top_0.jpg"})
+    capture_mb = os.path.getsize(str(tmp_path / "top_0.jpg")) / 1024 / 1024
+    store.max_bytes = int(2.5 * capture_mb * 1024 * 1024)
+    for idx in range(1, 4):
+        store.save(frames={"top": create_frame()}, outcome="back", file_names={"top": f"top_{idx}.jpg"})
+    assert list_captures(tmp_path) == ["top_2.jpg", "top_3.jpg"]
+
+
+def test_expired_captures_are_evicted(tmp_path, create_frame):
+    # A negative age expires every capture as soon as it is written
+    store = CaptureStore(capture_dir=str(tmp_path), max_age_hours=-1, success_sample=1)
+    store.save(frames={"top": create_frame()}, outcome="back")
+    assert store.get_stats()["count"] == 0
+    assert list_captures(tmp_path) == []
+
+
+def test_successful_cycles_are_sampled(tmp_path, create_frame):
+    store = CaptureStore(capture_dir=str(tmp_path), success_sample=3)
+    kept = [bool(store.save(frames={"top": create_frame()}, outcome="single", file_names={"top": f"s_{idx}.jpg"}))
+            for idx in range(6)]
+    assert kept == [True, False, False, True, False, False]
+    assert store.save(frames={"top": create_frame()}, outcome="multi_none")
+
+
+def test_captures_are_found_by_stamp(tmp_path, create_frame):
+    store = CaptureStore(capture_dir=str(tmp_path), success_sample=1)
+    paths = store.save(frames={"top": create_frame(), "bottom": create_frame()}, outcome="single", stamp_id=12)
+    assert sorted(store.find(stamp_id=12).values()) == sorted(paths)
+    assert store.find(stamp_id=13) == {}
+
+
+def test_existing_captures_are_indexed(tmp_path):
+    for idx in range(4):
+        (tmp_path / f"old_{idx}.jpg").write_bytes(b"0" * 100)
+    store = CaptureStore(capture_dir=str(tmp_path), max_count=2)
+    assert store.get_stats()["count"] == 2
+    assert len(list_captures(tmp_path)) == 2
+
+
+def test_capture_evicted_while_queued_is_not_left_on_disk(tmp_path, create_frame):
+    image_writer = QueuedImageWriter()
+    store = CaptureStore(capture_dir=str(tmp_path), image_writer=image_writer, max_age_hours=-1, success_sample=1)
+    store.save(frames={"top": create_frame(), "bottom": create_frame()}, outcome="back")
+    # The write of the top capture evicts the expired bottom capture, which is still queued
+    image_writer.run()
+    assert list_captures(tmp_path) == []
+    assert store.get_stats() == {"count": 0, "mb": 0}
+
+
+def test_non_droppable_captures_are_never_dropped(tmp_path, create_frame):
+    image_writer = QueuedImageWriter()
+    CaptureStore(capture_dir=str(tmp_path), image_writer=image_writer).save(frames={"top": create_frame()},
+                                                                            outcome="back")
+    CaptureStore(capture_dir=str(tmp_path), image_writer=image_writer, droppable=False).save(
+        frames={"final": create_frame()}, outcome="single")
+    assert image_writer.droppable == [True, False]
@@ -0,0 +1,67 @@
+import os
+
+from utils.catalogue import Catalogue
+
+
+def create_catalogue(tmp_path):
+    output_dir = tmp_path / "output"
+    output_dir.mkdir(exist_ok=True)
+
+    return Catalogue(db_path=str(tmp_path / "catalogue.db"), output_dir=str(output_dir))
+
+
+def test_counters_start_and_reserve(tmp_path):
+    catalogue = create_catalogue(tmp_path)
+    assert catalogue.get_next_index("collection") == 1
+    assert catalogue.get_next_index("stamp_paper") == 0
+    assert [catalogue.reserve_index("stamp_paper") for _ in range(3)] == [0, 1, 2]
+    assert catalogue.get_next_index("stamp_paper") == 3
+
+
+def test_counters_are_only_raised(tmp_path):
+    catalogue = create_catalogue(tmp_path)
+    catalogue.add_collection(collection_num=5)
+    assert catalogue.get_next_index("collection") == 6
+    catalogue.add_collection(collection_num=2)
+    assert catalogue.get_next_index("collection") == 6
+    catalogue.add_stamp_paper(paper_num=4, path="StampPaper4.jpg")
+    assert catalogue.get_next_index("stamp_paper") == 5
+
+
+def test_removed_collection_index_is_used_again(tmp_path):
+    catalogue = create_catalogue(tmp_path)
+    catalogue.add_collection(collection_num=1)
+    catalogue.add_collection(collection_num=2)
+    catalogue.remove_collection(collection_num=2)
+    assert catalogue.get_next_index("collection") == 2
+
+
+def test_counters_persist_across_restarts(tmp_path):
+    catalogue = create_catalogue(tmp_path)
+    catalogue.add_collection(collection_num=3)
+    catalogue.reserve_index("stamp_paper")
+    catalogue.close()
+    catalogue = create_catalogue(tmp_path)
+    assert catalogue.get_next_index("collection") == 4
+    assert catalogue.get_next_index("stamp_paper") == 1
+
+
+def test_pictures_and_placements(tmp_path):
+    catalogue = create_catalogue(tmp_path)
+    stamp_id = catalogue.add_stamp(collection_num=1, picture_num=1, stamp_num=0, timings={"detection": 0.5})
+    catalogue.add_picture(collection_num=1, picture_num=2, path="Picture2.jpg")
+    catalogue.add_picture(collection_num=1, picture_num=1, path="Picture1.jpg",
+                          placements=[(stamp_id, 0, 0, 100, 80, False)])
+    assert catalogue.get_pictures(collection_num=1) == ["Picture1.jpg", "Picture2.jpg"]
+    assert catalogue.get_stage_timings()["detection"]["count"] == 1
+
+
+def test_rebuild_from_the_output_tree(tmp_path):
+    output_dir = tmp_path / "output"
+    (output_dir / "collection7").mkdir(parents=True)
+    (output_dir / "collection7" / "Picture1.jpg").write_bytes(b"")
+    (output_dir / "StampPaper3.jpg").write_bytes(b"")
+    catalogue = create_catalogue(tmp_path)
+    assert catalogue.get_next_index("collection") == 8
+    assert catalogue.get_next_index("stamp_paper") == 4
+    assert catalogue.get_pictures(collection_num=7) == [os.path.join(str(output_dir), "collection7", "Picture1.jpg")]
@@ -0,0 +1,49 @@
+import numpy as np
+
+from src.stamp.checkpoint import PageCheckpoint
+from src.stamp.packing import StampPacker
+
+
+def test_checkpoint_round_trip(tmp_path, create_stamp):
+    checkpoint = PageCheckpoint(checkpoint_dir=str(tmp_path))
+    counters = {"collection_num": 2, "picture_num": 3, "stamp_num": 5}
+    stamps = [(4, create_stamp(60, 40, 10)), (7, create_stamp(30, 50, 20))]
+    buffered = [(9, create_stamp(20, 20, 30))]
+    checkpoint.save(counters=counters, stamps=stamps, buffered=buffered)
+    state = PageCheckpoint(checkpoint_dir=str(tmp_path)).load()
+    assert state["counters"] == counters
+    for key, expected in [("stamps", stamps), ("buffered", buffered)]:
+        assert [stamp_id for stamp_id, _ in state[key]] == [stamp_id for stamp_id, _ in expected]
+        for (_, frame), (_, expected_frame) in zip(state[key], expected):
+            assert np.array_equal(frame, expected_frame)
+
+
+def test_crops_of_closed_pages_are_removed(tmp_path, create_stamp):
+    checkpoint = PageCheckpoint(checkpoint_dir=str(tmp_path))
+    checkpoint.save(counters={}, stamps=[(1, create_stamp(10, 10, 10))], buffered=[])
+    checkpoint.save(counters={}, stamps=[(2, create_stamp(10, 10, 20))], buffered=[])
+    assert not (tmp_path / "stamp1.png").exists()
+    assert (tmp_path / "stamp2.png").exists()
+
+
+def test_clear_removes_the_checkpoint(tmp_path, create_stamp):
+    checkpoint = PageCheckpoint(checkpoint_dir=str(tmp_path))
+    checkpoint.save(counters={}, stamps=[(1, create_stamp(10, 10, 10))], buffered=[])
+    checkpoint.clear()
+    assert checkpoint.load() is None
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_packer_restores_a_saved_page(tmp_path, create_stamp):
+    packer = StampPacker(page_width=400, page_height=300, look_ahead=2)
+    for stamp_id, (width, height) in enumerate([(100, 80), (120, 90), (60, 60)]):
+        packer.push(stamp_frame=create_stamp(width, height, stamp_id), stamp_id=stamp_id)
+    stamps, buffered = packer.get_stamps()
+    checkpoint = PageCheckpoint(checkpoint_dir=str(tmp_path))
+    checkpoint.save(counters={}, stamps=stamps, buffered=buffered)
+    state = checkpoint.load()
+    restored = StampPacker(page_width=400, page_height=300, look_ahead=2)
+    restored.restore(stamps=state["stamps"], buffered=state["buffered"])
+    assert sorted(restored.layout.stamps.keys()) == sorted([stamp_id for stamp_id, _ in stamps])
+    assert [stamp_id for stamp_id, _ in restored.stamp_buffer] == [stamp_id for stamp_id, _ in buffered]
+    assert restored.layout.next_id == 3
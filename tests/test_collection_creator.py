@@ -0,0 +1,37 @@
+import cv2
+import numpy as np
+
+from src.stamp.collection_creator import get_collection_grid, get_cell_rects, compose_collection_image
+
+
+def test_collection_grid():
+    assert [get_collection_grid(picture_count=count) for count in [2, 4, 6, 8, 10]] == \
+        [(1, 2), (2, 2), (2, 3), (2, 4), (2, 5)]
+    assert get_collection_grid(picture_count=1) == (1, 2)
+    assert get_collection_grid(picture_count=3) == (1, 2)
+
+
+def test_cell_rects_tile_the_collection_image():
+    for picture_count in [2, 4, 6, 8, 10]:
+        (col_width, col_height), cell_rects = get_cell_rects(picture_count=picture_count, scale=0.1)
+        assert len(cell_rects) == picture_count
+        covered = np.zeros([col_height, col_width], dtype=np.int32)
+        for left, top, right, bottom in cell_rects:
+            covered[top:bottom, left:right] += 1
+        assert (covered == 1).all()
+
+
+def test_compose_places_every_picture_in_its_cell(tmp_path):
+    pictures = []
+    for pic_idx in range(4):
+        pic_path = str(tmp_path / f"Picture{pic_idx + 1}.png")
+        cv2.imwrite(pic_path, np.full([290, 210, 3], 40 * pic_idx, dtype=np.uint8))
+        pictures.append(pic_path)
+    pictures.append(str(tmp_path / "missing.png"))
+    collection_image = compose_collection_image(pictures=pictures[:4], scale=0.05, workers=2)
+    _, cell_rects = get_cell_rects(picture_count=4, scale=0.05)
+    for pic_idx, (left, top, right, bottom) in enumerate(cell_rects):
+        assert (collection_image[top:bottom, left:right] == 40 * pic_idx).all()
+    collection_image = compose_collection_image(pictures=pictures[3:], scale=0.05, workers=2)
+    _, [_, (left, top, right, bottom)] = get_cell_rects(picture_count=2, scale=0.05)
+    assert (collection_image[top:bottom, left:right] == 255).all()
@@ -0,0 +1,55 @@
+from src.stamp.detection_cache import DetectionCache
+
+
+class CountingDetector:
+    def __init__(self, rect_list, scores):
+        self.rect_list = rect_list
+        self.scores = scores
+        self.calls = 0
+
+    def detect_from_images(self, frame, stamp_top_ret=False):
+        self.calls += 1
+        return list(self.rect_list), list(self.scores)
+
+
+def create_cache():
+    rect_list = [[600, 500, 900, 800], [1500, 1200, 1800, 1500]]
+    detector = CountingDetector(rect_list=rect_list, scores=[0.9, 0.8])
+
+    return DetectionCache(detector=detector), detector
+
+
+def test_unchanged_tray_is_a_hit(tray_frame):
+    cache, detector = create_cache()
+    first = cache.detect_from_images(frame=tray_frame, stamp_top_ret=True)
+    second = cache.detect_from_images(frame=tray_frame.copy(), stamp_top_ret=True)
+    assert first == second
+    assert detector.calls == 1
+    assert cache.get_stats()["hits"] == 1 and cache.get_stats()["misses"] == 1
+
+
+def test_picked_stamp_is_dropped_without_detecting(tray_frame):
+    cache, detector = create_cache()
+    cache.detect_from_images(frame=tray_frame, stamp_top_ret=True)
+    tray_frame[550:750, 650:850] = 30
+    rect_list, scores = cache.detect_from_images(frame=tray_frame, stamp_top_ret=True)
+    assert rect_list == [[1500, 1200, 1800, 1500]] and scores == [0.8]
+    assert detector.calls == 1
+    assert cache.get_stats()["partial_hits"] == 1
+
+
+def test_change_outside_the_stamps_detects_again(tray_frame):
+    cache, detector = create_cache()
+    cache.detect_from_images(frame=tray_frame, stamp_top_ret=True)
+    tray_frame[1900:2200, 2300:2700] = 30
+    rect_list, _ = cache.detect_from_images(frame=tray_frame, stamp_top_ret=True)
+    assert len(rect_list) == 2
+    assert detector.calls == 2
+
+
+def test_invalidate_detects_again(tray_frame):
+    cache, detector = create_cache()
+    cache.detect_from_images(frame=tray_frame, stamp_top_ret=True)
+    cache.invalidate()
+    cache.detect_from_images(frame=tray_frame, stamp_top_ret=True)
+    assert detector.calls == 2
@@ -0,0 +1,113 @@
+import numpy as np
+import cv2
+import pytest
+
+import src.stamp.detector as detector_module
+from src.stamp.detector import StampDetector, non_max_suppression
+
+MAX_BOXES = 8
+
+
+class BlobBackend:
+    """Detects every non-black blob of the letterboxed inputs, with boxes normalized to the batch size as the
+    detection graph returns them. Larger blobs get higher scores.
+    """
+
+    def __init__(self):
+        self.batch_shapes = []
+
+    def run(self, inputs):
+        batch_size, batch_height, batch_width = inputs.shape[:3]
+        self.batch_shapes.append(inputs.shape)
+        boxes = np.zeros([batch_size, MAX_BOXES, 4], dtype=np.float32)
+        scores = np.zeros([batch_size, MAX_BOXES], dtype=np.float32)
+        for idx, image in enumerate(inputs):
+            mask = np.uint8(np.any(image > 0, axis=2))
+            label_count, _, stats, _ = cv2.connectedComponentsWithStats(mask, connectivity=8)
+            for b_idx, (left, top, width, height, area) in enumerate(stats[1:MAX_BOXES + 1]):
+                boxes[idx, b_idx] = [top / batch_height, left / batch_width, (top + height) / batch_height,
+                                     (left + width) / batch_width]
+                scores[idx, b_idx] = 0.7 + 0.29 * area / (batch_height * batch_width)
+
+        return boxes, scores, np.ones_like(scores), np.full([batch_size], MAX_BOXES)
+
+
+def create_detector(monkeypatch, detection_mode="full"):
+    backend = BlobBackend()
+    monkeypatch.setattr(detector_module, "create_backend", lambda model_kind, backend_name=None: backend)
+
+    return StampDetector(detection_mode=detection_mode), backend
+
+
+def create_blob_frame(height, width, rects):
+    frame = np.zeros([height, width, 3], dtype=np.uint8)
+    for left, top, right, bottom in rects:
+        frame[top:bottom, left:right] = (60, 90, 150)
+
+    return frame
+
+
+def assert_rects(rects, expected_rects):
+    assert len(rects) == len(expected_rects)
+    for rect, expected_rect in zip(sorted(rects), sorted(expected_rects)):
+        assert np.max(np.abs(np.array(rect) - np.array(expected_rect))) <= 1
+
+
+def test_unknown_detection_mode_is_rejected():
+    with pytest.raises(ValueError, match="tiles"):
+        StampDetector(detection_mode="tiles")
+
+
+def test_letterboxed_boxes_are_mapped_to_each_frame(monkeypatch):
+    detector, backend = create_detector(monkeypatch)
+    frames = [create_blob_frame(600, 800, [[150, 100, 350, 300]]),
+              create_blob_frame(400, 500, [[20, 250, 120, 390], [300, 30, 480, 200]])]
+    results = detector.detect_batch(frames=frames)
+    # Both frames go through one session call, padded to the largest size
+    assert backend.batch_shapes == [(2, 600, 800, 3)]
+    assert_rects(results[0][0], [[150, 100, 350, 300]])
+    assert_rects(results[1][0], [[20, 250, 120, 390], [300, 30, 480, 200]])
+
+
+def test_region_boxes_are_in_frame_coordinates(monkeypatch):
+    detector, backend = create_detector(monkeypatch)
+    frame = create_blob_frame(600, 800, [[150, 100, 350, 300], [600, 400, 700, 500]])
+    [(rects, _)] = detector.detect_batch(frames=[frame], regions=[[100, 50, 500, 450]])
+    assert backend.batch_shapes == [(1, 400, 400, 3)]
+    assert_rects(rects, [[150, 100, 350, 300]])
+
+
+def test_downscaled_boxes_are_scaled_back(monkeypatch):
+    detector, backend = create_detector(monkeypatch, detection_mode="downscale")
+    frame = create_blob_frame(1600, 2560, [[400, 200, 1200, 1000]])
+    [(rects, _)] = detector.detect_batch(frames=[frame])
+    assert backend.batch_shapes == [(1, 800, 1280, 3)]
+    assert_rects(rects, [[400, 200, 1200, 1000]])
+
+
+def test_tile_duplicates_are_suppressed(monkeypatch):
+    detector, backend = create_detector(monkeypatch, detection_mode="tile")
+    # The first stamp lies in the overlap of all 4 tiles, the second one is cut by the right border of the first tiles
+    frame = create_blob_frame(1500, 1500, [[600, 600, 800, 800], [900, 100, 1100, 300]])
+    [(rects, scores)] = detector.detect_batch(frames=[frame])
+    assert backend.batch_shapes == [(4, 1024, 1024, 3)]
+    assert_rects(rects, [[600, 600, 800, 800], [900, 100, 1100, 300]])
+    assert len(scores) == 2
+
+
+def test_non_max_suppression_drops_overlapping_and_contained_boxes():
+    rect_list = [[0, 0, 100, 100], [5, 5, 105, 105], [10, 10, 40, 40], [200, 200, 300, 300]]
+    scores = [0.9, 0.8, 0.95, 0.7]
+    kept_rects, kept_scores = non_max_suppression(rect_list=rect_list, scores=scores, iou_thresh=0.5,
+                                                  contain_thresh=0.8)
+    # The contained box scores highest, so it is kept and the box around it goes by containment, not IoU
+    assert kept_rects == [[10, 10, 40, 40], [200, 200, 300, 300]]
+    assert kept_scores == [0.95, 0.7]
+
+
+def test_non_max_suppression_drops_overlapping_boxes_by_iou():
+    rect_list = [[0, 0, 100, 100], [5, 5, 105, 105], [60, 0, 160, 100]]
+    kept_rects, _ = non_max_suppression(rect_list=rect_list, scores=[0.9, 0.8, 0.7], iou_thresh=0.5,
+                                        contain_thresh=0.8)
+    # The second box has an IoU of 0.82 with the first one, the third one only 0.25 and a containment of 0.4
+    assert kept_rects == [[0, 0, 100, 100], [60, 0, 160, 100]]
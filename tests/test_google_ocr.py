@@ -0,0 +1,32 @@
+import socket
+
+from src.benchmark.vision_client import start_stub_server, StubVisionHandler
+from utils.google_ocr import GoogleVisionAPI
+
+
+def test_error_page_falls_back_on_none(create_frame):
+    server, endpoint_url = start_stub_server(delay=0, fail_every=1, fail_status=403,
+                                             fail_body=b"<html><body>Forbidden</body></html>")
+    google_api = GoogleVisionAPI(endpoint_url=endpoint_url, api_key="stub", cache_dir=None)
+    assert google_api.detect_text_from_image(frame=create_frame()) is None
+    # A 403 does not change on a retry
+    assert StubVisionHandler.request_count == 1
+    server.shutdown()
+
+
+def test_unavailable_status_is_retried(create_frame):
+    server, endpoint_url = start_stub_server(delay=0, fail_every=2, fail_body=b"<html>Unavailable</html>")
+    google_api = GoogleVisionAPI(endpoint_url=endpoint_url, api_key="stub", cache_dir=None)
+    assert google_api.detect_text_from_image(frame=create_frame()) == {"textAnnotations": []}
+    assert google_api.detect_text_from_image(frame=create_frame()) == {"textAnnotations": []}
+    assert StubVisionHandler.request_count == 3
+    server.shutdown()
+
+
+def test_connection_errors_end_at_the_deadline(create_frame):
+    with socket.socket() as free_socket:
+        free_socket.bind(("127.0.0.1", 0))
+        port = free_socket.getsockname()[1]
+    google_api = GoogleVisionAPI(endpoint_url=f"http://127.0.0.1:{port}/v1/images:annotate", api_key="stub",
+                                 cache_dir=None, deadline=2)
+    assert google_api.detect_text_from_image(frame=create_frame()) is None
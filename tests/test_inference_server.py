@@ -0,0 +1,34 @@
+import pickle
+import numpy as np
+import pytest
+
+from src.inference.server import InferenceServer, get_picklable_error
+
+
+class UnpicklableError(Exception):
+    def __init__(self, message):
+        super().__init__(message)
+        self.callback = lambda: message
+
+
+def test_unpicklable_errors_are_replaced():
+    error = get_picklable_error(UnpicklableError("session failed"))
+    assert isinstance(pickle.loads(pickle.dumps(error)), RuntimeError)
+    assert "session failed" in str(error)
+    value_error = ValueError("bad frame")
+    assert get_picklable_error(value_error) is value_error
+
+
+def test_dead_process_fails_pending_calls_and_load():
+    server = InferenceServer(backend_name="opencv", slot_count=2, slot_bytes=1024)
+    future = server.call(model_kind="detector", method="detect_batch",
+                         frame_args={"frames": [np.zeros([8, 8, 3], dtype=np.uint8)]})
+    server.process.kill()
+    with pytest.raises(RuntimeError, match="exited"):
+        future.result(timeout=10)
+    with pytest.raises(RuntimeError, match="exited"):
+        server.wait_ready(timeout=10)
+    with pytest.raises(RuntimeError, match="exited"):
+        server.call(model_kind="detector", method="detect_batch")
+    assert server.free_slots.qsize() == 2
+    server.stop()
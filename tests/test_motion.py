@@ -0,0 +1,14 @@
+from src.image_processing.motion import is_change_inside
+
+
+def test_change_inside_the_widened_rect():
+    rect = [100, 100, 200, 200]
+    assert is_change_inside(changed_rect=[70, 70, 230, 230], rect=rect, margin=40)
+    assert not is_change_inside(changed_rect=[50, 100, 150, 150], rect=rect, margin=40)
+    assert not is_change_inside(changed_rect=[150, 150, 250, 250], rect=rect, margin=40)
+
+
+def test_change_is_moved_by_the_region():
+    rect = [100, 100, 200, 200]
+    assert is_change_inside(changed_rect=[0, 0, 50, 50], rect=rect, region=[120, 120, 400, 400], margin=0)
+    assert not is_change_inside(changed_rect=[0, 0, 50, 50], rect=rect, margin=0)
@@ -0,0 +1,98 @@
+import itertools
+
+from src.stamp.packing import PageLayout, StampPacker, PACKING_ALGOS
+
+PAGE_WIDTH = 400
+PAGE_HEIGHT = 300
+
+
+def assert_valid_placements(placements, page_width=PAGE_WIDTH, page_height=PAGE_HEIGHT):
+    for _, x, y, w, h, _ in placements:
+        assert 0 <= x and 0 <= y and x + w <= page_width and y + h <= page_height
+    for (_, x_a, y_a, w_a, h_a, _), (_, x_b, y_b, w_b, h_b, _) in itertools.combinations(placements, 2):
+        assert x_a + w_a <= x_b or x_b + w_b <= x_a or y_a + h_a <= y_b or y_b + h_b <= y_a
+
+
+def test_layout_places_stamps_without_overlap(create_stamp):
+    layout = PageLayout(page_width=PAGE_WIDTH, page_height=PAGE_HEIGHT, preview_width=100)
+    stamp_ids = [layout.add(stamp_frame=create_stamp(90, 70)) for _ in range(8)]
+    assert stamp_ids == list(range(8))
+    placements = layout.get_placements()
+    assert sorted([placement[0] for placement in placements]) == stamp_ids
+    assert_valid_placements(placements=placements)
+    assert layout.get_fill_ratio() == 8 * 90 * 70 / (PAGE_WIDTH * PAGE_HEIGHT)
+
+
+def test_layout_keeps_given_ids_and_rejects_what_does_not_fit(create_stamp):
+    layout = PageLayout(page_width=PAGE_WIDTH, page_height=PAGE_HEIGHT, preview_width=100)
+    assert layout.add(stamp_frame=create_stamp(200, 150), rid=17) == 17
+    assert layout.add(stamp_frame=create_stamp(PAGE_WIDTH + 1, 10)) is None
+    assert len(layout) == 1
+
+
+def test_layout_repacks_when_the_free_space_is_fragmented(create_stamp):
+    layout = PageLayout(page_width=PAGE_WIDTH, page_height=PAGE_HEIGHT, preview_width=100)
+    for width, height in [(200, 100), (250, 100), (150, 200), (100, 200)]:
+        assert layout.add(stamp_frame=create_stamp(width, height)) is not None
+    assert layout.repack_count == 1
+    assert len(layout) == 4
+    assert_valid_placements(placements=layout.get_placements())
+
+
+def test_render_draws_every_stamp_at_its_placement(create_stamp):
+    layout = PageLayout(page_width=PAGE_WIDTH, page_height=PAGE_HEIGHT, preview_width=100)
+    for value in [10, 20, 30]:
+        layout.add(stamp_frame=create_stamp(100, 80, value=value))
+    canvas = layout.render()
+    assert canvas.shape == (PAGE_HEIGHT, PAGE_WIDTH, 3)
+    for rid, x, y, w, h, _ in layout.get_placements():
+        assert (canvas[y:y + h, x:x + w] == [10, 20, 30][rid]).all()
+    assert layout.get_preview().shape == (75, 100, 3)
+
+
+def test_reset_empties_the_page(create_stamp):
+    layout = PageLayout(page_width=PAGE_WIDTH, page_height=PAGE_HEIGHT, preview_width=100)
+    layout.add(stamp_frame=create_stamp(100, 80, value=10))
+    layout.reset()
+    assert len(layout) == 0 and layout.get_placements() == []
+    assert (layout.get_preview() == 255).all()
+
+
+def test_packer_buffers_look_ahead_stamps_and_places_the_largest_first(create_stamp):
+    packer = StampPacker(page_width=PAGE_WIDTH, page_height=PAGE_HEIGHT, look_ahead=3)
+    assert not packer.push(stamp_frame=create_stamp(50, 50), stamp_id=0)
+    assert not packer.push(stamp_frame=create_stamp(120, 100), stamp_id=1)
+    assert len(packer.layout) == 0
+    assert not packer.push(stamp_frame=create_stamp(80, 60), stamp_id=2)
+    assert list(packer.layout.stamps.keys()) == [1]
+    assert sorted([stamp_id for stamp_id, _ in packer.stamp_buffer]) == [0, 2]
+
+
+def test_packer_closes_the_page_when_no_buffered_stamp_fits(create_stamp):
+    packer = StampPacker(page_width=PAGE_WIDTH, page_height=PAGE_HEIGHT)
+    completes = [packer.push(stamp_frame=create_stamp(200, 150, value=idx), stamp_id=idx) for idx in range(5)]
+    assert completes == [False, False, False, False, True]
+    assert sorted([placement[0] for placement in packer.closed_placements]) == [0, 1, 2, 3]
+    assert packer.page_fills == [1.0]
+    assert packer.layout.canvas.shape == (PAGE_HEIGHT, PAGE_WIDTH, 3)
+    assert list(packer.layout.stamps.keys()) == [4]
+
+
+def test_packer_rotates_stamps_only_when_allowed(create_stamp):
+    tall_stamp = create_stamp(100, PAGE_HEIGHT + 50)
+    packer = StampPacker(page_width=PAGE_WIDTH, page_height=PAGE_HEIGHT)
+    packer.push(stamp_frame=tall_stamp, stamp_id=0)
+    assert len(packer.layout) == 0
+    packer = StampPacker(page_width=PAGE_WIDTH, page_height=PAGE_HEIGHT, rotation=True)
+    packer.push(stamp_frame=tall_stamp, stamp_id=0)
+    [(_, _, _, width, height, rotated)] = packer.layout.get_placements()
+    assert (width, height, rotated) == (PAGE_HEIGHT + 50, 100, True)
+    assert packer.layout.render().shape == (PAGE_HEIGHT, PAGE_WIDTH, 3)
+
+
+def test_every_packing_algo_places_valid_pages(create_stamp):
+    for pack_algo in PACKING_ALGOS:
+        packer = StampPacker(page_width=PAGE_WIDTH, page_height=PAGE_HEIGHT, pack_algo=pack_algo, look_ahead=2)
+        for idx, (width, height) in enumerate([(90, 70), (60, 120), (150, 80), (70, 70), (110, 90)] * 3):
+            packer.push(stamp_frame=create_stamp(width, height), stamp_id=idx)
+            assert_valid_placements(placements=packer.layout.get_placements())
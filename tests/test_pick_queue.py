@@ -0,0 +1,38 @@
+from src.stamp.pick_queue import PickQueue
+
+
+def create_queue(frame):
+    pick_queue = PickQueue()
+    pick_queue.fill(rect_list=[[600, 500, 900, 800], [1500, 1200, 1800, 1500]], scores=[0.9, 0.5], frame=frame)
+
+    return pick_queue
+
+
+def test_stamps_are_handed_out_best_first(tray_frame):
+    pick_queue = create_queue(frame=tray_frame)
+    assert pick_queue.next_pick(frame=tray_frame)["score"] == 0.9
+    assert pick_queue.next_pick(frame=tray_frame)["score"] == 0.5
+    assert pick_queue.next_pick(frame=tray_frame) is None
+
+
+def test_change_at_the_picked_stamp_keeps_the_queue(tray_frame):
+    pick_queue = create_queue(frame=tray_frame)
+    first_pick = pick_queue.next_pick(frame=tray_frame)
+    left, top, right, bottom = first_pick["rect"]
+    tray_frame[top + 50:bottom - 50, left + 50:right - 50] = 30
+    assert pick_queue.next_pick(frame=tray_frame) is not None
+
+
+def test_disturbed_tray_drops_the_queue(tray_frame):
+    pick_queue = create_queue(frame=tray_frame)
+    pick_queue.next_pick(frame=tray_frame)
+    tray_frame[1900:2200, 2300:2700] = 30
+    assert pick_queue.next_pick(frame=tray_frame) is None
+    assert len(pick_queue) == 0
+
+
+def test_invalidate_empties_the_queue(tray_frame):
+    pick_queue = create_queue(frame=tray_frame)
+    pick_queue.invalidate()
+    assert len(pick_queue) == 0
+    assert pick_queue.next_pick(frame=tray_frame) is None
@@ -0,0 +1,37 @@
+import numpy as np
+import cv2
+
+from src.stamp.rotator import rotate_stamp
+from src.benchmark.rotator import legacy_rotate_stamp
+from settings import CONTOUR_MAX_SIDE
+
+
+def create_perforated_stamp(width=1300, height=950, angle=6, hole_radius=9, hole_step=26):
+    # A stamp larger than CONTOUR_MAX_SIDE on a grey background, with perforation gaps along its edges
+    stamp = np.full([height, width, 3], (60, 90, 150), dtype=np.uint8)
+    for x in range(0, width + 1, hole_step):
+        cv2.circle(stamp, (x, 0), hole_radius, (225, 225, 225), -1)
+        cv2.circle(stamp, (x, height - 1), hole_radius, (225, 225, 225), -1)
+    for y in range(0, height + 1, hole_step):
+        cv2.circle(stamp, (0, y), hole_radius, (225, 225, 225), -1)
+        cv2.circle(stamp, (width - 1, y), hole_radius, (225, 225, 225), -1)
+    cv2.putText(stamp, "STAMP", (width // 4, height // 2), cv2.FONT_HERSHEY_SIMPLEX, 6, (20, 20, 20), 12)
+    frame = np.full([height + 300, width + 300, 3], 225, dtype=np.uint8)
+    frame[150:150 + height, 150:150 + width] = stamp
+    trans = cv2.getRotationMatrix2D(((width + 300) / 2, (height + 300) / 2), angle, 1.0)
+
+    return cv2.warpAffine(frame, trans, (width + 300, height + 300), borderValue=(225, 225, 225))
+
+
+def get_white_fraction(image):
+    return float(np.mean(np.all(image >= 250, axis=2)))
+
+
+def test_large_stamp_is_whitened_like_the_legacy_deskew():
+    frame = create_perforated_stamp()
+    assert max(frame.shape[:2]) > CONTOUR_MAX_SIDE
+    _, final_stamp = rotate_stamp(frame=frame)
+    legacy_stamp = legacy_rotate_stamp(frame=frame)
+    assert abs(final_stamp.shape[0] - legacy_stamp.shape[0]) <= 2
+    assert abs(final_stamp.shape[1] - legacy_stamp.shape[1]) <= 2
+    assert abs(get_white_fraction(final_stamp) - get_white_fraction(legacy_stamp)) < 0.005
@@ -0,0 +1,141 @@
+import os
+import sqlite3
+import threading
+import time
+import cv2
+
+from utils.image_writer import AsyncImageWriter
+from settings import TEMP_IMAGE_DIR, CAPTURE_MAX_COUNT, CAPTURE_MAX_MB, CAPTURE_MAX_AGE_HOURS, \
+    CAPTURE_SUCCESS_SAMPLE, CAPTURE_SCALE
+
+CAPTURE_SCHEMA = """
+CREATE TABLE IF NOT EXISTS captures (capture_id INTEGER PRIMARY KEY, stamp_id INTEGER, cycle TEXT, camera TEXT,
+                                     outcome TEXT, path TEXT, size INTEGER, created REAL);
+CREATE INDEX IF NOT EXISTS captures_stamp ON captures (stamp_id);
+CREATE INDEX IF NOT EXISTS captures_created ON captures (created);
+"""
+
+
+class CaptureStore:
+    """Keeps the raw top/bottom captures of the cycles within count, size and age limits, evicting the oldest ones.
+
+    Every failed cycle is kept, but only 1 in success_sample successful cycles, optionally downscaled by scale. The
+    captures are indexed in SQLite, so that the captures of a stamp are found without listing the folder. Unless
+    droppable is False, the image writer may skip the captures when its queue is full.
+    """
+
+    def __init__(self, capture_dir=TEMP_IMAGE_DIR, image_writer=None, max_count=CAPTURE_MAX_COUNT,
+                 max_mb=CAPTURE_MAX_MB, max_age_hours=CAPTURE_MAX_AGE_HOURS, success_sample=CAPTURE_SUCCESS_SAMPLE,
+                 scale=CAPTURE_SCALE, droppable=True):
+        self.capture_dir = capture_dir
+        self.droppable = droppable
+        self.image_writer = image_writer or AsyncImageWriter(workers=0)
+        self.max_count = max_count
+        self.max_bytes = max_mb * 1024 * 1024
+        self.max_age = max_age_hours * 3600
+        self.success_sample = max(success_sample, 1)
+        self.scale = scale
+        self.success_count = 0
+        self.lock = threading.Lock()
+        db_path = os.path.join(capture_dir, "captures.db")
+        new_index = not os.path.exists(db_path)
+        self.conn = sqlite3.connect(db_path, check_same_thread=False)
+        self.conn.executescript(CAPTURE_SCHEMA)
+        if new_index:
+            self.__index_existing()
+        self.total_count, self.total_bytes = self.conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) "
+                                                               "FROM captures").fetchone()
+        self.__evict()
+
+    def __index_existing(self):
+        # The captures written before the store existed are indexed once, so that they fall under the limits too
+        with self.conn:
+            for c_file in os.listdir(self.capture_dir):
+                if c_file.endswith(".jpg"):
+                    c_path = os.path.join(self.capture_dir, c_file)
+                    self.conn.execute("INSERT INTO captures (outcome, path, size, created) VALUES (?, ?, ?, ?)",
+                                      ("unknown", c_path, os.path.getsize(c_path), os.path.getmtime(c_path)))
+
+    def should_keep(self, outcome):
+        if outcome != "single":
+            return True
+        self.success_count += 1
+
+        return self.success_count % self.success_sample == 1 % self.success_sample
+
+    def save(self, frames, outcome, stamp_id=None, file_names=None):
+        """Stores the captures of a cycle, given as {camera: frame}, if the sampling policy keeps the outcome. The files
+        are named "{camera}_frame_{time}.jpg" unless file_names gives the name of the camera.
+
+        Returns:  paths of the stored captures
+        """
+        if not self.should_keep(outcome=outcome):
+            return []
+        cycle = f"{time.time():.3f}"
+        paths = []
+        for camera, frame in frames.items():
+            if self.scale < 1:
+                frame = cv2.resize(frame, None, fx=self.scale, fy=self.scale, interpolation=cv2.INTER_AREA)
+            c_path = os.path.join(self.capture_dir, (file_names or {}).get(camera, f"{camera}_frame_{cycle}.jpg"))
+            with self.lock, self.conn:
+                capture_id = self.conn.execute("INSERT INTO captures (stamp_id, cycle, camera, outcome, path, size, "
+                                               "created) VALUES (?, ?, ?, ?, ?, 0, ?)",
+                                               (stamp_id, cycle, camera, outcome, c_path, time.time())).lastrowid
+                self.total_count += 1
+            on_written = lambda path, ret, c_id=capture_id: self.__on_written(c_id, path, ret)
+            if self.image_writer.write(c_path, frame, tag="capture", droppable=self.droppable, on_written=on_written):
+                paths.append(c_path)
+            else:
+                with self.lock, self.conn:
+                    self.conn.execute("DELETE FROM captures WHERE capture_id = ?", (capture_id,))
+                    self.total_count -= 1
+
+        return paths
+
+    def __on_written(self, capture_id, path, ret):
+        size = os.path.getsize(path) if ret and os.path.exists(path) else 0
+        with self.lock, self.conn:
+            cursor = self.conn.execute("UPDATE captures SET size = ? WHERE capture_id = ?", (size, capture_id))
+            if cursor.rowcount:
+                self.total_bytes += size
+            elif size:
+                # The capture was evicted while it was queued, the file written afterwards would never be counted
+                os.remove(path)
+        self.__evict()
+
+    def __evict(self):
+        with self.lock, self.conn:
+            rows = self.conn.execute("SELECT capture_id, path, size FROM captures WHERE created < ?",
+                                     (time.time() - self.max_age,)).fetchall()
+            over_count = self.total_count - len(rows) - self.max_count
+            over_bytes = self.total_bytes - sum([row[2] for row in rows]) - self.max_bytes
+            if over_count > 0 or over_bytes > 0:
+                for row in self.conn.execute("SELECT capture_id, path, size FROM captures WHERE created >= ? "
+                                             "ORDER BY created", (time.time() - self.max_age,)):
+                    if over_count <= 0 and over_bytes <= 0:
+                        break
+                    rows.append(row)
+                    over_count -= 1
+                    over_bytes -= row[2]
+            for capture_id, c_path, size in rows:
+                if os.path.exists(c_path):
+                    os.remove(c_path)
+                self.conn.execute("DELETE FROM captures WHERE capture_id = ?", (capture_id,))
+                self.total_count -= 1
+                self.total_bytes -= size
+
+    def find(self, stamp_id):
+        """Returns:  {camera: path} of the captures of the stamp
+        """
+        with self.lock:
+            rows = self.conn.execute("SELECT camera, path FROM captures WHERE stamp_id = ?", (stamp_id,)).fetchall()
+
+        return {camera: c_path for camera, c_path in rows}
+
+    def get_stats(self):
+        with self.lock:
+            return {"count": self.total_count, "mb": self.total_bytes / 1024 / 1024}
+
+    def close(self):
+        with self.lock:
+            self.conn.close()
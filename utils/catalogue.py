@@ -0,0 +1,176 @@
+import os
+import re
+import sqlite3
+import threading
+import time
+
+from settings import OUTPUT_DIR, CATALOGUE_PATH
+
+CATALOGUE_SCHEMA = """
+CREATE TABLE IF NOT EXISTS counters (name TEXT PRIMARY KEY, value INTEGER NOT NULL);
+CREATE TABLE IF NOT EXISTS collections (collection_num INTEGER PRIMARY KEY, path TEXT, image_path TEXT,
+                                        created REAL, completed REAL);
+CREATE TABLE IF NOT EXISTS pictures (collection_num INTEGER, picture_num INTEGER, path TEXT, created REAL,
+                                     PRIMARY KEY (collection_num, picture_num));
+CREATE TABLE IF NOT EXISTS stamps (stamp_id INTEGER PRIMARY KEY, collection_num INTEGER, picture_num INTEGER,
+                                   stamp_num INTEGER, path TEXT, side TEXT, orientation TEXT, created REAL);
+CREATE TABLE IF NOT EXISTS placements (stamp_id INTEGER PRIMARY KEY, collection_num INTEGER, picture_num INTEGER,
+                                       x INTEGER, y INTEGER, width INTEGER, height INTEGER, rotated INTEGER);
+CREATE TABLE IF NOT EXISTS timings (stamp_id INTEGER, stage TEXT, seconds REAL, PRIMARY KEY (stamp_id, stage));
+CREATE TABLE IF NOT EXISTS stamp_papers (paper_num INTEGER PRIMARY KEY, path TEXT, created REAL);
+CREATE INDEX IF NOT EXISTS stamps_picture ON stamps (collection_num, picture_num);
+"""
+COUNTER_STARTS = {"collection": 1, "stamp_paper": 0}
+
+
+class Catalogue:
+    """SQLite index of the output tree: collections, pictures, stamps, their placements on the pictures and the stage
+    timings of every stamp. The next indices are kept as counters, so that they are looked up without scanning the
+    output folder. The catalogue is rebuilt from the output tree when the database does not exist yet.
+    """
+
+    def __init__(self, db_path=CATALOGUE_PATH, output_dir=OUTPUT_DIR):
+        self.output_dir = output_dir
+        self.lock = threading.Lock()
+        new_catalogue = not os.path.exists(db_path)
+        self.conn = sqlite3.connect(db_path, check_same_thread=False)
+        self.conn.executescript(CATALOGUE_SCHEMA)
+        if new_catalogue:
+            self.rebuild()
+
+    def __get_counter(self, name):
+        row = self.conn.execute("SELECT value FROM counters WHERE name = ?", (name,)).fetchone()
+
+        return row[0] if row else COUNTER_STARTS.get(name, 1)
+
+    def __raise_counter(self, name, value):
+        # No upsert, which needs SQLite 3.24 while Ubuntu 18.04 ships 3.22
+        self.conn.execute("INSERT OR IGNORE INTO counters (name, value) VALUES (?, ?)", (name, value))
+        self.conn.execute("UPDATE counters SET value = MAX(value, ?) WHERE name = ?", (value, name))
+
+    def get_next_index(self, name):
+        with self.lock:
+            return self.__get_counter(name)
+
+    def reserve_index(self, name):
+        with self.lock, self.conn:
+            index = self.__get_counter(name)
+            self.__raise_counter(name, index + 1)
+
+        return index
+
+    def add_collection(self, collection_num):
+        with self.lock, self.conn:
+            self.conn.execute("INSERT OR IGNORE INTO collections (collection_num, path, created) VALUES (?, ?, ?)",
+                              (collection_num, os.path.join(self.output_dir, f"collection{collection_num}"),
+                               time.time()))
+            self.__raise_counter("collection", collection_num + 1)
+
+    def complete_collection(self, collection_num, image_path):
+        with self.lock, self.conn:
+            self.conn.execute("UPDATE collections SET image_path = ?, completed = ? WHERE collection_num = ?",
+                              (image_path, time.time(), collection_num))
+
+    def remove_collection(self, collection_num):
+        with self.lock, self.conn:
+            for table in ["collections", "pictures", "placements"]:
+                self.conn.execute(f"DELETE FROM {table} WHERE collection_num = ?", (collection_num,))
+            self.conn.execute("UPDATE stamps SET collection_num = NULL, picture_num = NULL WHERE collection_num = ?",
+                              (collection_num,))
+            # The index of a dropped collection is used again, as the folder does not exist anymore
+            row = self.conn.execute("SELECT MAX(collection_num) FROM collections").fetchone()
+            self.conn.execute("INSERT OR REPLACE INTO counters (name, value) VALUES ('collection', ?)",
+                              ((row[0] or 0) + 1,))
+
+    def add_picture(self, collection_num, picture_num, path, placements=None):
+        """Records the written picture of the collection with the placements of its stamps, given as tuples of
+        (stamp_id, x, y, width, height, rotated).
+        """
+        self.add_collection(collection_num=collection_num)
+        with self.lock, self.conn:
+            self.conn.execute("INSERT OR REPLACE INTO pictures (collection_num, picture_num, path, created) "
+                              "VALUES (?, ?, ?, ?)", (collection_num, picture_num, path, time.time()))
+            for stamp_id, x, y, width, height, rotated in placements or []:
+                self.conn.execute("INSERT OR REPLACE INTO placements VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                                  (stamp_id, collection_num, picture_num, x, y, width, height, int(rotated)))
+                self.conn.execute("UPDATE stamps SET collection_num = ?, picture_num = ? WHERE stamp_id = ?",
+                                  (collection_num, picture_num, stamp_id))
+
+    def get_pictures(self, collection_num):
+        with self.lock:
+            rows = self.conn.execute("SELECT path FROM pictures WHERE collection_num = ? ORDER BY picture_num",
+                                     (collection_num,)).fetchall()
+
+        return [row[0] for row in rows]
+
+    def add_stamp(self, collection_num, picture_num, stamp_num, path=None, side=None, orientation=None, timings=None):
+        """Records the processed stamp with its stage timings in seconds.
+
+        Returns:  stamp id
+        """
+        with self.lock, self.conn:
+            cursor = self.conn.execute("INSERT INTO stamps (collection_num, picture_num, stamp_num, path, side, "
+                                       "orientation, created) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                                       (collection_num, picture_num, stamp_num, path, side, orientation, time.time()))
+            stamp_id = cursor.lastrowid
+        self.add_timings(stamp_id=stamp_id, timings=timings or {})
+
+        return stamp_id
+
+    def add_timings(self, stamp_id, timings):
+        with self.lock, self.conn:
+            for stage, seconds in timings.items():
+                self.conn.execute("INSERT OR REPLACE INTO timings VALUES (?, ?, ?)", (stamp_id, stage, seconds))
+
+    def get_stage_timings(self):
+        with self.lock:
+            rows = self.conn.execute("SELECT stage, AVG(seconds), MAX(seconds), COUNT(*) FROM timings "
+                                     "GROUP BY stage").fetchall()
+
+        return {stage: {"mean": mean, "max": max_sec, "count": count} for stage, mean, max_sec, count in rows}
+
+    def add_stamp_paper(self, paper_num, path):
+        with self.lock, self.conn:
+            self.conn.execute("INSERT OR REPLACE INTO stamp_papers VALUES (?, ?, ?)", (paper_num, path, time.time()))
+            self.__raise_counter("stamp_paper", paper_num + 1)
+
+    def rebuild(self):
+        """Fills the collections, the pictures, the stamp papers and the counters from the output tree. The stamps,
+        the placements and the timings are not stored in the tree, so they are kept as they are.
+        """
+        with self.lock, self.conn:
+            for table in ["counters", "collections", "pictures", "stamp_papers"]:
+                self.conn.execute(f"DELETE FROM {table}")
+            for o_name in os.listdir(self.output_dir):
+                o_path = os.path.join(self.output_dir, o_name)
+                paper_match = re.fullmatch(r"StampPaper(\d+)\.jpg", o_name)
+                collection_match = re.fullmatch(r"collection(\d+)", o_name)
+                if paper_match:
+                    paper_num = int(paper_match.group(1))
+                    self.conn.execute("INSERT INTO stamp_papers VALUES (?, ?, ?)",
+                                      (paper_num, o_path, os.path.getmtime(o_path)))
+                    self.__raise_counter("stamp_paper", paper_num + 1)
+                elif collection_match and os.path.isdir(o_path):
+                    collection_num = int(collection_match.group(1))
+                    image_path = os.path.join(o_path, f"Collection{collection_num}.jpg")
+                    completed = os.path.getmtime(image_path) if os.path.exists(image_path) else None
+                    self.conn.execute("INSERT INTO collections VALUES (?, ?, ?, ?, ?)",
+                                      (collection_num, o_path, image_path if completed else None,
+                                       os.path.getmtime(o_path), completed))
+                    self.__raise_counter("collection", collection_num + 1)
+                    for p_name in os.listdir(o_path):
+                        picture_match = re.fullmatch(r"Picture(\d+)\.jpg", p_name)
+                        if picture_match:
+                            p_path = os.path.join(o_path, p_name)
+                            self.conn.execute("INSERT INTO pictures VALUES (?, ?, ?, ?)",
+                                              (collection_num, int(picture_match.group(1)), p_path,
+                                               os.path.getmtime(p_path)))
+        print(f"[INFO] Rebuilt the catalogue from {self.output_dir}")
+
+    def close(self):
+        with self.lock:
+            self.conn.close()
+
+
+if __name__ == '__main__':
+    Catalogue().rebuild()
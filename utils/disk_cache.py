@@ -0,0 +1,71 @@
+import os
+import json
+import hashlib
+import threading
+
+from collections import OrderedDict
+from utils.folder_file_manager import make_directory_if_not_exists
+
+
+def get_content_key(content, *extra):
+    content_hash = hashlib.sha256(content)
+    for e_value in extra:
+        content_hash.update(str(e_value).encode("utf-8"))
+
+    return content_hash.hexdigest()
+
+
+class DiskCache:
+    """JSON values on disk keyed by a content hash, evicting the least recently used entries.
+    """
+
+    def __init__(self, cache_dir, max_entries):
+        self.cache_dir = make_directory_if_not_exists(cache_dir)
+        self.max_entries = max_entries
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        # The access order survives restarts through the file modification times
+        cache_files = [c_file for c_file in os.listdir(self.cache_dir) if c_file.endswith(".json")]
+        cache_files.sort(key=lambda k: os.path.getmtime(os.path.join(self.cache_dir, k)))
+        self.entries = OrderedDict([(c_file[:-5], None) for c_file in cache_files])
+
+    def __get_path(self, key):
+        return os.path.join(self.cache_dir, f"{key}.json")
+
+    def get(self, key):
+        with self.lock:
+            if key not in self.entries:
+                self.misses += 1
+                return None
+            self.entries.move_to_end(key)
+            self.hits += 1
+        try:
+            with open(self.__get_path(key)) as cache_file:
+                value = json.load(cache_file)
+            os.utime(self.__get_path(key))
+        except (OSError, ValueError):
+            with self.lock:
+                self.entries.pop(key, None)
+            return None
+
+        return value
+
+    def put(self, key, value):
+        tmp_path = self.__get_path(key) + ".tmp"
+        with open(tmp_path, 'w') as cache_file:
+            json.dump(value, cache_file)
+        os.replace(tmp_path, self.__get_path(key))
+        with self.lock:
+            self.entries[key] = None
+            self.entries.move_to_end(key)
+            evicted = []
+            while len(self.entries) > self.max_entries:
+                evicted.append(self.entries.popitem(last=False)[0])
+        for e_key in evicted:
+            try:
+                os.remove(self.__get_path(e_key))
+            except OSError:
+                pass
+
+        return
@@ -1,26 +1,49 @@
 import base64
+import copy
 import json
+import time
+import threading
 import requests
+import cv2
 
+from collections import deque
+from requests.adapters import HTTPAdapter
+from utils.disk_cache import DiskCache, get_content_key
 from utils.folder_file_manager import load_text, log_print
-from settings import CREDENTIAL_PATH
+from settings import CREDENTIAL_PATH, VISION_CACHE_DIR, VISION_ENDPOINT_URL, VISION_CONNECT_TIMEOUT, \
+    VISION_READ_TIMEOUT, VISION_DEADLINE, VISION_MAX_RETRIES, VISION_RETRY_BACKOFF, VISION_POOL_SIZE, \
+    VISION_BATCH_SIZE, VISION_CACHE_ENTRIES, OCR_MAX_SIDE, OCR_JPEG_QUALITY
 
+RETRY_STATUS_CODES = [429, 500, 502, 503, 504]
 
-class GoogleVisionAPI:
-    """Construct and use the Google Vision API service."""
-
-    def __init__(self):
 
-        self.endpoint_url = 'https://vision.googleapis.com/v1/images:annotate'
-        self.api_key = load_text(CREDENTIAL_PATH)
+class GoogleVisionAPI:
+    """Construct and use the Google Vision API service.
+
+    The connections are kept alive in one session, every call is bounded by a deadline including its retries, and
+    the responses are cached on disk by the hash of the image content.
+    """
+
+    def __init__(self, endpoint_url=VISION_ENDPOINT_URL, api_key=None, cache_dir=VISION_CACHE_DIR,
+                 deadline=VISION_DEADLINE):
+
+        self.endpoint_url = endpoint_url
+        self.api_key = api_key if api_key is not None else load_text(CREDENTIAL_PATH)
+        self.deadline = deadline
+        self.session = requests.Session()
+        self.session.mount(self.endpoint_url, HTTPAdapter(pool_connections=1, pool_maxsize=VISION_POOL_SIZE))
+        self.session.headers.update({'Content-Type': 'application/json'})
+        self.cache = DiskCache(cache_dir=cache_dir, max_entries=VISION_CACHE_ENTRIES) if cache_dir else None
+        self.latencies = deque(maxlen=1000)
+        self.payloads = deque(maxlen=1000)
+        self.lock = threading.Lock()
 
     @staticmethod
-    def __make_request(img_path, feature_type):
+    def __make_request(contents, feature_type):
         request_list = []
 
-        # Read the image and convert to json
-        with open(img_path, 'rb') as img_file:
-            content_json_obj = {'content': base64.b64encode(img_file.read()).decode('UTF-8')}
+        for content in contents:
+            content_json_obj = {'content': base64.b64encode(content).decode('UTF-8')}
 
             feature_json_obj = [{'type': feature_type}]
 
@@ -29,35 +52,131 @@ class GoogleVisionAPI:
                  'features': feature_json_obj}
             )
 
-        # Write the object to a file, as json
-        # output_filename = 'request.json'
-        # with open(output_filename, 'w') as output_json:
-        #     json.dump({'requests': request_list}, output_json)
-
         return json.dumps({'requests': request_list}).encode()
 
-    def __get_response(self, json_data):
-
-        response = requests.post(
-            url=self.endpoint_url,
-            data=json_data,
-            params={'key': self.api_key},
-            headers={'Content-Type': 'application/json'})
+    def __post(self, json_data):
+        deadline_time = time.monotonic() + self.deadline
+        for attempt in range(VISION_MAX_RETRIES + 1):
+            remaining = deadline_time - time.monotonic()
+            if remaining <= 0:
+                break
+            st_time = time.monotonic()
+            try:
+                response = self.session.post(url=self.endpoint_url, data=json_data, params={'key': self.api_key},
+                                             timeout=(min(VISION_CONNECT_TIMEOUT, remaining),
+                                                      min(VISION_READ_TIMEOUT, remaining)))
+                with self.lock:
+                    self.latencies.append(time.monotonic() - st_time)
+                if response.status_code not in RETRY_STATUS_CODES:
+                    return json.loads(response.text)
+                log_print(f"Vision API status {response.status_code}", file_path="error.log")
+            except requests.RequestException as e:
+                log_print(e, file_path="error.log")
+            except ValueError as e:
+                # A body which is not JSON, like the HTML page of a 403, is not retried, the caller falls back on None
+                log_print(f"Vision API status {response.status_code}: {e}", file_path="error.log")
+                return None
+            backoff = VISION_RETRY_BACKOFF * 2 ** attempt
+            # A retry that could not finish before the deadline is not started
+            if time.monotonic() + backoff >= deadline_time:
+                break
+            time.sleep(backoff)
+
+        return None
+
+    def __get_responses(self, contents, feature_type):
+        keys = [get_content_key(content, feature_type) for content in contents]
+        responses = [self.cache.get(key) if self.cache is not None else None for key in keys]
+        missing = [idx for idx, response in enumerate(responses) if response is None]
+        for b_start in range(0, len(missing), VISION_BATCH_SIZE):
+            batch = missing[b_start:b_start + VISION_BATCH_SIZE]
+            ret_json = self.__post(self.__make_request(contents=[contents[idx] for idx in batch],
+                                                       feature_type=feature_type))
+            try:
+                batch_responses = ret_json['responses']
+            except Exception as e:
+                log_print(e, file_path="error.log")
+                continue
+            for idx, response in zip(batch, batch_responses):
+                responses[idx] = response
+                if self.cache is not None and "error" not in response:
+                    self.cache.put(keys[idx], response)
+
+        return responses
 
-        # print(response)
-        ret_json = json.loads(response.text)
-        try:
-            return ret_json['responses'][0]  # [info_field]
-        except Exception as e:
-            log_print(e, file_path="error.log")
-            return None
+    @staticmethod
+    def __read_content(path):
+        with open(path, 'rb') as img_file:
+            return img_file.read()
 
     def detect_text(self, path):
 
-        ret_json = self.__get_response(self.__make_request(img_path=path, feature_type='DOCUMENT_TEXT_DETECTION'))
+        ret_json = self.__get_responses(contents=[self.__read_content(path)],
+                                        feature_type='DOCUMENT_TEXT_DETECTION')[0]
 
         return ret_json
 
+    @staticmethod
+    def __scale_vertices(response, scale):
+        # Vision leaves out the coordinates equal to 0, so only the present ones are scaled
+        scaled_response = copy.deepcopy(response)
+        for annotation in scaled_response.get("textAnnotations", []):
+            for vertex in annotation.get("boundingPoly", {}).get("vertices", []):
+                for axis in ["x", "y"]:
+                    if axis in vertex:
+                        vertex[axis] = int(round(vertex[axis] / scale))
+
+        return scaled_response
+
+    def detect_text_from_image(self, frame, max_side=OCR_MAX_SIDE, quality=OCR_JPEG_QUALITY):
+        """Detects the text of an in-memory image, encoded at most max_side pixels long with the given JPEG quality.
+        The returned vertices are in the coordinates of the original frame.
+        """
+        height, width = frame.shape[:2]
+        scale = min(1.0, max_side / max(height, width)) if max_side else 1.0
+        if scale < 1.0:
+            frame = cv2.resize(frame, None, fx=scale, fy=scale, interpolation=cv2.INTER_AREA)
+        content = cv2.imencode('.jpg', frame, [cv2.IMWRITE_JPEG_QUALITY, quality])[1].tobytes()
+        st_time = time.monotonic()
+        ret_json = self.__get_responses(contents=[content], feature_type='DOCUMENT_TEXT_DETECTION')[0]
+        with self.lock:
+            self.payloads.append((len(content), time.monotonic() - st_time))
+        if ret_json is not None and scale < 1.0:
+            ret_json = self.__scale_vertices(response=ret_json, scale=scale)
+
+        return ret_json
+
+    def get_payload_stats(self):
+        with self.lock:
+            payloads = list(self.payloads)
+        if not payloads:
+            return {"count": 0}
+
+        return {"count": len(payloads), "mean_bytes": sum([p[0] for p in payloads]) / len(payloads),
+                "mean_round_trip": sum([p[1] for p in payloads]) / len(payloads)}
+
+    def detect_text_batch(self, paths):
+        """Detects the text of several images, sending the images missing from the cache in batched requests.
+        """
+        return self.__get_responses(contents=[self.__read_content(path) for path in paths],
+                                    feature_type='DOCUMENT_TEXT_DETECTION')
+
+    def get_latency_stats(self):
+        with self.lock:
+            latencies = sorted(self.latencies)
+        if not latencies:
+            return {"count": 0}
+
+        def percentile(p_value):
+            return latencies[min(int(len(latencies) * p_value / 100), len(latencies) - 1)]
+
+        stats = {"count": len(latencies), "p50": percentile(50), "p90": percentile(90), "p99": percentile(99),
+                 "max": latencies[-1]}
+        if self.cache is not None:
+            stats.update({"cache_hits": self.cache.hits, "cache_misses": self.cache.misses})
+
+        return stats
+
 
 if __name__ == '__main__':
     GoogleVisionAPI().detect_text(path="")
@@ -0,0 +1,106 @@
+import time
+import queue
+import threading
+import cv2
+
+from collections import deque
+from settings import IMAGE_WRITER_WORKERS, IMAGE_WRITER_QUEUE_SIZE, IMAGE_WRITER_POLICY
+
+
+class AsyncImageWriter:
+    """Encodes and writes images on worker threads, off the control loop.
+
+    The writer takes ownership of the frames: they must not be modified once they are queued. When the queue is full,
+    write() blocks until a worker is free (backpressure), except for droppable images with the "drop" policy, which are
+    then skipped. With 0 workers the images are written in the calling thread.
+    """
+
+    def __init__(self, workers=IMAGE_WRITER_WORKERS, max_queue=IMAGE_WRITER_QUEUE_SIZE, policy=IMAGE_WRITER_POLICY):
+        self.policy = policy
+        self.queue = queue.Queue(maxsize=max_queue)
+        self.lock = threading.Lock()
+        self.latencies = {}
+        self.dropped = {}
+        self.failed = {}
+        self.threads = []
+        for _ in range(workers):
+            w_thread = threading.Thread(target=self.__run, daemon=True)
+            w_thread.start()
+            self.threads.append(w_thread)
+
+    def write(self, path, frame, tag="image", params=None, droppable=False, on_written=None):
+        """Queues the frame to be written into path, tag groups the latency statistics. on_written(path, ret) is
+        called from the worker once the write is done.
+
+        Returns:  False if the frame was dropped, otherwise True
+        """
+        item = (path, frame, params or [], tag, time.time(), on_written)
+        if not self.threads:
+            self.__write(*item)
+            return True
+        if droppable and self.policy == "drop":
+            try:
+                self.queue.put_nowait(item)
+            except queue.Full:
+                with self.lock:
+                    self.dropped[tag] = self.dropped.get(tag, 0) + 1
+                return False
+        else:
+            self.queue.put(item)
+
+        return True
+
+    def __write(self, path, frame, params, tag, enqueue_time, on_written):
+        try:
+            ret = cv2.imwrite(path, frame, params)
+        except Exception as e:
+            print(f"[WARN] Failed to write {path}: {e}")
+            ret = False
+        with self.lock:
+            if not ret:
+                self.failed[tag] = self.failed.get(tag, 0) + 1
+            self.latencies.setdefault(tag, deque(maxlen=100)).append(time.time() - enqueue_time)
+        if on_written is not None:
+            # A failing callback must not kill the worker, flush() would wait for its queue forever
+            try:
+                on_written(path, ret)
+            except Exception as e:
+                print(f"[WARN] Callback of {path} failed: {e}")
+
+    def __run(self):
+        while True:
+            item = self.queue.get()
+            try:
+                if item is None:
+                    break
+                self.__write(*item)
+            finally:
+                self.queue.task_done()
+
+    def flush(self):
+        # Waits until every queued image is on disk
+        self.queue.join()
+
+    def get_stats(self):
+        """Returns:  enqueue to disk latency per tag over the last 100 images, with the dropped and failed counts
+        """
+        with self.lock:
+            stats = {}
+            for tag in set(self.latencies) | set(self.dropped):
+                latencies = list(self.latencies.get(tag, []))
+                stats[tag] = {
+                    "mean_latency": sum(latencies) / len(latencies) if latencies else None,
+                    "max_latency": max(latencies) if latencies else None,
+                    "dropped": self.dropped.get(tag, 0),
+                    "failed": self.failed.get(tag, 0)
+                }
+
+        return {"queued": self.queue.qsize(), "tags": stats}
+
+    def close(self):
+        self.flush()
+        for _ in self.threads:
+            self.queue.put(None)
+        for w_thread in self.threads:
+            w_thread.join()
+        self.threads = []
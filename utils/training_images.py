@@ -6,6 +6,19 @@ import cv2
 from settings import CUR_DIR
 
 
+def get_rotation_label(img_path):
+    # The label is the correction run_main_process applies, e.g. an image rotated clockwise needs "counter_clock"
+    image_name = ntpath.basename(img_path).replace(".jpg", "")
+    if image_name.endswith("_counter_clocked"):
+        return "clock"
+    elif image_name.endswith("_clocked"):
+        return "counter_clock"
+    elif image_name.endswith("_180"):
+        return "reflection"
+
+    return "normal"
+
+
 def collect_rotated_images(img_dir):
     image_paths = glob.glob(os.path.join(img_dir, "*.jpg"))
     for i_path in image_paths: